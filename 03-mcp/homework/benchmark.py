@@ -0,0 +1,90 @@
+"""
+Compare the BM25 engine (bm25.py) with minsearch on the FastMCP docs.
+
+Reports build time, query latency (p50/p95) and retrieval quality. Quality
+is measured with queries derived from the corpus itself: the first heading
+of each page is used as a query and the page it came from is the expected
+answer (hit@5 and MRR@5 at file level).
+
+    uv run benchmark.py [--zip fastmcp-main.zip] [--queries 200]
+"""
+import re
+import time
+import random
+import argparse
+import statistics
+
+import minsearch
+
+from bm25 import build_chunked_index
+from docs_index import get_documents
+
+TITLE_RE = re.compile(r"^#\s+(.+)$|^title:\s*[\"']?(.+?)[\"']?\s*$", re.MULTILINE)
+
+
+def make_queries(documents, limit, seed=42):
+    """(query, expected filename) pairs taken from page titles."""
+    pairs = []
+    for doc in documents:
+        match = TITLE_RE.search(doc["content"])
+        if not match:
+            continue
+        title = (match.group(1) or match.group(2)).strip()
+        if len(title.split()) >= 2:
+            pairs.append((title, doc["filename"]))
+    random.Random(seed).shuffle(pairs)
+    return pairs[:limit]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def evaluate(name, search_fn, queries, k=5):
+    latencies = []
+    hits = 0
+    reciprocal_ranks = 0.0
+    for query, expected in queries:
+        start = time.perf_counter()
+        results = search_fn(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        # Chunk-level results can repeat a file; rank at file level, top k only
+        files = list(dict.fromkeys(r["filename"] for r in results))[:k]
+        if expected in files:
+            hits += 1
+            reciprocal_ranks += 1 / (files.index(expected) + 1)
+
+    n = len(queries) or 1
+    print(f"{name:<10} p50 {statistics.median(latencies):7.2f} ms   p95 {percentile(latencies, 95):7.2f} ms   "
+          f"hit@{k} {hits / n:.3f}   MRR@{k} {reciprocal_ranks / n:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 vs minsearch on the FastMCP docs")
+    parser.add_argument("--zip", default=None, help="Docs zip (downloaded if omitted)")
+    parser.add_argument("--queries", type=int, default=200, help="Number of evaluation queries")
+    args = parser.parse_args()
+
+    documents = get_documents(args.zip)
+    queries = make_queries(documents, args.queries)
+    print(f"{len(documents)} documents, {len(queries)} queries\n")
+
+    start = time.perf_counter()
+    ms_index = minsearch.Index(text_fields=["content", "filename"], keyword_fields=[])
+    ms_index.fit(documents)
+    print(f"minsearch build: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    bm25_index = build_chunked_index(documents)
+    print(f"bm25 build:      {(time.perf_counter() - start) * 1000:.0f} ms ({len(bm25_index.docs)} sections)\n")
+
+    evaluate("minsearch", lambda q, k: ms_index.search(
+        query=q, filter_dict={}, boost_dict={"filename": 1, "content": 1}, num_results=k), queries)
+    # Ask for extra sections so that k distinct files can be ranked; evaluate() keeps k
+    evaluate("bm25", lambda q, k: bm25_index.search(query=q, num_results=k * 3), queries)
+
+
+if __name__ == "__main__":
+    main()
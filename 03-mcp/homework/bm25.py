@@ -0,0 +1,266 @@
+"""
+A small BM25 search engine for markdown documentation.
+
+- Documents are split into heading sections ("chunks") so results point at
+  the relevant part of a page instead of the whole file.
+- Each field (filename, section, content) has its own inverted index.
+  Postings are stored as compact array('I') pairs of chunk ids and term
+  frequencies, which keeps the index small and fast to pickle.
+- Scores are summed per field with a field boost; the top k are taken with
+  a heap rather than sorting every candidate.
+- Documents can be added and removed one file at a time. Removed sections
+  are tombstoned and skipped while scoring; compact() drops them from the
+  postings once enough have accumulated, without re-tokenising anything.
+"""
+import re
+import math
+import heapq
+from array import array
+from collections import defaultdict, Counter
+
+TOKEN_RE = re.compile(r"\w\w+")
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+
+DEFAULT_FIELDS = ("filename", "section", "content")
+DEFAULT_BOOSTS = {"filename": 2.0, "section": 1.5, "content": 1.0}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def split_sections(filename, content):
+    """
+    Split a markdown document at its headings (ignoring '#' lines inside code fences).
+    Text before the first heading becomes a section titled after the file.
+    """
+    sections = []
+    title = filename
+    lines = []
+    in_code = False
+    for line in content.splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else HEADING_RE.match(line)
+        if match:
+            heading = match.group(2).strip()
+            has_body = any(l.strip() and not HEADING_RE.match(l) for l in lines)
+            if has_body:
+                sections.append((title, "\n".join(lines).strip()))
+                title = heading
+                lines = [line]
+            elif lines and HEADING_RE.match(lines[0]):
+                # A heading directly followed by a sub-heading: keep both in one section
+                title = f"{title} / {heading}"
+                lines.append(line)
+            else:
+                title = heading
+                lines = [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((title, "\n".join(lines).strip()))
+    if not sections:
+        sections.append((title, content.strip()))
+    return [{"filename": filename, "section": t, "content": c} for t, c in sections]
+
+
+def analyze_document(filename, content, fields=DEFAULT_FIELDS):
+    """
+    Split a document into sections and tokenise each field.
+    Pure function of its inputs, so it can run in a worker process.
+    Returns [(section_doc, {field: tokens})].
+    """
+    return [
+        (chunk, {field: tokenize(chunk.get(field) or "") for field in fields})
+        for chunk in split_sections(filename, content)
+    ]
+
+
+class FieldIndex:
+    """Inverted index for one field: term -> (chunk ids, term frequencies)."""
+
+    def __init__(self):
+        self.doc_ids = {}
+        self.freqs = {}
+        self.lengths = array("I")
+        self.total_length = 0
+
+    def add(self, chunk_id, tokens):
+        counts = Counter(tokens)
+        for term, tf in counts.items():
+            ids = self.doc_ids.get(term)
+            if ids is None:
+                ids = self.doc_ids[term] = array("I")
+                self.freqs[term] = array("I")
+            ids.append(chunk_id)
+            self.freqs[term].append(tf)
+        self.lengths.append(len(tokens))
+        self.total_length += len(tokens)
+
+    def remove(self, chunk_id):
+        self.total_length -= self.lengths[chunk_id]
+
+    def avg_length(self, n_docs):
+        return self.total_length / n_docs if n_docs else 0.0
+
+    def compact(self, remap):
+        """Drop postings of removed chunks and renumber the rest (remap: old id -> new id)."""
+        doc_ids = {}
+        freqs = {}
+        for term, ids in self.doc_ids.items():
+            new_ids = array("I")
+            new_freqs = array("I")
+            for chunk_id, tf in zip(ids, self.freqs[term]):
+                new_id = remap.get(chunk_id)
+                if new_id is not None:
+                    new_ids.append(new_id)
+                    new_freqs.append(tf)
+            if new_ids:
+                doc_ids[term] = new_ids
+                freqs[term] = new_freqs
+        self.doc_ids = doc_ids
+        self.freqs = freqs
+        old_lengths = self.lengths
+        self.lengths = array("I", (old_lengths[old] for old in sorted(remap)))
+
+
+class BM25Index:
+    # Compact once this fraction of the stored sections are tombstones
+    COMPACT_RATIO = 0.25
+
+    def __init__(self, fields=DEFAULT_FIELDS, k1=1.2, b=0.75):
+        self.fields = tuple(fields)
+        self.k1 = k1
+        self.b = b
+        self.docs = []
+        self.field_indexes = {field: FieldIndex() for field in self.fields}
+        self.deleted = set()
+        # filename -> chunk ids, and filename -> fingerprint of the indexed version
+        self.file_chunks = {}
+        self.file_fingerprints = {}
+
+    @property
+    def live_count(self):
+        return len(self.docs) - len(self.deleted)
+
+    def add(self, doc, tokens=None):
+        """Add one section. tokens ({field: [tokens]}) may be precomputed by analyze_document."""
+        chunk_id = len(self.docs)
+        self.docs.append(doc)
+        for field in self.fields:
+            field_tokens = tokens[field] if tokens is not None else tokenize(doc.get(field) or "")
+            self.field_indexes[field].add(chunk_id, field_tokens)
+        return chunk_id
+
+    def fit(self, docs):
+        for doc in docs:
+            self.add(doc)
+        return self
+
+    def add_document(self, filename, content, fingerprint=None):
+        """Index one file as heading sections, replacing any previous version of it."""
+        return self.add_analyzed(filename, analyze_document(filename, content, self.fields), fingerprint)
+
+    def add_analyzed(self, filename, analyzed, fingerprint=None):
+        """Index the output of analyze_document for one file."""
+        if filename in self.file_chunks:
+            self.remove_document(filename)
+        ids = [self.add(chunk, tokens) for chunk, tokens in analyzed]
+        self.file_chunks[filename] = ids
+        self.file_fingerprints[filename] = fingerprint
+        return ids
+
+    def remove_document(self, filename):
+        ids = self.file_chunks.pop(filename, [])
+        self.file_fingerprints.pop(filename, None)
+        for chunk_id in ids:
+            if chunk_id in self.deleted:
+                continue
+            self.deleted.add(chunk_id)
+            for field in self.fields:
+                self.field_indexes[field].remove(chunk_id)
+        return len(ids)
+
+    def maybe_compact(self):
+        if self.docs and len(self.deleted) / len(self.docs) >= self.COMPACT_RATIO:
+            self.compact()
+
+    def compact(self):
+        if not self.deleted:
+            return
+        remap = {}
+        docs = []
+        for old_id, doc in enumerate(self.docs):
+            if old_id not in self.deleted:
+                remap[old_id] = len(docs)
+                docs.append(doc)
+        for field in self.fields:
+            self.field_indexes[field].compact(remap)
+        self.file_chunks = {
+            filename: [remap[i] for i in ids if i in remap]
+            for filename, ids in self.file_chunks.items()
+        }
+        self.docs = docs
+        self.deleted = set()
+
+    def _score_field(self, field, terms, boost, scores):
+        index = self.field_indexes[field]
+        n_docs = self.live_count
+        deleted = self.deleted
+        avgdl = index.avg_length(n_docs) or 1.0
+        k1, b = self.k1, self.b
+        lengths = index.lengths
+        for term in terms:
+            ids = index.doc_ids.get(term)
+            if ids is None:
+                continue
+            df = len(ids)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            weight = boost * idf
+            norm = k1 * (1 - b)
+            scale = k1 * b / avgdl
+            if deleted:
+                # Document frequency still counts tombstones until the next compaction
+                for chunk_id, tf in zip(ids, index.freqs[term]):
+                    if chunk_id not in deleted:
+                        scores[chunk_id] += weight * tf * (k1 + 1) / (tf + norm + scale * lengths[chunk_id])
+            else:
+                for chunk_id, tf in zip(ids, index.freqs[term]):
+                    scores[chunk_id] += weight * tf * (k1 + 1) / (tf + norm + scale * lengths[chunk_id])
+
+    def search(self, query, filter_dict=None, boost_dict=None, num_results=10):
+        """
+        Return the top num_results chunks as dicts (the stored fields plus "score").
+        filter_dict does exact matching on stored fields; boost_dict overrides field boosts.
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.live_count:
+            return []
+        boosts = dict(DEFAULT_BOOSTS)
+        if boost_dict:
+            boosts.update(boost_dict)
+
+        scores = defaultdict(float)
+        for field in self.fields:
+            boost = boosts.get(field, 1.0)
+            if boost:
+                self._score_field(field, terms, boost, scores)
+
+        candidates = scores.items()
+        if filter_dict:
+            candidates = (
+                (chunk_id, score) for chunk_id, score in candidates
+                if all(self.docs[chunk_id].get(k) == v for k, v in filter_dict.items())
+            )
+
+        top = heapq.nlargest(num_results, candidates, key=lambda item: item[1])
+        return [dict(self.docs[chunk_id], score=score) for chunk_id, score in top]
+
+
+def build_chunked_index(documents):
+    """Index documents ({"filename", "content"[, "fingerprint"]}) at heading-section granularity."""
+    index = BM25Index()
+    for doc in documents:
+        index.add_document(doc["filename"], doc["content"], doc.get("fingerprint"))
+    return index
@@ -0,0 +1,360 @@
+import os
+import sys
+import time
+import hashlib
+import pickle
+import threading
+import zipfile
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import requests
+from bm25 import BM25Index, analyze_document, build_chunked_index
+
+DOCS_URL = "https://github.com/jlowin/fastmcp/archive/refs/heads/main.zip"
+ZIP_PATH = "fastmcp-main.zip"
+INDEX_PATH = "fastmcp-docs.index"
+
+# Bump when the index layout changes so stale files on disk are rebuilt
+INDEX_FORMAT_VERSION = 3
+
+# Worker processes used to decode and tokenise files while (re)building the index.
+# 0 keeps everything in-process, which is fastest for small doc sets.
+INDEX_WORKERS = int(os.environ.get("INDEX_WORKERS", "0"))
+
+
+def download_and_extract(url=DOCS_URL, zip_path=ZIP_PATH, force=False):
+    """Download the docs zip unless it is already cached (or force is set)."""
+    if force or not os.path.exists(zip_path):
+        response = requests.get(url)
+        response.raise_for_status()
+        # Write to a temp file first so a failed download never replaces a good zip
+        tmp_path = f"{zip_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp_path, zip_path)
+
+    return zip_path
+
+
+def is_doc_file(path):
+    return path.endswith(".md") or path.endswith(".mdx")
+
+
+def iter_source_files(source):
+    """
+    Yield (filename, fingerprint, locator) for every .md/.mdx file in a zip or directory,
+    one entry at a time. read_entry(locator) returns the decoded text; locators are
+    plain tuples so they can also be sent to worker processes.
+
+    Zip fingerprints come from the central directory (CRC-32 and size), so unchanged
+    entries are never decompressed. Directory files are fingerprinted by SHA-256.
+    """
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if not is_doc_file(name):
+                    continue
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, source).replace(os.sep, "/")
+                yield filename, "sha256:" + file_sha256(path), ("file", path)
+        return
+
+    with zipfile.ZipFile(source, 'r') as z:
+        for file_info in z.infolist():
+            if file_info.is_dir() or not is_doc_file(file_info.filename):
+                continue
+
+            # Remove first part of path
+            # e.g. fastmcp-main/docs/welcome.mdx -> docs/welcome.mdx
+            parts = file_info.filename.split("/", 1)
+            if len(parts) > 1:
+                filename = parts[1]
+            else:
+                filename = file_info.filename
+
+            fingerprint = f"crc32:{file_info.CRC:08x}:{file_info.file_size}"
+            yield filename, fingerprint, ("zip", source, file_info.filename)
+
+
+# Most recently opened zip (per process), so reading entries one by one
+# does not re-parse the central directory every time
+_open_zip = {"key": None, "zip": None}
+
+
+def _zip_handle(path):
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    if _open_zip["key"] != key:
+        if _open_zip["zip"] is not None:
+            _open_zip["zip"].close()
+        _open_zip["zip"] = zipfile.ZipFile(path, 'r')
+        _open_zip["key"] = key
+    return _open_zip["zip"]
+
+
+def read_entry(locator):
+    kind, path, *member = locator
+    if kind == "zip":
+        return _zip_handle(path).read(member[0]).decode("utf-8")
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def iter_documents(source=None):
+    """Stream documents ({"filename", "content", "fingerprint"}) without holding them all in memory."""
+    source = source or download_and_extract()
+    for filename, fingerprint, locator in iter_source_files(source):
+        yield {"filename": filename, "content": read_entry(locator), "fingerprint": fingerprint}
+
+
+def get_documents(source=None):
+    return list(iter_documents(source))
+
+
+def analyze_entry(entry):
+    """Read and tokenise one source entry."""
+    filename, fingerprint, locator = entry
+    return filename, fingerprint, analyze_document(filename, read_entry(locator))
+
+
+def analyze_batch(entries):
+    # Runs in a worker process; batching keeps the per-task IPC overhead low
+    return [analyze_entry(entry) for entry in entries]
+
+
+def iter_analyzed(entries, workers=0, batch_size=32):
+    """
+    Yield analyze_entry results in order. With workers > 1 the entries are decoded
+    and tokenised in a process pool, batch_size files per task, with at most
+    workers * 2 batches in flight, so memory stays bounded however large the source is.
+    """
+    if workers <= 1:
+        for entry in entries:
+            yield analyze_entry(entry)
+        return
+
+    # spawn rather than fork: the index is usually built on a background thread
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) == batch_size:
+                pending.append(pool.submit(analyze_batch, batch))
+                batch = []
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+        if batch:
+            pending.append(pool.submit(analyze_batch, batch))
+        while pending:
+            yield from pending.popleft().result()
+
+
+def build_index(documents):
+    """BM25 index over heading sections of the documents (see bm25.py)."""
+    return build_chunked_index(documents)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def save_index(index, source_hash, index_path=INDEX_PATH):
+    """
+    Write the index to disk. The small header is pickled first so that
+    a stale file can be detected without loading the whole index.
+    The write goes to a temp file and is renamed into place atomically.
+    """
+    header = {"version": INDEX_FORMAT_VERSION, "source_hash": source_hash}
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, index_path)
+
+
+def read_index_header(index_path=INDEX_PATH):
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path, "rb") as f:
+            header = pickle.load(f)
+        return header if header.get("version") == INDEX_FORMAT_VERSION else None
+    except Exception as e:
+        print(f"Ignoring unreadable index file {index_path}: {e}", file=sys.stderr)
+        return None
+
+
+def read_index(index_path=INDEX_PATH):
+    """Return the stored index regardless of its source, or None if missing/incompatible."""
+    if read_index_header(index_path) is None:
+        return None
+    with open(index_path, "rb") as f:
+        pickle.load(f)
+        return pickle.load(f)
+
+
+def load_index(source_hash, index_path=INDEX_PATH):
+    """Return the stored index if it was built from the same source, otherwise None."""
+    header = read_index_header(index_path)
+    if header is None or header.get("source_hash") != source_hash:
+        return None
+    return read_index(index_path)
+
+
+def refresh_index(index, source, workers=0):
+    """
+    Bring index in line with source by diffing per-file fingerprints.
+    Only new or changed files are read and re-indexed; files gone from the source are removed.
+    Files are streamed from the source straight into the index (see iter_analyzed).
+    """
+    stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    seen = set()
+
+    def changed_entries():
+        for filename, fingerprint, locator in iter_source_files(source):
+            seen.add(filename)
+            if filename in index.file_fingerprints and index.file_fingerprints[filename] == fingerprint:
+                stats["unchanged"] += 1
+                continue
+            yield filename, fingerprint, locator
+
+    for filename, fingerprint, analyzed in iter_analyzed(changed_entries(), workers):
+        stats["updated" if filename in index.file_fingerprints else "added"] += 1
+        index.add_analyzed(filename, analyzed, fingerprint)
+
+    for filename in set(index.file_fingerprints) - seen:
+        index.remove_document(filename)
+        stats["removed"] += 1
+
+    index.maybe_compact()
+    return stats
+
+
+def default_source():
+    # DOCS_SOURCE may point at a local docs directory or zip instead of the GitHub archive
+    return os.environ.get("DOCS_SOURCE") or download_and_extract()
+
+
+def refresh(source=None, index_path=INDEX_PATH, workers=None):
+    """Incrementally update the stored index from source. Returns (index, stats)."""
+    workers = INDEX_WORKERS if workers is None else workers
+    source = source or default_source()
+    source_hash = None if os.path.isdir(source) else file_sha256(source)
+
+    header = read_index_header(index_path)
+    index = (read_index(index_path) if header is not None else None) or BM25Index()
+    stats = refresh_index(index, source, workers)
+
+    changed = stats["added"] or stats["updated"] or stats["removed"]
+    if changed or header is None or header.get("source_hash") != source_hash:
+        save_index(index, source_hash, index_path)
+    return index, stats
+
+
+def load_or_build_index(source=None, index_path=INDEX_PATH, workers=None):
+    """
+    Load the prebuilt index. If the source zip changed since it was built,
+    update it incrementally instead of rebuilding from scratch.
+    """
+    source = source or default_source()
+    if not os.path.isdir(source):
+        index = load_index(file_sha256(source), index_path)
+        if index is not None:
+            return index
+
+    index, stats = refresh(source, index_path, workers)
+    # stderr: inside the stdio MCP server, stdout is the JSON-RPC channel
+    print(f"Index refreshed: {stats}", file=sys.stderr)
+    return index
+
+
+class LazyIndex:
+    """
+    Builds (or loads) the index on a background thread.
+
+    start() is non-blocking and idempotent; get() waits for the build that is
+    already running instead of starting another one. A failed build is
+    reported to the callers that were waiting and retried on the next get().
+    """
+
+    def __init__(self, loader=load_or_build_index):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self._index = None
+        self._error = None
+        self._started_at = None
+        self._finished_at = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._ready.clear()
+            self._error = None
+            self._started_at = time.monotonic()
+            self._finished_at = None
+            self._thread = threading.Thread(target=self._build, name="docs-index-build", daemon=True)
+            self._thread.start()
+
+    def _build(self):
+        try:
+            self._index = self._loader()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._finished_at = time.monotonic()
+            self._ready.set()
+
+    def get(self, timeout=None):
+        """Return the index, waiting up to timeout seconds. Raises TimeoutError if still building."""
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Documentation index is still building")
+        if self._error is not None:
+            error = self._error
+            with self._lock:
+                # Allow the next caller to retry the build
+                self._thread = None
+            raise error
+        return self._index
+
+    def status(self):
+        if self._started_at is None:
+            return {"state": "not_started"}
+        if not self._ready.is_set():
+            return {"state": "building", "elapsed_seconds": round(time.monotonic() - self._started_at, 3)}
+        duration = round(self._finished_at - self._started_at, 3)
+        if self._error is not None:
+            return {"state": "error", "error": str(self._error), "build_seconds": duration}
+        return {"state": "ready", "build_seconds": duration}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or refresh the FastMCP documentation index")
+    parser.add_argument("command", nargs="?", choices=["build", "refresh"], default="build",
+                        help="build: load or build the index; refresh: fetch the latest docs and update incrementally")
+    parser.add_argument("--source", help="Docs zip or directory to index (default: the GitHub archive)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Refresh from the cached archive instead of downloading the latest one")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes used to tokenise changed files (default: INDEX_WORKERS or 0)")
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        source = args.source or download_and_extract(force=not args.offline)
+        start = time.monotonic()
+        index, stats = refresh(source, workers=args.workers)
+        print(f"Refreshed {INDEX_PATH} in {time.monotonic() - start:.2f}s: {stats}")
+    else:
+        index = load_or_build_index(args.source, workers=args.workers)
+    print(f"Index ready at {INDEX_PATH} ({len(index.file_fingerprints)} files, {index.live_count} sections).")
@@ -1,65 +1,21 @@
 import os
-import requests
-import zipfile
-import minsearch
+import json
 from fastmcp import FastMCP
+from docs_index import LazyIndex
+# fetch_page_markdown is re-exported for the test.py / solve_q4.py scripts
+from scraper import Scraper, fetch_page_markdown
 
 mcp = FastMCP("Demo 🚀")
 
-# Search initialization logic
-def download_and_extract():
-    url = "https://github.com/jlowin/fastmcp/archive/refs/heads/main.zip"
-    zip_path = "fastmcp-main.zip"
-    
-    if not os.path.exists(zip_path):
-        # Only download if not exists (simple caching)
-        response = requests.get(url)
-        with open(zip_path, "wb") as f:
-            f.write(response.content)
-            
-    return zip_path
-
-def get_documents():
-    zip_path = download_and_extract()
-    documents = []
-    
-    with zipfile.ZipFile(zip_path, 'r') as z:
-        for file_info in z.infolist():
-            if file_info.is_dir():
-                continue
-            
-            if not (file_info.filename.endswith(".md") or file_info.filename.endswith(".mdx")):
-                continue
-                
-            # Remove first part of path
-            parts = file_info.filename.split("/", 1)
-            if len(parts) > 1:
-                filename = parts[1]
-            else:
-                filename = file_info.filename
-                
-            with z.open(file_info) as f:
-                content = f.read().decode("utf-8")
-                
-            documents.append({
-                "filename": filename,
-                "content": content
-            })
-            
-    return documents
-
-def build_index(documents):
-    index = minsearch.Index(
-        text_fields=["content", "filename"],
-        keyword_fields=[]
-    )
-    
-    index.fit(documents)
-    return index
+# The index loads (or rebuilds, if the docs zip changed) in the background so that
+# the MCP handshake and the other tools never wait for it
+search_index = LazyIndex()
 
-# Initialize index on startup
-documents = get_documents()
-search_index = build_index(documents)
+# Pooled HTTP client plus on-disk cache shared by the scrape tools
+scraper = Scraper()
+
+# How long search_documentation waits for an index that is still building
+INDEX_WAIT_SECONDS = float(os.environ.get("INDEX_WAIT_SECONDS", "30"))
 
 
 @mcp.tool
@@ -67,37 +23,43 @@ def add(a: int, b: int) -> int:
     """Add two numbers"""
     return a + b
 
-def fetch_page_markdown(url: str) -> str:
-    """Fetch page content as markdown using Jina Reader."""
-    jina_url = f"https://r.jina.ai/{url}"
-    response = requests.get(jina_url)
-    response.raise_for_status()
-    return response.text
-
 
 @mcp.tool
-def scrape_web(url: str) -> str:
+async def scrape_web(url: str) -> str:
     """Scrape a web page and return its content in markdown format."""
-    return fetch_page_markdown(url)
+    return await scraper.scrape(url)
+
+
+@mcp.tool
+async def scrape_web_batch(urls: list[str]) -> dict[str, str]:
+    """Scrape several web pages concurrently. Returns a mapping of URL to markdown (or an error message)."""
+    return await scraper.scrape_many(urls)
 
 
 @mcp.tool
 def search_documentation(query: str) -> str:
     """Search the FastMCP documentation for a given query."""
-    results = search_index.search(
-        query=query,
-        filter_dict={},
-        boost_dict={"filename": 1, "content": 1},
-        num_results=5
-    )
+    try:
+        index = search_index.get(timeout=INDEX_WAIT_SECONDS)
+    except TimeoutError:
+        return "The documentation index is still being built. Please try again in a few seconds."
+
+    results = index.search(query=query, num_results=5)
     
     output = []
     for result in results:
-        output.append(f"File: {result['filename']}\nContent Preview: {result['content'][:200]}...\n")
+        output.append(f"File: {result['filename']}\nSection: {result['section']}\nContent Preview: {result['content'][:200]}...\n")
         
     return "\n---\n".join(output)
 
 
+@mcp.tool
+def index_status() -> str:
+    """Report whether the documentation search index is ready."""
+    return json.dumps(search_index.status())
+
+
 if __name__ == "__main__":
+    search_index.start()
     mcp.run()
 
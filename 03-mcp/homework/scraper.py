@@ -0,0 +1,136 @@
+"""
+Cached, concurrent page scraping through Jina Reader.
+
+- One pooled httpx.AsyncClient is reused for every request (keep-alive).
+- Pages are cached on disk, one JSON file per URL (keyed by SHA-256).
+  Within SCRAPE_CACHE_TTL seconds the cached copy is returned directly.
+  After that the page is revalidated with If-None-Match / If-Modified-Since,
+  so an unchanged page costs a 304 instead of a full re-render.
+- scrape_many() fetches a batch of URLs concurrently with a bounded limit.
+
+READER_BASE_URL can point at a local stand-in (see stub_reader.py).
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import httpx
+
+READER_BASE_URL = os.environ.get("READER_BASE_URL", "https://r.jina.ai/")
+CACHE_DIR = os.environ.get("SCRAPE_CACHE_DIR", ".scrape_cache")
+CACHE_TTL = float(os.environ.get("SCRAPE_CACHE_TTL", "3600"))
+TIMEOUT = float(os.environ.get("SCRAPE_TIMEOUT", "30"))
+MAX_CONCURRENCY = int(os.environ.get("SCRAPE_MAX_CONCURRENCY", "8"))
+
+
+class ScrapeCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url):
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Atomic write so concurrent scrapes never read a half-written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(url))
+
+
+class Scraper:
+    def __init__(self, reader_base_url=None, cache=None, ttl=None, timeout=None, max_concurrency=None):
+        self.reader_base_url = reader_base_url or READER_BASE_URL
+        self.cache = cache or ScrapeCache()
+        self.ttl = CACHE_TTL if ttl is None else ttl
+        self.timeout = timeout or TIMEOUT
+        self.max_concurrency = max_concurrency or MAX_CONCURRENCY
+        self._client = None
+        self.stats = {"cache_hits": 0, "revalidated": 0, "fetched": 0}
+
+    @property
+    def client(self):
+        # Created lazily so it binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_concurrency * 2,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def scrape(self, url):
+        """Return the page at url as markdown, using the cache where possible."""
+        entry = self.cache.get(url)
+        now = time.time()
+        if entry and now - entry["fetched_at"] < self.ttl:
+            self.stats["cache_hits"] += 1
+            return entry["content"]
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = await self.client.get(f"{self.reader_base_url}{url}", headers=headers)
+        if response.status_code == 304 and entry:
+            self.stats["revalidated"] += 1
+            entry["fetched_at"] = now
+            self.cache.put(url, entry)
+            return entry["content"]
+
+        response.raise_for_status()
+        self.stats["fetched"] += 1
+        self.cache.put(url, {
+            "url": url,
+            "fetched_at": now,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content": response.text,
+        })
+        return response.text
+
+    async def scrape_many(self, urls):
+        """Scrape several URLs concurrently. Returns {url: markdown or "Error: ..."}."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(url):
+            async with semaphore:
+                try:
+                    return url, await self.scrape(url)
+                except Exception as e:
+                    return url, f"Error: {e}"
+
+        # dict.fromkeys drops duplicate URLs while keeping order
+        results = await asyncio.gather(*(one(url) for url in dict.fromkeys(urls)))
+        return dict(results)
+
+
+def fetch_page_markdown(url, scraper=None):
+    """Synchronous helper for scripts: scrape a single page."""
+    async def run():
+        s = scraper or Scraper()
+        try:
+            return await s.scrape(url)
+        finally:
+            if scraper is None:
+                await s.aclose()
+    return asyncio.run(run())
@@ -1,52 +1,13 @@
-import os
-import requests
-import zipfile
-import io
 import minsearch
-
-def download_and_extract():
-    url = "https://github.com/jlowin/fastmcp/archive/refs/heads/main.zip"
-    zip_path = "fastmcp-main.zip"
-    
-    if not os.path.exists(zip_path):
-        print("Downloading zip...")
-        response = requests.get(url)
-        with open(zip_path, "wb") as f:
-            f.write(response.content)
-    else:
-        print("Zip already exists.")
-        
-    return zip_path
+from docs_index import download_and_extract, iter_documents
 
 def get_documents():
+    # Same zip loader as the MCP server (docs_index.py); minsearch needs the full list
     zip_path = download_and_extract()
-    documents = []
-    
-    with zipfile.ZipFile(zip_path, 'r') as z:
-        for file_info in z.infolist():
-            if file_info.is_dir():
-                continue
-            
-            if not (file_info.filename.endswith(".md") or file_info.filename.endswith(".mdx")):
-                continue
-                
-            # Remove first part of path
-            # e.g. fastmcp-main/docs/welcome.mdx -> docs/welcome.mdx
-            parts = file_info.filename.split("/", 1)
-            if len(parts) > 1:
-                filename = parts[1]
-            else:
-                filename = file_info.filename
-                
-            with z.open(file_info) as f:
-                content = f.read().decode("utf-8")
-                
-            documents.append({
-                "filename": filename,
-                "content": content
-            })
-            
-    return documents
+    return [
+        {"filename": doc["filename"], "content": doc["content"]}
+        for doc in iter_documents(zip_path)
+    ]
 
 def build_index(documents):
     index = minsearch.Index(
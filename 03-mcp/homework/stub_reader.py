@@ -0,0 +1,71 @@
+"""
+Local stand-in for r.jina.ai, for testing the scraper offline.
+
+Serves GET /<url> as markdown with an ETag and answers conditional
+requests with 304. Counts requests per status code.
+
+    uv run stub_reader.py --port 8765
+    READER_BASE_URL=http://127.0.0.1:8765/ uv run test.py
+"""
+import time
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StubReaderHandler(BaseHTTPRequestHandler):
+    # Page bodies, delay and counters live on the server (see start_stub_reader)
+
+    def do_GET(self):
+        url = self.path.lstrip("/")
+        body = self.server.pages.get(url) or f"# Stub page\n\nContent of {url}\n"
+        etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:16] + '"'
+
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        if self.headers.get("If-None-Match") == etag:
+            self.server.counts[304] += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        data = body.encode("utf-8")
+        self.server.counts[200] += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/markdown; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_reader(port=0, pages=None, delay=0.0):
+    """Start the stub in a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubReaderHandler)
+    server.pages = dict(pages or {})
+    server.delay = delay
+    server.counts = Counter()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for r.jina.ai")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_reader(args.port, delay=args.delay)
+    print(f"Stub reader listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,14 +1,45 @@
-from main import fetch_page_markdown
-
-def test_scraper():
-    url = "https://github.com/alexeygrigorev/minsearch"
-    print(f"Scraping {url}...")
-    content = fetch_page_markdown(url)
-
-    print(f"Content length: {len(content)}")
-    # Print the first 100 characters to verify
-    print("Beginning of content:")
-    print(content[:100])
-
-if __name__ == "__main__":
-    test_scraper()
+import asyncio
+import tempfile
+from main import fetch_page_markdown
+from scraper import Scraper, ScrapeCache
+from stub_reader import start_stub_reader
+
+def test_scraper():
+    url = "https://github.com/alexeygrigorev/minsearch"
+    print(f"Scraping {url}...")
+    content = fetch_page_markdown(url)
+
+    print(f"Content length: {len(content)}")
+    # Print the first 100 characters to verify
+    print("Beginning of content:")
+    print(content[:100])
+
+def test_scraper_cache_local():
+    """Check caching, ETag revalidation and batch scraping against the local stub (no network)."""
+    server, base_url = start_stub_reader(delay=0.05)
+
+    async def run():
+        with tempfile.TemporaryDirectory() as cache_dir:
+            scraper = Scraper(reader_base_url=base_url, cache=ScrapeCache(cache_dir), ttl=60)
+            first = await scraper.scrape("https://example.com/a")
+            again = await scraper.scrape("https://example.com/a")
+            assert first == again
+            assert server.counts[200] == 1, "second call should be served from the cache"
+
+            # Expired entries are revalidated with the stored ETag
+            scraper.ttl = 0
+            await scraper.scrape("https://example.com/a")
+            assert server.counts[304] == 1
+
+            urls = [f"https://example.com/page{i}" for i in range(20)]
+            results = await scraper.scrape_many(urls)
+            assert len(results) == 20
+            print(f"Local scraper OK: {scraper.stats}")
+            await scraper.aclose()
+
+    asyncio.run(run())
+    server.shutdown()
+
+if __name__ == "__main__":
+    test_scraper_cache_local()
+    test_scraper()
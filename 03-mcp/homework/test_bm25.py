@@ -0,0 +1,71 @@
+"""Offline tests for the BM25 engine in bm25.py."""
+from bm25 import BM25Index, build_chunked_index, split_sections
+
+DOCS = [
+    {"filename": "docs/tools.md", "content": "# Tools\nTools are functions the client can call. Define tools with a decorator."},
+    {"filename": "docs/resources.md", "content": "# Resources\nResources expose read-only data. Tools are covered elsewhere."},
+    {"filename": "docs/prompts.md", "content": "# Prompts\nPrompts are reusable message templates."},
+]
+
+
+def test_ranking_prefers_more_relevant_sections():
+    index = build_chunked_index(DOCS)
+    results = index.search("tools")
+
+    assert [r["filename"] for r in results] == ["docs/tools.md", "docs/resources.md"]
+    assert results[0]["score"] > results[1]["score"] > 0
+
+
+def test_field_boost_changes_ranking():
+    index = BM25Index().fit([
+        {"filename": "a.md", "section": "intro", "content": "server server server"},
+        {"filename": "server.md", "section": "intro", "content": "setup"},
+    ])
+    # Filename matches are boosted by default
+    assert index.search("server")[0]["filename"] == "server.md"
+    assert index.search("server", boost_dict={"filename": 0})[0]["filename"] == "a.md"
+
+
+def test_top_k_truncation():
+    docs = [{"filename": f"doc{i}.md", "content": "client " * (i + 1)} for i in range(8)]
+    index = build_chunked_index(docs)
+
+    results = index.search("client", num_results=3)
+    assert len(results) == 3
+    scores = [r["score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+    # The top 3 are the best of all matches, not the first 3 seen
+    assert scores[-1] >= max(r["score"] for r in index.search("client", num_results=8)[3:])
+
+
+def test_empty_query_returns_nothing():
+    index = build_chunked_index(DOCS)
+    assert index.search("") == []
+    # Single characters and punctuation produce no tokens
+    assert index.search("a ? !") == []
+    assert index.search("nonexistentterm") == []
+    assert BM25Index().search("tools") == []
+
+
+def test_removed_documents_are_not_returned():
+    index = build_chunked_index(DOCS)
+    index.remove_document("docs/tools.md")
+    assert [r["filename"] for r in index.search("tools")] == ["docs/resources.md"]
+
+    index.compact()
+    assert [r["filename"] for r in index.search("tools")] == ["docs/resources.md"]
+
+
+def test_split_sections_ignores_headings_in_code():
+    content = "Intro text\n# Usage\n```\n# not a heading\n```\nMore usage"
+    sections = split_sections("guide.md", content)
+    assert [s["section"] for s in sections] == ["guide.md", "Usage"]
+
+
+if __name__ == "__main__":
+    test_ranking_prefers_more_relevant_sections()
+    test_field_boost_changes_ranking()
+    test_top_k_truncation()
+    test_empty_query_returns_nothing()
+    test_removed_documents_are_not_returned()
+    test_split_sections_ignores_headings_in_code()
@@ -0,0 +1,81 @@
+"""Offline tests for incremental index refreshes in docs_index.py."""
+import os
+import tempfile
+from docs_index import read_index, refresh
+
+QUERIES = ["tools", "resources", "prompts", "deployment", "authentication", "client"]
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def results(index):
+    return {
+        query: [(r["filename"], r["section"], round(r["score"], 9)) for r in index.search(query)]
+        for query in QUERIES
+    }
+
+
+def test_refresh_matches_fresh_build():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "docs")
+        index_path = os.path.join(tmp, "docs.index")
+        write(os.path.join(source, "tools.md"),
+              "# Tools\nTools are functions the client can call.\n# Deployment\nDeploy the server with tools.")
+        write(os.path.join(source, "resources.md"), "# Resources\nResources expose read-only data to the client.")
+        write(os.path.join(source, "guide", "prompts.mdx"), "# Prompts\nPrompts are reusable templates.")
+        write(os.path.join(source, "notes.txt"), "Not a doc file: tools tools tools")
+
+        index, stats = refresh(source, index_path, workers=0)
+        assert stats == {"added": 3, "updated": 0, "removed": 0, "unchanged": 0}
+        assert index.search("deployment")[0]["section"] == "Deployment"
+
+        # Edit one file (dropping a section), remove one and add one
+        write(os.path.join(source, "tools.md"), "# Tools\nTools are functions the client can call.")
+        os.remove(os.path.join(source, "guide", "prompts.mdx"))
+        write(os.path.join(source, "auth.md"), "# Authentication\nClients send a bearer token.")
+
+        index, stats = refresh(source, index_path, workers=0)
+        # Only the fingerprint diff is re-read
+        assert stats == {"added": 1, "updated": 1, "removed": 1, "unchanged": 1}
+        assert index.search("deployment") == []
+        assert index.search("prompts") == []
+        # Three of six stored sections were tombstoned, so the refresh compacted the index
+        assert index.deleted == set()
+        assert len(index.docs) == index.live_count == 3
+
+        fresh, _ = refresh(source, os.path.join(tmp, "fresh.index"), workers=0)
+        assert results(index) == results(fresh)
+        assert index.file_fingerprints == fresh.file_fingerprints
+        assert sorted(map(sorted, index.file_chunks.values())) == sorted(map(sorted, fresh.file_chunks.values()))
+
+        # The refreshed index was saved, and an unchanged source is a no-op
+        assert results(read_index(index_path)) == results(fresh)
+        _, stats = refresh(source, index_path, workers=0)
+        assert stats == {"added": 0, "updated": 0, "removed": 0, "unchanged": 3}
+
+
+def test_refresh_without_compaction_skips_tombstones():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "docs")
+        index_path = os.path.join(tmp, "docs.index")
+        for i in range(8):
+            write(os.path.join(source, f"page{i}.md"), f"# Page {i}\nThe client calls tools on page {i}.")
+
+        refresh(source, index_path, workers=0)
+        os.remove(os.path.join(source, "page0.md"))
+        index, stats = refresh(source, index_path, workers=0)
+
+        assert stats["removed"] == 1
+        # One tombstone in eight sections is below the compaction threshold
+        assert len(index.deleted) == 1
+        fresh, _ = refresh(source, os.path.join(tmp, "fresh.index"), workers=0)
+        assert sorted(r["filename"] for r in index.search("tools")) == sorted(r["filename"] for r in fresh.search("tools"))
+
+
+if __name__ == "__main__":
+    test_refresh_matches_fresh_build()
+    test_refresh_without_compaction_skips_tombstones()
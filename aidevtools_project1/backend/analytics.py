@@ -0,0 +1,300 @@
+"""
+Analytics over Parquet snapshots of the transcript library.
+
+export_parquet() copies videos/transcripts out of the OLTP database once,
+streaming Arrow record batches into partitioned Parquet:
+
+    analytics/snapshot-<UTC timestamp>/videos/author_key=<author>/fetch_date=<date>/*.parquet
+    analytics/snapshot-<UTC timestamp>/transcripts/author_key=<author>/fetch_date=<date>/*.parquet
+    analytics/LATEST   (name of the newest complete snapshot)
+
+Reports then run in an in-memory DuckDB over the Parquet files and return
+pyarrow Tables. They never touch the application database, so heavy
+reporting does not hold locks on it.
+
+    uv run analytics.py export
+    uv run analytics.py report coverage        # or: lengths, languages, activity, all
+"""
+import os
+import shutil
+import argparse
+from datetime import datetime, timezone
+
+import duckdb
+import pyarrow as pa
+from sqlalchemy import Boolean, DateTime, text
+
+ANALYTICS_DIR = os.environ.get("ANALYTICS_DIR", "analytics")
+# Rows per Arrow record batch while exporting
+EXPORT_BATCH_ROWS = int(os.environ.get("ANALYTICS_BATCH_ROWS", "50000"))
+# Completed snapshots kept on disk (older ones are deleted after a successful export)
+KEEP_SNAPSHOTS = int(os.environ.get("ANALYTICS_KEEP_SNAPSHOTS", "2"))
+
+# Transcript text itself is not exported; reports only need its length and the generated-content flags
+EXPORT_QUERIES = {
+    "videos": (
+        "SELECT video_id, title, author, views, duration_seconds, fetched_at FROM videos",
+        pa.schema([
+            ("video_id", pa.string()), ("title", pa.string()), ("author", pa.string()),
+            ("views", pa.int64()), ("duration_seconds", pa.int64()), ("fetched_at", pa.timestamp("us")),
+        ]),
+    ),
+    "transcripts": (
+        "SELECT t.video_id, t.language, t.language_code, t.is_generated, "
+        "LENGTH(b.transcript) AS transcript_chars, "
+        "CASE WHEN b.study_guide IS NOT NULL AND b.study_guide <> '' THEN 1 ELSE 0 END AS has_study_guide, "
+        "CASE WHEN b.quiz IS NOT NULL AND b.quiz <> '' THEN 1 ELSE 0 END AS has_quiz, "
+        "v.author, v.fetched_at "
+        "FROM transcripts t LEFT JOIN videos v ON v.video_id = t.video_id "
+        "LEFT JOIN transcript_blobs b ON b.content_hash = t.content_hash",
+        pa.schema([
+            ("video_id", pa.string()), ("language", pa.string()), ("language_code", pa.string()),
+            ("is_generated", pa.bool_()), ("transcript_chars", pa.int64()),
+            ("has_study_guide", pa.int8()), ("has_quiz", pa.int8()),
+            ("author", pa.string()), ("fetched_at", pa.timestamp("us")),
+        ]),
+    ),
+}
+
+# Hive partition values end up in directory names; keep them path-safe
+PARTITION_COLUMNS = """
+    regexp_replace(coalesce(author, 'unknown'), '[^A-Za-z0-9_.-]+', '_', 'g') AS author_key,
+    coalesce(CAST(fetched_at AS DATE), DATE '1970-01-01') AS fetch_date
+"""
+
+
+def _to_arrow_table(result):
+    # duckdb >= 1.4 renamed fetch_arrow_table to to_arrow_table
+    fetch = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+    return fetch()
+
+
+def _to_arrow_reader(result, batch_rows):
+    fetch = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+    return fetch(batch_rows)
+
+
+def _source_reader(engine, sql, schema, batch_rows):
+    """
+    Stream a query from the application database as an Arrow RecordBatchReader.
+    DuckDB hands over Arrow batches natively. Other engines (Postgres) use a
+    server-side cursor and convert each chunk column by column.
+    """
+    if engine.url.get_backend_name() == "duckdb":
+        raw = engine.raw_connection()
+        con = raw.driver_connection
+        # Cast so the batches match the declared schema whatever the source column types are
+        casts = ", ".join(f'CAST("{f.name}" AS {_duckdb_type(f.type)}) AS "{f.name}"' for f in schema)
+        reader = _to_arrow_reader(con.execute(f"SELECT {casts} FROM ({sql})"), batch_rows)
+        return reader, raw.close
+
+    conn = engine.connect().execution_options(stream_results=True)
+    # Typed result columns so drivers that return timestamps as strings or booleans as 0/1 are converted
+    query = text(sql).columns(**{
+        f.name: DateTime if pa.types.is_timestamp(f.type) else Boolean
+        for f in schema if pa.types.is_timestamp(f.type) or pa.types.is_boolean(f.type)
+    })
+
+    def batches():
+        result = conn.execute(query)
+        while True:
+            rows = result.fetchmany(batch_rows)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema)
+
+    return pa.RecordBatchReader.from_batches(schema, batches()), conn.close
+
+
+def _duckdb_type(arrow_type):
+    if pa.types.is_string(arrow_type):
+        return "VARCHAR"
+    if pa.types.is_boolean(arrow_type):
+        return "BOOLEAN"
+    if pa.types.is_int8(arrow_type):
+        return "TINYINT"
+    if pa.types.is_integer(arrow_type):
+        return "BIGINT"
+    if pa.types.is_timestamp(arrow_type):
+        return "TIMESTAMP"
+    raise ValueError(f"Unsupported export type {arrow_type}")
+
+
+def latest_snapshot(out_dir=ANALYTICS_DIR):
+    try:
+        with open(os.path.join(out_dir, "LATEST"), "r") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(out_dir, name)
+    return path if os.path.isdir(path) else None
+
+
+def _prune_snapshots(out_dir, keep):
+    snapshots = sorted(d for d in os.listdir(out_dir) if d.startswith("snapshot-"))
+    for name in snapshots[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+
+
+def export_parquet(out_dir=ANALYTICS_DIR, engine=None, batch_rows=EXPORT_BATCH_ROWS, keep=KEEP_SNAPSHOTS):
+    """
+    Write a new Parquet snapshot of videos and transcripts, partitioned by author and fetch date.
+    LATEST is switched to it only once both tables are complete. Returns the snapshot path.
+    """
+    if engine is None:
+        from database import get_engine
+        engine = get_engine()
+
+    os.makedirs(out_dir, exist_ok=True)
+    name = "snapshot-" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    snapshot = os.path.join(out_dir, name)
+    os.makedirs(snapshot)
+
+    duck = duckdb.connect()
+    try:
+        for table, (sql, schema) in EXPORT_QUERIES.items():
+            reader, close = _source_reader(engine, sql, schema, batch_rows)
+            try:
+                duck.register("source_batches", reader)
+                target = os.path.join(snapshot, table).replace("'", "''")
+                duck.execute(
+                    f"COPY (SELECT *, {PARTITION_COLUMNS} FROM source_batches) "
+                    f"TO '{target}' (FORMAT parquet, PARTITION_BY (author_key, fetch_date))"
+                )
+                duck.unregister("source_batches")
+            finally:
+                close()
+    except Exception:
+        shutil.rmtree(snapshot, ignore_errors=True)
+        raise
+    finally:
+        duck.close()
+
+    tmp_path = os.path.join(out_dir, "LATEST.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(name)
+    os.replace(tmp_path, os.path.join(out_dir, "LATEST"))
+    _prune_snapshots(out_dir, keep)
+    print(f"✓ Exported analytics snapshot to {snapshot}")
+    return snapshot
+
+
+def connect(snapshot=None, out_dir=ANALYTICS_DIR):
+    """In-memory DuckDB with `videos` and `transcripts` views over a Parquet snapshot."""
+    snapshot = snapshot or latest_snapshot(out_dir)
+    if not snapshot:
+        raise FileNotFoundError(f"No analytics snapshot in {out_dir}; run `analytics.py export` first")
+    con = duckdb.connect()
+    for table in EXPORT_QUERIES:
+        pattern = os.path.join(snapshot, table, "**", "*.parquet").replace("'", "''")
+        if next(_iter_parquet(os.path.join(snapshot, table)), None):
+            con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)")
+        else:
+            # An empty table exports no files; keep the view queryable
+            _, schema = EXPORT_QUERIES[table]
+            columns = ", ".join(f'CAST(NULL AS {_duckdb_type(f.type)}) AS "{f.name}"' for f in schema)
+            con.execute(f"CREATE VIEW {table} AS SELECT {columns}, NULL::VARCHAR AS author_key, "
+                        f"NULL::DATE AS fetch_date WHERE false")
+    return con
+
+
+def _iter_parquet(path):
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith(".parquet"):
+                yield os.path.join(root, name)
+
+
+REPORTS = {
+    # Study guide / quiz coverage per author
+    "coverage": """
+        SELECT author_key AS author,
+               count(DISTINCT video_id) AS videos,
+               count(*) AS transcripts,
+               sum(has_study_guide) AS with_study_guide,
+               sum(has_quiz) AS with_quiz,
+               round(100.0 * sum(has_study_guide) / count(*), 1) AS study_guide_pct,
+               round(100.0 * sum(has_quiz) / count(*), 1) AS quiz_pct
+        FROM transcripts
+        GROUP BY ALL
+        ORDER BY transcripts DESC, author
+    """,
+    # Transcript length distribution per language (characters; NULL = text not fetched yet)
+    "lengths": """
+        SELECT language_code,
+               count(*) AS transcripts,
+               count(transcript_chars) AS with_text,
+               CAST(avg(transcript_chars) AS BIGINT) AS avg_chars,
+               CAST(median(transcript_chars) AS BIGINT) AS median_chars,
+               CAST(quantile_cont(transcript_chars, 0.9) AS BIGINT) AS p90_chars,
+               max(transcript_chars) AS max_chars
+        FROM transcripts
+        GROUP BY ALL
+        ORDER BY transcripts DESC, language_code
+    """,
+    # Language mix, split by auto-generated vs manual captions
+    "languages": """
+        SELECT language_code,
+               any_value(language) AS language,
+               count(*) FILTER (WHERE NOT is_generated) AS manual,
+               count(*) FILTER (WHERE is_generated) AS generated,
+               count(*) AS total,
+               round(100.0 * count(*) / sum(count(*)) OVER (), 1) AS share_pct
+        FROM transcripts
+        GROUP BY language_code
+        ORDER BY total DESC, language_code
+    """,
+    # Library growth per week
+    "activity": """
+        SELECT date_trunc('week', fetch_date) AS week,
+               count(*) AS videos_fetched,
+               sum(views) AS total_views,
+               round(sum(duration_seconds) / 3600.0, 1) AS hours_of_video
+        FROM videos
+        GROUP BY ALL
+        ORDER BY week
+    """,
+}
+
+
+def run_report(name, snapshot=None, out_dir=ANALYTICS_DIR, con=None):
+    """Run a named report over the latest (or given) snapshot and return a pyarrow Table."""
+    if name not in REPORTS:
+        raise ValueError(f"Unknown report {name!r}. Available: {', '.join(REPORTS)}")
+    own = con is None
+    con = con or connect(snapshot, out_dir)
+    try:
+        return _to_arrow_table(con.execute(REPORTS[name]))
+    finally:
+        if own:
+            con.close()
+
+
+def run_reports(names=None, snapshot=None, out_dir=ANALYTICS_DIR):
+    """Several reports over one connection. Returns {name: pyarrow Table}."""
+    con = connect(snapshot, out_dir)
+    try:
+        return {name: run_report(name, con=con) for name in (names or REPORTS)}
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parquet export and reports for the transcript library")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="Snapshot videos/transcripts to partitioned Parquet")
+    export_cmd.add_argument("--out", default=ANALYTICS_DIR)
+    report_cmd = sub.add_parser("report", help="Run reports over the latest snapshot")
+    report_cmd.add_argument("name", choices=list(REPORTS) + ["all"])
+    report_cmd.add_argument("--out", default=ANALYTICS_DIR)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_parquet(args.out)
+    else:
+        names = list(REPORTS) if args.name == "all" else [args.name]
+        for name, table in run_reports(names, out_dir=args.out).items():
+            print(f"\n--- {name} ({table.num_rows} rows) ---")
+            print(table.to_pandas().to_string(index=False))
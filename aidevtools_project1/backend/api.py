@@ -1,23 +1,88 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import youtube_api
 import load_data
+import singleflight
+import rate_limit
+import quiz as quiz_schema
+import transcript_sources
+import bulk_io
+import metrics
+import warmup
 from database import get_session, init_db, Video as DbVideo, Transcript as DbTranscript
 from sqlalchemy.orm import Session
 
 from contextlib import asynccontextmanager
+from itertools import chain
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
 
 # --- Events ---
+# Pools and clients are warmed in the background after start-up; see warmup.py and /ready
+startup = warmup.Warmup()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    start = time.perf_counter()
     init_db()
+    print(f"Database initialised in {time.perf_counter() - start:.2f}s")
+    startup.start()
     yield
     # Shutdown logic can go here if needed
 
-app = FastAPI(title="YouTube Transcript API", version="1.0.0", lifespan=lifespan)
+class TimedJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        with metrics.span("json_serialize"):
+            return super().render(content)
+
+app = FastAPI(title="YouTube Transcript API", version="1.0.0", lifespan=lifespan,
+              default_response_class=TimedJSONResponse)
+
+# --- Metrics ---
+metrics.instrument_sqlalchemy()
+metrics.REGISTRY.register_collector(
+    lambda: [(f"gemini_limiter_{name}", f"Gemini limiter {name.replace('_', ' ')}", value)
+             for name, value in rate_limit.get_stats().items() if isinstance(value, (int, float))]
+)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template, not the raw path, so video ids do not explode the label set
+        route = request.scope.get("route")
+        metrics.http_request_seconds.observe(
+            time.perf_counter() - start,
+            method=request.method, route=getattr(route, "path", "unmatched"), status=status,
+        )
+
+@app.get("/health", include_in_schema=False)
+def health():
+    """Liveness check: answers without touching the database, YouTube or the LLM clients."""
+    return {"status": "ok"}
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    """Readiness check: 503 until the start-up warm-up has finished (use as the Cloud Run startup probe)."""
+    return JSONResponse(startup.status(), status_code=200 if startup.ready else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of request latency, stage timings, LLM tokens and limiter counters."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 # --- Pydantic Models ---
 class VideoMetadata(BaseModel):
@@ -99,9 +164,10 @@ def chat_with_study_guide_stream_endpoint(video_id: str, language_code: str, req
     if not transcript.study_guide:
         raise HTTPException(status_code=400, detail="Study guide not generated yet. Please generate it first.")
 
-    return StreamingResponse(
-        llm_utils.chat_with_study_guide_stream(transcript.study_guide, request.message, request.history),
-        media_type="text/plain"
+    study_guide = transcript.study_guide
+    # Not coalesced, like the non-stream chat endpoint: a reply belongs to one conversation
+    return _streaming_response(
+        _stream_and_persist(lambda: llm_utils.chat_with_study_guide_stream(study_guide, request.message, request.history))
     )
 
 class GenerateRequest(BaseModel):
@@ -129,17 +195,29 @@ def update_transcript_content(
     if not transcript:
         raise HTTPException(status_code=404, detail="Transcript not found")
     
-    # Update fields if provided
+    # Update fields if provided. Edits are copy-on-write: other tracks sharing this text keep theirs
     if request.study_guide is not None:
         transcript.study_guide = request.study_guide
     if request.quiz is not None:
-        transcript.quiz = request.quiz
+        transcript.quiz = quiz_schema.normalize_quiz_text(request.quiz)
     
     db.commit()
     
     return {"message": "Content updated successfully"}
 
 
+def _coalesced_generate(generate_fn, kind: str, transcript_text: str, prompt: Optional[str]) -> str:
+    # Identical concurrent requests (same transcript and prompt) share one Gemini call
+    key = singleflight.make_key(kind, transcript_text, prompt)
+    return singleflight.llm_generations.do(key, generate_fn, transcript_text, prompt=prompt)
+
+def _coalesced_fetch(video_id: str, include_transcript: bool, for_storage: bool = False) -> dict:
+    # Identical concurrent fetches for the same video share one YouTube round trip
+    key = ("fetch", video_id, include_transcript, for_storage)
+    return singleflight.youtube_fetches.do(key, transcript_sources.fetch_transcripts, video_id,
+                                           include_transcript=include_transcript, for_storage=for_storage)
+
+
 class DirectGenerateRequest(BaseModel):
     transcript: str
     prompt: Optional[str] = None
@@ -152,7 +230,7 @@ def generate_study_guide_direct(request: DirectGenerateRequest):
     if not request.transcript or not request.transcript.strip():
         raise HTTPException(status_code=400, detail="Transcript text is required")
     
-    content = llm_utils.generate_study_guide(request.transcript, prompt=request.prompt)
+    content = _coalesced_generate(llm_utils.generate_study_guide, "study_guide", request.transcript, request.prompt)
     
     if content.startswith("Error"):
         raise HTTPException(status_code=500, detail=content)
@@ -167,7 +245,7 @@ def generate_quiz_direct(request: DirectGenerateRequest):
     if not request.transcript or not request.transcript.strip():
         raise HTTPException(status_code=400, detail="Transcript text is required")
     
-    content = llm_utils.generate_quiz(request.transcript, prompt=request.prompt)
+    content = _coalesced_generate(llm_utils.generate_quiz, "quiz", request.transcript, request.prompt)
     
     if content.startswith("Error"):
         raise HTTPException(status_code=500, detail=content)
@@ -191,12 +269,13 @@ def generate_study_guide_endpoint(video_id: str, language_code: str, request: Ge
          raise HTTPException(status_code=400, detail="Transcript text is empty")
 
     prompt = request.prompt if request else None
-    content = llm_utils.generate_study_guide(transcript.transcript, prompt=prompt)
+    content = _coalesced_generate(llm_utils.generate_study_guide, "study_guide", transcript.transcript, prompt)
     
     if content.startswith("Error"):
          raise HTTPException(status_code=500, detail=content)
 
-    transcript.study_guide = content
+    # Default-prompt output is shared by every track with this text; custom prompts stay with this track
+    transcript.set_generated("study_guide", content, shared=prompt is None)
     db.commit()
     
     return {"message": "Study Guide generated successfully", "content": content}
@@ -216,17 +295,147 @@ def generate_quiz_endpoint(video_id: str, language_code: str, request: GenerateR
          raise HTTPException(status_code=400, detail="Transcript text is empty")
 
     prompt = request.prompt if request else None
-    content = llm_utils.generate_quiz(transcript.transcript, prompt=prompt)
+    content = _coalesced_generate(llm_utils.generate_quiz, "quiz", transcript.transcript, prompt)
 
     if content.startswith("Error"):
          raise HTTPException(status_code=500, detail=content)
     
-    transcript.quiz = content
+    transcript.set_generated("quiz", content, shared=prompt is None)
     db.commit()
     
     return {"message": "Quiz generated successfully", "content": content}
 
 
+def _save_generated_content(video_id: str, language_code: str, field: str, content: str, shared: bool = False):
+    """
+    Persist generated content using a fresh session (the request session may already be closed).
+    shared: default-prompt output, written to the blob shared by every track with this text.
+    """
+    db = get_session()
+    try:
+        transcript = db.query(DbTranscript).filter(
+            DbTranscript.video_id == video_id,
+            DbTranscript.language_code == language_code
+        ).order_by(DbTranscript.is_generated.desc()).first()
+        if transcript:
+            transcript.set_generated(field, content, shared=shared)
+            db.commit()
+    finally:
+        db.close()
+
+class StreamFailed(Exception):
+    """An LLM stream failed (an "Error ..." chunk from llm_utils or an exception)."""
+
+
+def _checked_stream(chunks, on_complete=None):
+    """
+    llm_utils reports errors as a final "Error ..." chunk, so each chunk is passed on
+    once the next one arrives. A failure is never passed on as content: it is raised
+    as StreamFailed instead. on_complete receives the full text of a successful stream.
+    """
+    parts = []
+    pending = None
+    try:
+        for chunk in chunks:
+            if pending is not None:
+                parts.append(pending)
+                yield pending
+            pending = chunk
+        if pending is not None and pending.startswith("Error"):
+            raise StreamFailed(pending)
+        if pending is not None:
+            parts.append(pending)
+            yield pending
+        if parts and on_complete:
+            on_complete("".join(parts))
+    except Exception as e:
+        logger.exception("Streaming generation failed")
+        if isinstance(e, StreamFailed):
+            raise
+        raise StreamFailed(f"{type(e).__name__}: {e}") from e
+
+def _stream_and_persist(start, on_complete=None, key=None):
+    """
+    Run start() (an LLM chunk iterator) through _checked_stream on a background thread
+    and forward its chunks. The thread owns the upstream iterator, so a client disconnect
+    only stops forwarding; generation still runs to completion and on_complete runs once.
+
+    Concurrent requests with the same key share the generation, and each receives every chunk
+    (singleflight.llm_streams). key=None never coalesces.
+    """
+    return singleflight.llm_streams.subscribe(key, lambda: _checked_stream(start(), on_complete))
+
+def _streaming_response(stream):
+    """
+    Wait for the first chunk, so a stream that fails before producing anything is a 500.
+    A later failure aborts the response, and the client sees an incomplete body
+    rather than a 200 ending in error text.
+    """
+    try:
+        first = next(stream, "")
+    except StreamFailed as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(chain([first], stream), media_type="text/plain")
+
+def _stream_key(kind: str, video_id: str, language_code: str, transcript_text: str, prompt: Optional[str]) -> str:
+    # Unlike _coalesced_generate the key includes the track: the shared run saves its result
+    # once, to the track it was started for
+    return singleflight.make_key(kind, video_id, language_code, transcript_text, prompt)
+
+def _get_transcript_for_generation(db: Session, video_id: str, language_code: str):
+    transcript = db.query(DbTranscript).filter(
+        DbTranscript.video_id == video_id,
+        DbTranscript.language_code == language_code
+    ).order_by(DbTranscript.is_generated.desc()).first()
+
+    if not transcript:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+
+    if not transcript.transcript:
+        raise HTTPException(status_code=400, detail="Transcript text is empty")
+
+    return transcript
+
+@app.post("/api/v1/transcript/{video_id}/{language_code}/generate_study_guide/stream")
+def generate_study_guide_stream_endpoint(video_id: str, language_code: str, request: GenerateRequest = None, db: Session = Depends(get_db)):
+    """
+    Stream a study guide as it is generated. The final text is saved to the transcript when generation completes,
+    even if the client disconnects early.
+    """
+    transcript = _get_transcript_for_generation(db, video_id, language_code)
+    prompt = request.prompt if request else None
+    transcript_text = transcript.transcript
+
+    return _streaming_response(_stream_and_persist(
+        lambda: llm_utils.generate_study_guide_stream(transcript_text, prompt=prompt),
+        lambda content: _save_generated_content(video_id, language_code, "study_guide", content, shared=prompt is None),
+        key=_stream_key("study_guide", video_id, language_code, transcript_text, prompt),
+    ))
+
+@app.post("/api/v1/transcript/{video_id}/{language_code}/generate_quiz/stream")
+def generate_quiz_stream_endpoint(video_id: str, language_code: str, request: GenerateRequest = None, db: Session = Depends(get_db)):
+    """
+    Stream a quiz as it is generated. When generation completes the quiz is validated and repaired
+    like the non-stream endpoint, then saved, even if the client disconnects early.
+    """
+    transcript = _get_transcript_for_generation(db, video_id, language_code)
+    prompt = request.prompt if request else None
+    transcript_text = transcript.transcript
+
+    def save_quiz(content):
+        # Validate and repair like the non-stream endpoint; an unusable quiz aborts the stream unsaved
+        quiz = llm_utils.repair_quiz(content, transcript_text, prompt)
+        if quiz.startswith("Error"):
+            raise StreamFailed(quiz)
+        _save_generated_content(video_id, language_code, "quiz", quiz, shared=prompt is None)
+
+    return _streaming_response(_stream_and_persist(
+        lambda: llm_utils.generate_quiz_stream(transcript_text, prompt=prompt),
+        save_quiz,
+        key=_stream_key("quiz", video_id, language_code, transcript_text, prompt),
+    ))
+
+
 @app.get("/api/v1/video/{video_id}", response_model=VideoResponse)
 def get_video_info(video_id: str, include_transcript: bool = False):
     """
@@ -234,7 +443,7 @@ def get_video_info(video_id: str, include_transcript: bool = False):
     """
     print(f"DEBUG: API get_video_info video_id={video_id} include_transcript={include_transcript}")
     real_id = youtube_api.extract_video_id(video_id)
-    data = youtube_api.list_transcripts_json(real_id, include_transcript=include_transcript)
+    data = _coalesced_fetch(real_id, include_transcript)
     
     if "error" in data:
         raise HTTPException(status_code=400, detail=data["error"])
@@ -249,7 +458,7 @@ def store_video_data(video_id: str, include_transcript: bool = True, background_
     real_id = youtube_api.extract_video_id(video_id)
     
     # Fetch data
-    data = youtube_api.list_transcripts_json(real_id, include_transcript=include_transcript)
+    data = _coalesced_fetch(real_id, include_transcript, for_storage=True)
     
     if "error" in data:
         raise HTTPException(status_code=400, detail=data["error"])
@@ -263,12 +472,68 @@ def store_video_data(video_id: str, include_transcript: bool = True, background_
         
     return {"message": "Video data and transcripts stored successfully", "video_id": real_id}
 
+@app.get("/api/v1/llm/stats")
+def get_llm_stats():
+    """
+    Gemini limiter counters: requests, retries, throttled calls, failures, time spent waiting and the current adaptive rate.
+    """
+    return rate_limit.get_stats()
+
+@app.get("/api/v1/transcript_sources/stats")
+def get_transcript_source_stats():
+    """
+    Per-backend transcript fetch counters (requests, failures, wins, average latency) and the current preference order.
+    """
+    return transcript_sources.get_stats()
+
+# Columns /api/v1/db/videos can sort by
+VIDEO_SORT_COLUMNS = ("fetched_at", "views", "duration_seconds", "title")
+
 @app.get("/api/v1/db/videos")
-def list_stored_videos(db: Session = Depends(get_db)):
+def list_stored_videos(
+    sort: Optional[str] = None,
+    order: str = "desc",
+    min_views: Optional[int] = None,
+    max_views: Optional[int] = None,
+    min_duration: Optional[int] = None,
+    max_duration: Optional[int] = None,
+    author: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
     """
-    List all videos currently stored in the database.
+    List videos stored in the database.
+    Optionally sort (fetched_at, views, duration_seconds, title; order asc/desc), filter by
+    view and duration (seconds) ranges or exact author, and page with limit/offset.
+    Sorting and filtering run in the database on the indexed typed columns.
     """
-    videos = db.query(DbVideo).all()
+    query = db.query(DbVideo)
+    if min_views is not None:
+        query = query.filter(DbVideo.views >= min_views)
+    if max_views is not None:
+        query = query.filter(DbVideo.views <= max_views)
+    if min_duration is not None:
+        query = query.filter(DbVideo.duration_seconds >= min_duration)
+    if max_duration is not None:
+        query = query.filter(DbVideo.duration_seconds <= max_duration)
+    if author:
+        query = query.filter(DbVideo.author == author)
+    if sort:
+        if sort not in VIDEO_SORT_COLUMNS:
+            raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(VIDEO_SORT_COLUMNS)}")
+        if order not in ("asc", "desc"):
+            raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+        column = getattr(DbVideo, sort)
+        # Videos without parsed metadata go last in either direction; video_id keeps pages stable
+        ordering = column.asc() if order == "asc" else column.desc()
+        query = query.order_by(ordering.nulls_last(), DbVideo.video_id)
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+
+    videos = query.all()
     results = []
     for v in videos:
         # Check if study guide or quiz exists in any transcript
@@ -281,12 +546,52 @@ def list_stored_videos(db: Session = Depends(get_db)):
             "author": v.author,
             "duration": v.duration,
             "view_count": v.view_count,
+            "duration_seconds": v.duration_seconds,
+            "views": v.views,
             "has_study_guide": "✓" if has_sg else "",
             "has_quiz": "✓" if has_quiz else "",
             "fetched_at": v.fetched_at
         })
     return results
 
+# Import bodies larger than this are spooled to disk instead of memory
+IMPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+@app.get("/api/v1/export")
+def export_library(format: str = "ndjson"):
+    """
+    Stream every stored video with its transcripts as NDJSON (one video per line) or an Arrow IPC stream.
+    Rows are read through a server-side cursor, so memory use does not grow with the library.
+    """
+    if format not in bulk_io.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(bulk_io.FORMATS)}")
+    records = bulk_io.iter_export_records()
+    body = bulk_io.to_ndjson(records) if format == "ndjson" else bulk_io.to_arrow_stream(records)
+    extension = "ndjson" if format == "ndjson" else "arrows"
+    return StreamingResponse(
+        body,
+        media_type=bulk_io.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="library.{extension}"'},
+    )
+
+@app.post("/api/v1/import")
+async def import_library(request: Request, format: str = "ndjson"):
+    """
+    Upsert videos and transcripts from a body produced by /api/v1/export (same format parameter).
+    Existing rows are updated; fields missing from a record keep their stored value.
+    """
+    if format not in bulk_io.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(bulk_io.FORMATS)}")
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        try:
+            totals = await run_in_threadpool(bulk_io.import_file, body, format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid {format} input: {e}")
+    return {"message": "Import complete", **totals}
+
 @app.get("/api/v1/db/video/{video_id}", response_model=VideoResponse)
 def get_stored_video(video_id: str, db: Session = Depends(get_db)):
     """
@@ -321,6 +626,39 @@ def get_stored_video(video_id: str, db: Session = Depends(get_db)):
         "transcripts": ts
     }
 
+def prepare_workers(workers: int):
+    """
+    Check the configuration for several worker processes and share limiter/coalescing
+    state between them (SHARED_STATE=database unless set otherwise). The shared
+    state table is created here, once, rather than by every worker racing to do it.
+    """
+    if workers > 1:
+        from database import get_db_url
+        if get_db_url().startswith("duckdb"):
+            raise SystemExit("A DuckDB file can only be opened by one process; use POSTGRES_HOST or DATABASE_URL "
+                             "for --workers > 1")
+        if os.environ.get("SHARED_STATE", "memory") == "memory":
+            os.environ["SHARED_STATE"] = "database"
+            print("Sharing rate limits and in-flight calls between workers through the database (SHARED_STATE=database)")
+    if os.environ.get("SHARED_STATE", "memory") != "memory":
+        import shared_state
+        shared_state.prepare()
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    parser = argparse.ArgumentParser(description="Run the API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+                        help="Worker processes, e.g. --workers $(nproc) (default: WEB_CONCURRENCY or 1)")
+    args = parser.parse_args()
+
+    prepare_workers(args.workers)
+    if args.workers > 1:
+        # Workers import the app themselves, so it is passed by name
+        uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
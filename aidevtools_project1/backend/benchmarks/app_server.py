@@ -0,0 +1,24 @@
+"""
+Serve api.app for e2e.py, with the fake YouTube transcript backend registered.
+
+    python benchmarks/app_server.py <port>
+
+Configuration comes from the environment set by e2e.py (TRANSCRIPT_BACKENDS=fake,
+BENCH_YOUTUBE_URL, GOOGLE_GEMINI_BASE_URL, ...). Run it from the directory that
+holds the benchmark database.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+import transcript_sources
+from fake_services import FakeYouTubeSource
+
+transcript_sources.SOURCES[FakeYouTubeSource.name] = FakeYouTubeSource
+
+import api
+
+if __name__ == "__main__":
+    uvicorn.run(api.app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning", access_log=False)
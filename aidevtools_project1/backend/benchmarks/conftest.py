@@ -0,0 +1,136 @@
+"""
+Fixtures for the micro-benchmarks in test_micro.py (pytest-benchmark).
+
+Corpus sizes are options so the default run stays short:
+
+    --bench-videos 1000,10000,100000     videos in the seeded library
+    --bench-transcript-kb 10,100,1000    transcript sizes for the per-transcript benchmarks
+
+DuckDB always runs. Postgres runs when BENCH_POSTGRES_URL (or --bench-postgres-url)
+points at a scratch database; everything is created in a "micro_bench" schema that
+is dropped afterwards.
+"""
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+
+BENCH_SCHEMA = "micro_bench"
+WORDS = ("model", "data", "python", "function", "vector", "agent", "prompt", "token", "index",
+         "query", "server", "latency", "cache", "stream", "batch", "network", "gradient", "layer")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("micro-benchmarks")
+    group.addoption("--bench-videos", default="1000", help="Comma-separated library sizes (videos)")
+    group.addoption("--bench-transcript-kb", default="10,1000", help="Comma-separated transcript sizes (KB)")
+    group.addoption("--bench-postgres-url", default=os.environ.get("BENCH_POSTGRES_URL"),
+                    help="Scratch Postgres database (default: BENCH_POSTGRES_URL); skipped if unset")
+
+
+def _sizes(config, name):
+    return [int(v) for v in config.getoption(name).split(",") if v.strip()]
+
+
+def pytest_generate_tests(metafunc):
+    if "videos" in metafunc.fixturenames:
+        metafunc.parametrize("videos", _sizes(metafunc.config, "--bench-videos"), scope="session")
+    if "transcript_kb" in metafunc.fixturenames:
+        metafunc.parametrize("transcript_kb", _sizes(metafunc.config, "--bench-transcript-kb"), scope="session")
+
+
+def synthetic_text(chars, seed=0):
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+def synthetic_record(video_id, transcript_chars, seed=0):
+    """A video in the bulk_io record shape, with an English and a generated German transcript."""
+    text_body = synthetic_text(transcript_chars, seed)
+    return {
+        "video_id": video_id,
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "title": f"Synthetic video {video_id}",
+        "description": "Synthetic video for micro-benchmarks.",
+        "author": f"Channel {seed % 50}",
+        "view_count": str(seed * 7919 % 10_000_000),
+        "duration": f"PT{60 + seed % 3600}S",
+        "transcripts": [
+            {"language": "English", "language_code": "en", "is_generated": False, "is_translatable": True,
+             "transcript": text_body, "study_guide": "## Study guide\n\n" + text_body[:2000]},
+            {"language": "German (auto-generated)", "language_code": "de", "is_generated": True,
+             "is_translatable": True, "transcript": text_body},
+        ],
+    }
+
+
+def _duckdb_engine(tmp_path_factory):
+    path = tmp_path_factory.mktemp("micro") / "bench.duckdb"
+    return create_engine(f"duckdb:///{path}"), lambda: None
+
+
+def _postgres_engine(url):
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={BENCH_SCHEMA}"})
+
+    def cleanup():
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+        admin.dispose()
+
+    return engine, cleanup
+
+
+@pytest.fixture(scope="session", params=["duckdb", "postgres"])
+def engine(request, tmp_path_factory):
+    if request.param == "postgres":
+        url = request.config.getoption("--bench-postgres-url")
+        if not url:
+            pytest.skip("set BENCH_POSTGRES_URL to benchmark Postgres")
+        engine, cleanup = _postgres_engine(url)
+    else:
+        engine, cleanup = _duckdb_engine(tmp_path_factory)
+    from database import Base
+    Base.metadata.create_all(engine)
+    yield engine
+    cleanup()
+
+
+@pytest.fixture(scope="session")
+def library(engine, videos):
+    """Seed (once per size) a library of short-transcript videos; returns their ids."""
+    import bulk_io
+    with engine.begin() as conn:
+        existing = conn.execute(text("SELECT COUNT(*) FROM videos WHERE video_id LIKE 'lib%'")).scalar()
+    ids = [f"lib{i:07d}" for i in range(videos)]
+    if existing < videos:
+        bulk_io.import_records(
+            (synthetic_record(video_id, 1_000, seed=i) for i, video_id in enumerate(ids) if i >= existing),
+            engine=engine, batch_size=2_000,
+        )
+    return ids
+
+
+@pytest.fixture(scope="session")
+def large_video(engine, transcript_kb):
+    """One stored video whose transcripts are transcript_kb kilobytes each."""
+    import bulk_io
+    video_id = f"big{transcript_kb:07d}"
+    bulk_io.import_records([synthetic_record(video_id, transcript_kb * 1024, seed=transcript_kb)], engine=engine)
+    return video_id
@@ -0,0 +1,264 @@
+"""
+End-to-end benchmark: the FastAPI app against local fake YouTube, proxy and Gemini servers.
+
+Seeds a fresh DuckDB database with synthetic videos, starts the app in a
+subprocess (benchmarks/app_server.py) wired to the fakes in fake_services.py,
+then drives a weighted mix of list / detail / store / generate / chat requests
+at each concurrency level. Reports throughput and p50/p95/p99 latency, overall
+and per operation. Runs fully offline and is reproducible for a given --seed.
+
+    uv run benchmarks/e2e.py
+    uv run benchmarks/e2e.py --concurrency 1,8,32 --requests 400 --gemini-latency 1500
+    uv run benchmarks/e2e.py --json results.json                                # save a run
+    uv run benchmarks/e2e.py --baseline results.json --max-regression 0.25      # exit 1 on regression
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from itertools import count
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import create_engine
+
+import bulk_io
+from database import Base
+from fake_services import FakeYouTube, FakeProxy, FakeGemini, fake_video
+
+DEFAULT_MIX = "list=40,detail=30,store=10,generate=10,chat=10"
+APP_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_server.py")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operation(s) {', '.join(sorted(unknown))}. Available: {', '.join(OPERATIONS)}")
+    return mix
+
+
+def seed_database(url, videos, transcript_chars):
+    """Synthetic library in the database at url; every English transcript already has a study guide so chat works."""
+    records = []
+    for i in range(videos):
+        video = fake_video(f"seed{i:07d}", transcript_chars)
+        transcripts = video["transcripts"]
+        transcripts[0]["study_guide"] = f"## Study guide {i}\n\n" + transcripts[0]["transcript"][:2000]
+        records.append(dict(video["metadata"], video_id=video["video_id"], url=video["url"], transcripts=transcripts))
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    bulk_io.import_records(records, engine=engine)
+    engine.dispose()
+    return [r["video_id"] for r in records]
+
+
+# name -> function(rng, seeded video ids, request number) -> (method, path, json body)
+OPERATIONS = {
+    "list": lambda rng, ids, n: ("GET", "/api/v1/db/videos?sort=views&limit=50", None),
+    "detail": lambda rng, ids, n: ("GET", f"/api/v1/db/video/{rng.choice(ids)}", None),
+    "store": lambda rng, ids, n: ("POST", f"/api/v1/video/new{n:07d}/store", None),
+    "generate": lambda rng, ids, n: ("POST", f"/api/v1/transcript/{rng.choice(ids)}/en/generate_study_guide",
+                                     {"prompt": f"Summarise the key points ({n})"}),
+    "chat": lambda rng, ids, n: ("POST", f"/api/v1/transcript/{rng.choice(ids)}/en/chat",
+                                 {"message": "What are the main topics?", "history": []}),
+}
+
+
+async def run_level(base_url, concurrency, total, mix, ids, rng, numbers):
+    # Draw the whole request sequence up front so a given seed always sends the same requests
+    plan = [(op, *OPERATIONS[op](rng, ids, next(numbers)))
+            for op in rng.choices(list(mix), weights=list(mix.values()), k=total)]
+    pending = iter(plan)
+    results = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker():
+            for op, method, path, body in pending:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                results.append((op, time.perf_counter() - start, ok))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(results, elapsed)
+
+
+def summarize(results, elapsed):
+    def stats(rows):
+        latencies = [latency * 1000 for _, latency, _ in rows]
+        return {
+            "requests": len(rows),
+            "errors": sum(1 for _, _, ok in rows if not ok),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        }
+
+    summary = stats(results)
+    summary["throughput_rps"] = round(len(results) / elapsed, 2) if elapsed else 0.0
+    summary["ops"] = {op: stats([r for r in results if r[0] == op]) for op in sorted({r[0] for r in results})}
+    return summary
+
+
+def wait_until_ready(base_url, process, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/v1/llm/stats", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError("app server did not become ready")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def print_report(levels):
+    print(f"\n{'concurrency':>11} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for concurrency, s in levels.items():
+        print(f"{concurrency:>11} {s['requests']:>9} {s['errors']:>7} {s['throughput_rps']:>9.1f} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+    print("\nper operation (p50 / p95 / p99 ms):")
+    for concurrency, s in levels.items():
+        print(f"  concurrency {concurrency}")
+        for op, o in s["ops"].items():
+            errors = f"  {o['errors']} errors" if o["errors"] else ""
+            print(f"    {op:<9} {o['requests']:>5}  {o['p50_ms']:>9.1f} {o['p95_ms']:>9.1f} {o['p99_ms']:>9.1f}{errors}")
+
+
+def compare(levels, baseline, max_regression):
+    """Regressions against a saved run: p95 slower or throughput lower by more than max_regression."""
+    problems = []
+    for concurrency, current in levels.items():
+        before = baseline.get("levels", {}).get(str(concurrency))
+        if not before:
+            continue
+        if current["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            problems.append(f"c={concurrency} throughput {before['throughput_rps']} -> {current['throughput_rps']} req/s")
+        for op, stats in [("all", current)] + list(current["ops"].items()):
+            old = before if op == "all" else before.get("ops", {}).get(op)
+            if old and stats["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+                problems.append(f"c={concurrency} {op} p95 {old['p95_ms']} -> {stats['p95_ms']} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end API benchmark against local fake services")
+    parser.add_argument("--concurrency", default="1,4,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per level")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before the first level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--videos", type=int, default=500, help="Videos seeded into the database")
+    parser.add_argument("--transcript-chars", type=int, default=10_000)
+    parser.add_argument("--youtube-latency", type=float, default=150, help="Fake YouTube latency (ms)")
+    parser.add_argument("--proxy-latency", type=float, default=30, help="Fake proxy latency (ms)")
+    parser.add_argument("--no-proxy", action="store_true", help="Reach fake YouTube directly")
+    parser.add_argument("--gemini-latency", type=float, default=500, help="Fake Gemini time to first token (ms)")
+    parser.add_argument("--gemini-chunk-latency", type=float, default=20, help="Fake Gemini delay per streamed chunk (ms)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against results saved with --json")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed relative slowdown vs baseline")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    levels_wanted = [int(c) for c in args.concurrency.split(",")]
+    rng = random.Random(args.seed)
+    numbers = count()
+
+    youtube = FakeYouTube(args.youtube_latency, args.transcript_chars, seed=args.seed).start()
+    proxy = None if args.no_proxy else FakeProxy(args.proxy_latency, seed=args.seed).start()
+    gemini = FakeGemini(args.gemini_latency, args.gemini_chunk_latency, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix="e2e-bench-")
+    process = None
+    try:
+        start = time.perf_counter()
+        ids = seed_database(f"duckdb:///{os.path.join(workdir, 'youtube_data.duckdb')}", args.videos, args.transcript_chars)
+        print(f"Seeded {len(ids)} videos in {time.perf_counter() - start:.1f}s ({workdir})")
+
+        port = free_port()
+        env = {k: v for k, v in os.environ.items() if not k.startswith("POSTGRES_")}
+        env.update({
+            "TRANSCRIPT_BACKENDS": "fake",
+            "TRANSCRIPT_HEDGE_DELAY": "0",
+            "BENCH_YOUTUBE_URL": youtube.url,
+            "LLM_PROVIDER": "gemini",
+            "GOOGLE_API_KEY": "benchmark",
+            "GOOGLE_GEMINI_BASE_URL": gemini.url,
+            # Pace as the real quota would, but never let the limiter dominate the benchmark
+            "GEMINI_RPM": env.get("GEMINI_RPM", "100000"),
+            "GEMINI_TPM": env.get("GEMINI_TPM", "1000000000"),
+        })
+        if proxy:
+            env["BENCH_PROXY_URL"] = proxy.url
+        log = open(os.path.join(workdir, "app.log"), "w")
+        process = subprocess.Popen([sys.executable, APP_SERVER, str(port)], cwd=workdir, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        base_url = f"http://127.0.0.1:{port}"
+        wait_until_ready(base_url, process)
+
+        if args.warmup:
+            asyncio.run(run_level(base_url, 1, args.warmup, mix, ids, rng, numbers))
+
+        levels = {}
+        for concurrency in levels_wanted:
+            print(f"concurrency {concurrency}: {args.requests} requests...")
+            levels[concurrency] = asyncio.run(
+                run_level(base_url, concurrency, args.requests, mix, ids, rng, numbers))
+        print_report(levels)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        for service in (youtube, proxy, gemini):
+            if service:
+                service.stop()
+
+    result = {"config": vars(args), "levels": {str(c): s for c, s in levels.items()}}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(levels, json.load(f), args.max_regression)
+        if problems:
+            print(f"\nREGRESSIONS (more than {args.max_regression:.0%} worse than {args.baseline}):")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Local stand-ins for YouTube, an HTTP proxy and the Gemini API, for offline benchmarks.
+
+- FakeYouTube serves video metadata and transcripts as JSON (GET /videos/<id>).
+  FakeYouTubeSource is a transcript_sources backend ("fake") that reads from it,
+  optionally through the proxy, so requests cross the same HTTP hops as in production.
+- FakeProxy forwards plain-HTTP requests, adding its own latency.
+- FakeGemini implements generateContent / streamGenerateContent (SSE) of the Gemini
+  REST API. Point the real GeminiProvider at it with GOOGLE_GEMINI_BASE_URL. Output
+  comes from LocalProvider, so quizzes are valid JSON.
+
+Each service sleeps for a configurable latency (milliseconds, +/- jitter) per request.
+The data is deterministic: the same video id always produces the same video.
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from llm_providers import LocalProvider
+from transcript_sources import TranscriptSource, TranscriptSourceError
+
+WORDS = ("model", "data", "python", "function", "vector", "agent", "prompt", "token", "index",
+         "query", "server", "latency", "cache", "stream", "batch", "network", "gradient", "layer")
+
+
+class Latency:
+    def __init__(self, ms: float = 0.0, jitter: float = 0.2, seed: int = 0):
+        self.ms = ms
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sleep(self, scale: float = 1.0):
+        if self.ms <= 0:
+            return
+        with self.lock:
+            factor = 1 + self.random.uniform(-self.jitter, self.jitter)
+        time.sleep(self.ms * scale * factor / 1000.0)
+
+
+def fake_video(video_id: str, transcript_chars: int = 10_000, include_transcript: bool = True) -> dict:
+    """Deterministic video in the list_transcripts_json shape."""
+    seed = int(hashlib.sha256(video_id.encode("utf-8")).hexdigest(), 16)
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < transcript_chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    transcripts = []
+    for code, language, generated in (("en", "English", False), ("de", "German (auto-generated)", True)):
+        info = {"language": language, "language_code": code, "is_generated": generated, "is_translatable": True}
+        if include_transcript:
+            info["transcript"] = " ".join(words)
+        transcripts.append(info)
+    return {
+        "video_id": video_id,
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "metadata": {
+            "title": f"Benchmark video {video_id}",
+            "description": "Synthetic video for benchmarks.",
+            "author": f"Channel {seed % 50}",
+            "view_count": str(seed % 10_000_000),
+            "duration": f"PT{60 + seed % 3600}S",
+        },
+        "transcripts": transcripts,
+    }
+
+
+class FakeService:
+    """A ThreadingHTTPServer on 127.0.0.1 with a random free port."""
+
+    def __init__(self, latency_ms: float = 0.0, seed: int = 0):
+        self.latency = Latency(latency_ms, seed=seed)
+        self.server = None
+        self.thread = None
+
+    def handler(self):
+        raise NotImplementedError
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeYouTube(FakeService):
+    def __init__(self, latency_ms: float = 0.0, transcript_chars: int = 10_000, seed: int = 0):
+        super().__init__(latency_ms, seed)
+        self.transcript_chars = transcript_chars
+
+    def handler(self):
+        service = self
+
+        class Handler(_QuietHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if not url.path.startswith("/videos/"):
+                    self.send_json(404, {"error": "not found"})
+                    return
+                video_id = url.path.rsplit("/", 1)[1]
+                include = parse_qs(url.query).get("include_transcript", ["0"])[0] == "1"
+                service.latency.sleep()
+                self.send_json(200, fake_video(video_id, service.transcript_chars, include))
+
+        return Handler
+
+
+class FakeProxy(FakeService):
+    """Forwards absolute-URI GETs (plain HTTP proxying, no CONNECT)."""
+
+    def handler(self):
+        service = self
+        # The proxy itself must not go through a proxy configured in the environment
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+        class Handler(_QuietHandler):
+            def do_GET(self):
+                service.latency.sleep()
+                try:
+                    with opener.open(self.path, timeout=60) as upstream:
+                        body = upstream.read()
+                        status = upstream.status
+                        content_type = upstream.headers.get("Content-Type", "application/octet-stream")
+                except Exception as e:
+                    self.send_json(502, {"error": f"proxy: {e}"})
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+class FakeGemini(FakeService):
+    """
+    latency_ms is the time to the first token; stream_chunk_ms is added per streamed chunk,
+    so streaming endpoints see realistic pacing.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, stream_chunk_ms: float = 0.0, seed: int = 0):
+        super().__init__(latency_ms, seed)
+        self.stream_chunk_latency = Latency(stream_chunk_ms, seed=seed + 1)
+        self.provider = LocalProvider("fake-gemini")
+        self.provider.latency = 0
+
+    @staticmethod
+    def _usage(prompt: str, text: str) -> dict:
+        prompt_tokens = len(prompt.split())
+        response_tokens = len(text.split())
+        return {"promptTokenCount": prompt_tokens, "candidatesTokenCount": response_tokens,
+                "totalTokenCount": prompt_tokens + response_tokens}
+
+    @staticmethod
+    def _candidate(text: str, finished: bool = True) -> dict:
+        candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if finished:
+            candidate["finishReason"] = "STOP"
+        return candidate
+
+    def generate(self, body: dict) -> tuple:
+        prompt = "".join(part.get("text", "") for content in body.get("contents", [])
+                         for part in content.get("parts", []))
+        generation = body.get("generationConfig") or {}
+        config = {"response_mime_type": generation.get("responseMimeType")} if generation.get("responseMimeType") else None
+        return prompt, self.provider.generate(prompt, config)
+
+    def handler(self):
+        service = self
+
+        class Handler(_QuietHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                path = urlparse(self.path).path
+                if path.endswith(":generateContent"):
+                    service.latency.sleep()
+                    prompt, text = service.generate(body)
+                    self.send_json(200, {"candidates": [service._candidate(text)],
+                                         "usageMetadata": service._usage(prompt, text),
+                                         "modelVersion": "fake-gemini"})
+                elif path.endswith(":streamGenerateContent"):
+                    self.stream(body)
+                else:
+                    self.send_json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+            def stream(self, body):
+                service.latency.sleep()
+                prompt, text = service.generate(body)
+                words = text.split(" ")
+                chunks = [" ".join(words[i:i + 8]) + (" " if i + 8 < len(words) else "") for i in range(0, len(words), 8)]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for i, chunk in enumerate(chunks):
+                    if i:
+                        service.stream_chunk_latency.sleep()
+                    last = i == len(chunks) - 1
+                    event = {"candidates": [service._candidate(chunk, finished=last)], "modelVersion": "fake-gemini"}
+                    if last:
+                        event["usageMetadata"] = service._usage(prompt, text)
+                    self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+class FakeYouTubeSource(TranscriptSource):
+    """transcript_sources backend reading from FakeYouTube (BENCH_YOUTUBE_URL, optional BENCH_PROXY_URL)."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.base_url = os.environ["BENCH_YOUTUBE_URL"]
+        proxy = os.environ.get("BENCH_PROXY_URL")
+        self.session = requests.Session()
+        self.session.trust_env = False
+        if proxy:
+            self.session.proxies = {"http": proxy}
+
+    def fetch(self, video_id: str, include_transcript: bool = False) -> dict:
+        response = self.session.get(f"{self.base_url}/videos/{video_id}",
+                                    params={"include_transcript": int(include_transcript)}, timeout=60)
+        if response.status_code != 200:
+            raise TranscriptSourceError(f"fake YouTube returned {response.status_code}")
+        return response.json()
@@ -0,0 +1,80 @@
+"""
+Import-time profile of a backend module (default: api, i.e. the server's cold start).
+
+Imports the module in fresh interpreters with -X importtime. Reports the median wall
+time, the slowest imports (cumulative) and whether any of the heavy client libraries
+that should load lazily were pulled in.
+
+    uv run benchmarks/import_time.py
+    uv run benchmarks/import_time.py --module youtube_api --top 30 --runs 9
+    uv run benchmarks/import_time.py --budget 1.5       # exit 1 if slower or a heavy library loads
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once YouTube or Gemini is actually called
+HEAVY_MODULES = ("requests", "googleapiclient.discovery", "youtube_transcript_api", "google.genai", "yt_dlp", "pyarrow")
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """(module, self_us, cumulative_us) for every line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str = "api", profile: bool = False) -> dict:
+    """Import module in a fresh interpreter; returns seconds, loaded heavy modules and (if profile) rows."""
+    command = [sys.executable] + (["-X", "importtime"] if profile else []) + \
+        ["-c", PROBE.format(module=module, heavy=HEAVY_MODULES)]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    if profile:
+        report["rows"] = parse_importtime(result.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of a backend module")
+    parser.add_argument("--module", default="api")
+    parser.add_argument("--runs", type=int, default=5, help="Timed imports (median is reported)")
+    parser.add_argument("--top", type=int, default=20, help="Slowest imports to list")
+    parser.add_argument("--budget", type=float, help="Fail if the median import takes longer (seconds)")
+    args = parser.parse_args()
+
+    profile = measure(args.module, profile=True)
+    timings = [measure(args.module)["seconds"] for _ in range(args.runs)]
+    median = statistics.median(timings)
+
+    print(f"import {args.module}: median {median * 1000:.0f} ms over {args.runs} runs")
+    print(f"\n{'cumulative ms':>13} {'self ms':>8}  module")
+    for name, self_us, cumulative_us in sorted(profile["rows"], key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>13.1f} {self_us / 1000:>8.1f}  {name}")
+
+    heavy = profile["heavy"]
+    print(f"\nheavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+    if heavy or (args.budget is not None and median > args.budget):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
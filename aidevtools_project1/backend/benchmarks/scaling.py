@@ -0,0 +1,129 @@
+"""
+Throughput scaling across worker processes (api.py --workers N).
+
+Seeds a database once, then for each worker count starts the server with that many
+workers and drives the e2e.py request mix at workers x --per-worker-concurrency
+concurrent requests. Generations go to the fake Gemini from fake_services.py.
+The rate limiter and single-flight state are shared through SHARED_STATE.
+
+DuckDB cannot be opened by several processes, so the default database is a SQLite
+file; pass --database-url for Postgres. The default shared state is a SQLite file as
+well (a local Redis stand-in); --shared-state database uses the application database.
+
+    uv run benchmarks/scaling.py
+    uv run benchmarks/scaling.py --workers 1,2,4,8 --requests 800 --json scaling.json
+    uv run benchmarks/scaling.py --database-url postgresql://localhost/bench --shared-state database
+
+Speedup is relative to the first worker count; it cannot exceed the machine's cores.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from itertools import count
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import e2e
+from fake_services import FakeGemini
+
+API = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api.py")
+DEFAULT_MIX = "list=45,detail=45,generate=10"
+
+
+def start_server(workers, port, env, workdir):
+    log = open(os.path.join(workdir, f"api-{workers}.log"), "w")
+    return subprocess.Popen([sys.executable, API, "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+                            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def print_report(results):
+    base = next(iter(results.values()))["throughput_rps"] or 1.0
+    first = next(iter(results))
+    print(f"\n{'workers':>7} {'concurrency':>11} {'req/s':>9} {'speedup':>8} {'efficiency':>10} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for workers, s in results.items():
+        speedup = s["throughput_rps"] / base
+        efficiency = speedup / (workers / first)
+        print(f"{workers:>7} {s['concurrency']:>11} {s['throughput_rps']:>9.1f} {speedup:>7.2f}x {efficiency:>10.0%} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API throughput across worker counts")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--per-worker-concurrency", type=int, default=8, help="Concurrent requests per worker")
+    parser.add_argument("--requests", type=int, default=400, help="Measured requests per worker count")
+    parser.add_argument("--warmup", type=int, default=40, help="Unmeasured requests before each run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--videos", type=int, default=500)
+    parser.add_argument("--transcript-chars", type=int, default=10_000)
+    parser.add_argument("--database-url", help="Shared database (default: a fresh SQLite file)")
+    parser.add_argument("--shared-state", help="SHARED_STATE for the workers (default: a SQLite file)")
+    parser.add_argument("--gemini-latency", type=float, default=200, help="Fake Gemini time to first token (ms)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    mix = e2e.parse_mix(args.mix)
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    cores = os.cpu_count() or 1
+    if max(worker_counts) > cores:
+        print(f"NOTE: {cores} CPU core(s); worker counts above that cannot scale further")
+
+    workdir = tempfile.mkdtemp(prefix="scaling-bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'library.sqlite')}"
+    shared_state = args.shared_state or f"sqlite:///{os.path.join(workdir, 'shared_state.sqlite')}"
+    start = time.perf_counter()
+    ids = e2e.seed_database(database_url, args.videos, args.transcript_chars)
+    print(f"Seeded {len(ids)} videos in {time.perf_counter() - start:.1f}s ({workdir})")
+
+    gemini = FakeGemini(args.gemini_latency, seed=args.seed).start()
+    env = {k: v for k, v in os.environ.items() if not k.startswith("POSTGRES_")}
+    env.update({
+        "DATABASE_URL": database_url,
+        "SHARED_STATE": shared_state,
+        "LLM_PROVIDER": "gemini",
+        "GOOGLE_API_KEY": "benchmark",
+        "GOOGLE_GEMINI_BASE_URL": gemini.url,
+        "GEMINI_RPM": env.get("GEMINI_RPM", "100000"),
+        "GEMINI_TPM": env.get("GEMINI_TPM", "1000000000"),
+        "GEMINI_MAX_CONCURRENCY": env.get("GEMINI_MAX_CONCURRENCY", "64"),
+    })
+
+    rng = random.Random(args.seed)
+    numbers = count()
+    results = {}
+    try:
+        for workers in worker_counts:
+            port = e2e.free_port()
+            process = start_server(workers, port, env, workdir)
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                e2e.wait_until_ready(base_url, process)
+                concurrency = workers * args.per_worker_concurrency
+                if args.warmup:
+                    asyncio.run(e2e.run_level(base_url, concurrency, args.warmup, mix, ids, rng, numbers))
+                print(f"{workers} worker(s), concurrency {concurrency}: {args.requests} requests...")
+                summary = asyncio.run(e2e.run_level(base_url, concurrency, args.requests, mix, ids, rng, numbers))
+                results[workers] = dict(summary, concurrency=concurrency)
+            finally:
+                process.terminate()
+                process.wait(timeout=60)
+    finally:
+        gemini.stop()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "cores": cores, "workers": {str(w): s for w, s in results.items()}}, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmarks for the hot paths: transcript ingestion, transcript text joining and
+the payloads of the two stored-video read endpoints. Run with pytest-benchmark:
+
+    uv run pytest benchmarks --benchmark-autosave                         # record a run in .benchmarks/
+    uv run pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:25%
+    uv run pytest benchmarks --bench-videos 1000,10000,100000 --bench-transcript-kb 10,100,1000
+
+Every database benchmark runs against DuckDB and, with BENCH_POSTGRES_URL set, Postgres.
+The endpoints are called directly with a fresh session per round and their result is
+encoded as FastAPI would, so ORM loading and JSON serialisation are both measured.
+"""
+import itertools
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from youtube_transcript_api import FetchedTranscriptSnippet
+
+import api
+import load_data
+from youtube_api import get_transcript_text
+from conftest import synthetic_text
+
+
+class FakeTranscript:
+    """Stands in for youtube_transcript_api's Transcript: fetch() returns caption snippets."""
+
+    def __init__(self, snippets):
+        self.snippets = snippets
+
+    def fetch(self):
+        return self.snippets
+
+
+def caption_snippets(chars):
+    # Captions are a few seconds each, roughly 40 characters with stray whitespace
+    words = synthetic_text(chars).split(" ")
+    return [FetchedTranscriptSnippet(text=" ".join(words[i:i + 6]) + "\n", start=i * 0.5, duration=3.0)
+            for i in range(0, len(words), 6)]
+
+
+def test_get_transcript_text(benchmark, transcript_kb):
+    transcript = FakeTranscript(caption_snippets(transcript_kb * 1024))
+    text = benchmark(get_transcript_text, transcript)
+    assert "\n" not in text and len(text) >= transcript_kb * 1000
+
+
+@pytest.mark.parametrize("path", ["insert", "update"])
+def test_load_transcripts_metadata(benchmark, engine, transcript_kb, path):
+    body = synthetic_text(transcript_kb * 1024, seed=transcript_kb)
+    transcripts = [
+        {"language": "English", "language_code": "en", "is_generated": False, "is_translatable": True,
+         "transcript": body},
+        {"language": "German (auto-generated)", "language_code": "de", "is_generated": True,
+         "is_translatable": True, "transcript": body},
+    ]
+    ids = (f"ing{path[0]}{transcript_kb:05d}{n:06d}" for n in itertools.count())
+    fixed_id = next(ids)
+
+    def setup():
+        video_id = fixed_id if path == "update" else next(ids)
+        with Session(engine) as session:
+            if session.get(load_data.Video, video_id) is None:
+                session.add(load_data.Video(video_id=video_id, url=f"https://www.youtube.com/watch?v={video_id}"))
+                session.commit()
+        return (video_id,), {}
+
+    def ingest(video_id):
+        with Session(engine) as session:
+            load_data.load_transcripts_metadata(session, video_id, transcripts)
+
+    if path == "update":
+        ingest(*setup()[0])
+    benchmark.pedantic(ingest, setup=setup, rounds=20, warmup_rounds=1)
+
+
+def test_list_stored_videos(benchmark, engine, library):
+    def list_and_encode():
+        with Session(engine) as session:
+            videos = api.list_stored_videos(sort="views", order="desc", min_views=None, max_views=None,
+                                            min_duration=None, max_duration=None, author=None,
+                                            limit=None, offset=0, db=session)
+            return api.TimedJSONResponse(jsonable_encoder(videos)).body
+
+    body = benchmark.pedantic(list_and_encode, rounds=5, warmup_rounds=1)
+    assert body.count(b'"video_id"') >= len(library)
+
+
+def test_list_stored_videos_page(benchmark, engine, library):
+    def page_and_encode():
+        with Session(engine) as session:
+            videos = api.list_stored_videos(sort="views", order="desc", min_views=None, max_views=None,
+                                            min_duration=None, max_duration=None, author=None,
+                                            limit=50, offset=0, db=session)
+            return api.TimedJSONResponse(jsonable_encoder(videos)).body
+
+    body = benchmark(page_and_encode)
+    assert body.count(b'"video_id"') == min(50, len(library))
+
+
+def test_get_stored_video(benchmark, engine, large_video, transcript_kb):
+    def fetch_and_encode():
+        with Session(engine) as session:
+            payload = api.get_stored_video(large_video, db=session)
+            return api.TimedJSONResponse(jsonable_encoder(api.VideoResponse.model_validate(payload))).body
+
+    body = benchmark(fetch_and_encode)
+    assert len(body) >= 2 * transcript_kb * 1024
@@ -0,0 +1,234 @@
+"""
+Bulk export / import of the video library.
+
+Each video is one record: its columns plus a "transcripts" list with the
+transcript text and generated study guide / quiz. Two formats:
+
+    ndjson  one JSON record per line (application/x-ndjson)
+    arrow   Arrow IPC stream, one record batch per chunk of videos
+
+Export streams a single videos/transcripts/transcript_blobs join ordered by video_id through a
+server-side cursor, so memory stays flat however large the library is. Import
+feeds chunks of records to load_data.bulk_upsert (one statement per table per chunk).
+
+    uv run bulk_io.py export -o library.ndjson
+    uv run bulk_io.py export --format arrow -o library.arrows
+    POSTGRES_HOST=... uv run bulk_io.py import library.ndjson
+
+    # DuckDB dev store -> Postgres in one go
+    uv run bulk_io.py export | POSTGRES_HOST=... uv run bulk_io.py import -
+"""
+import io
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import load_data
+from database import get_engine, get_session, Video, Transcript, TranscriptBlob
+
+# Videos per cursor fetch / NDJSON chunk / Arrow record batch
+EXPORT_BATCH_SIZE = int(os.environ.get("BULK_EXPORT_BATCH_SIZE", "500"))
+# Videos per upsert transaction
+IMPORT_BATCH_SIZE = int(os.environ.get("BULK_IMPORT_BATCH_SIZE", "500"))
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+VIDEO_COLUMNS = ("video_id", "url", "title", "description", "author", "view_count", "duration",
+                 "views", "duration_seconds", "fetched_at")
+TRANSCRIPT_COLUMNS = ("language", "language_code", "is_generated", "is_translatable",
+                      "transcript", "study_guide", "quiz")
+# Stored once per content in transcript_blobs; exported inline with every transcript
+BLOB_COLUMNS = ("transcript", "study_guide", "quiz")
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_export_records(engine=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield one record per video, transcripts included, in video_id order."""
+    engine = engine or get_engine()
+    videos, transcripts, blobs = Video.__table__, Transcript.__table__, TranscriptBlob.__table__
+    query = (
+        select(*[videos.c[name] for name in VIDEO_COLUMNS],
+               *[(blobs if name in BLOB_COLUMNS else transcripts).c[name].label(f"t_{name}")
+                 for name in TRANSCRIPT_COLUMNS])
+        .select_from(videos.outerjoin(transcripts, transcripts.c.video_id == videos.c.video_id)
+                     .outerjoin(blobs, blobs.c.content_hash == transcripts.c.content_hash))
+        .order_by(videos.c.video_id, transcripts.c.language_code, transcripts.c.is_generated)
+    )
+    with engine.connect() as conn:
+        # Rows of one video are adjacent, so each record is complete once the next video_id shows up
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        record = None
+        for row in result:
+            row = row._mapping
+            if record is None or record["video_id"] != row["video_id"]:
+                if record is not None:
+                    yield record
+                record = {name: row[name] for name in VIDEO_COLUMNS}
+                record["transcripts"] = []
+            if row["t_language_code"] is not None:
+                record["transcripts"].append({name: row[f"t_{name}"] for name in TRANSCRIPT_COLUMNS})
+        if record is not None:
+            yield record
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def to_ndjson(records, batch_size=EXPORT_BATCH_SIZE):
+    """Encode records as NDJSON, yielding one bytes chunk per batch of records."""
+    for chunk in _chunks(records, batch_size):
+        yield "".join(
+            json.dumps(record, default=_json_default, ensure_ascii=False) + "\n" for record in chunk
+        ).encode("utf-8")
+
+
+def arrow_schema():
+    import pyarrow as pa
+    transcript = pa.struct([
+        ("language", pa.string()), ("language_code", pa.string()), ("is_generated", pa.bool_()),
+        ("is_translatable", pa.bool_()), ("transcript", pa.string()),
+        ("study_guide", pa.string()), ("quiz", pa.string()),
+    ])
+    return pa.schema([
+        ("video_id", pa.string()), ("url", pa.string()), ("title", pa.string()),
+        ("description", pa.string()), ("author", pa.string()), ("view_count", pa.string()),
+        ("duration", pa.string()), ("views", pa.int64()), ("duration_seconds", pa.int64()),
+        ("fetched_at", pa.timestamp("us")), ("transcripts", pa.list_(transcript)),
+    ])
+
+
+def _drain(sink):
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def to_arrow_stream(records, batch_size=EXPORT_BATCH_SIZE):
+    """Encode records as an Arrow IPC stream, yielding the bytes of each record batch as it is written."""
+    import pyarrow as pa
+    schema = arrow_schema()
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+    for chunk in _chunks(records, batch_size):
+        writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+        yield _drain(sink)
+    writer.close()
+    # Schema for an empty export, plus the end-of-stream marker
+    yield _drain(sink)
+
+
+def read_ndjson(fileobj):
+    for line in fileobj:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_arrow(fileobj):
+    import pyarrow as pa
+    with pa.ipc.open_stream(fileobj) as reader:
+        for batch in reader:
+            yield from batch.to_pylist()
+
+
+READERS = {"ndjson": read_ndjson, "arrow": read_arrow}
+
+
+def _check_record(record):
+    if not (isinstance(record, dict) and record.get("video_id")):
+        raise ValueError("every record needs a video_id")
+    transcripts = record.get("transcripts") or []
+    if not isinstance(transcripts, list):
+        raise ValueError(f"{record['video_id']}: transcripts must be a list")
+    if not all(isinstance(t, dict) and t.get("language_code") for t in transcripts):
+        raise ValueError(f"{record['video_id']}: every transcript needs a language_code")
+
+
+def import_records(records, engine=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Upsert records in chunks, one transaction per chunk. Returns the counts.
+    Chunks before a malformed record stay committed; re-running the import is safe.
+    """
+    session = Session(engine) if engine is not None else get_session()
+    totals = {"videos": 0, "transcripts": 0}
+    try:
+        for chunk in _chunks(records, batch_size):
+            for record in chunk:
+                _check_record(record)
+            videos, transcripts = load_data.bulk_upsert(session, chunk)
+            totals["videos"] += videos
+            totals["transcripts"] += transcripts
+    finally:
+        session.close()
+    return totals
+
+
+def import_file(fileobj, fmt="ndjson", engine=None, batch_size=IMPORT_BATCH_SIZE):
+    """Import a binary file object in the given format. Malformed input raises ValueError."""
+    if fmt not in READERS:
+        raise ValueError(f"Unknown format {fmt!r}. Available: {', '.join(READERS)}")
+    return import_records(READERS[fmt](fileobj), engine=engine, batch_size=batch_size)
+
+
+def export_file(fileobj, fmt="ndjson", engine=None, batch_size=EXPORT_BATCH_SIZE):
+    """Write the whole library to a binary file object. Returns the number of videos."""
+    count = 0
+
+    def counted(records):
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    encode = to_ndjson if fmt == "ndjson" else to_arrow_stream
+    for data in encode(counted(iter_export_records(engine, batch_size)), batch_size):
+        fileobj.write(data)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk export / import of videos and transcripts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="Write every video and transcript to a file (default: stdout)")
+    export_cmd.add_argument("-o", "--output", default="-")
+    export_cmd.add_argument("--format", choices=list(FORMATS), default="ndjson")
+    import_cmd = sub.add_parser("import", help="Upsert videos and transcripts from an export ('-' for stdin)")
+    import_cmd.add_argument("input")
+    import_cmd.add_argument("--format", choices=list(FORMATS), default="ndjson")
+    import_cmd.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        if args.output == "-":
+            count = export_file(sys.stdout.buffer, args.format)
+        else:
+            with open(args.output, "wb") as f:
+                count = export_file(f, args.format)
+        # stdout may be the export itself
+        print(f"Exported {count} videos", file=sys.stderr)
+    else:
+        if args.input == "-":
+            totals = import_file(sys.stdin.buffer, args.format, batch_size=args.batch_size)
+        else:
+            with open(args.input, "rb") as f:
+                totals = import_file(f, args.format, batch_size=args.batch_size)
+        print(f"Imported {totals['videos']} videos, {totals['transcripts']} transcripts")
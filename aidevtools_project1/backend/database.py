@@ -1,6 +1,8 @@
 import os
-from sqlalchemy import create_engine, Column, String, Boolean, DateTime, ForeignKey, Integer, Text
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+import hashlib
+import threading
+from sqlalchemy import create_engine, event, select, Column, String, Boolean, DateTime, ForeignKey, Integer, BigInteger, Text, Index
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship, object_session, Session
 from sqlalchemy.sql import func
 
 Base = declarative_base()
@@ -15,10 +17,47 @@ class Video(Base):
     author = Column(String)
     view_count = Column(String)
     duration = Column(String)
+    # Typed copies of view_count / duration for sorting and range filters
+    views = Column(BigInteger)
+    duration_seconds = Column(Integer)
     fetched_at = Column(DateTime, default=func.now())
 
     transcripts = relationship("Transcript", back_populates="video", cascade="all, delete-orphan")
 
+    # Keep in sync with migrate_db.py, which adds these to existing databases.
+    # Postgres only: DuckDB rewrites an update of an indexed column as delete + insert,
+    # which its foreign key check rejects while transcripts reference the video.
+    __table_args__ = (
+        Index("ix_videos_fetched_at", "fetched_at").ddl_if(dialect="postgresql"),
+        Index("ix_videos_views", views.desc().nulls_last()).ddl_if(dialect="postgresql"),
+        Index("ix_videos_duration_seconds", "duration_seconds").ddl_if(dialect="postgresql"),
+    )
+
+def content_hash(text: str) -> str:
+    """Key of a transcript text in transcript_blobs: tracks with exactly the same text share a blob."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+ROW_PREFIX = "row:"
+
+def row_hash(video_id, language_code, is_generated) -> str:
+    """
+    Key of a transcript's own blob, used for generated content that must not be shared:
+    edits, custom-prompt output, or content of a transcript that has no text yet.
+    """
+    return ROW_PREFIX + hashlib.sha256(f"{video_id}\0{language_code}\0{bool(is_generated)}".encode("utf-8")).hexdigest()
+
+def is_row_hash(key) -> bool:
+    return bool(key) and key.startswith(ROW_PREFIX)
+
+class TranscriptBlob(Base):
+    """Transcript text and the study guide / quiz generated from it, stored once per content."""
+    __tablename__ = 'transcript_blobs'
+
+    content_hash = Column(String, primary_key=True)
+    transcript = Column(Text)
+    study_guide = Column(Text)
+    quiz = Column(Text)
+
 class Transcript(Base):
     __tablename__ = 'transcripts'
 
@@ -27,17 +66,135 @@ class Transcript(Base):
     language_code = Column(String, primary_key=True)
     is_generated = Column(Boolean, primary_key=True)
     is_translatable = Column(Boolean)
-    transcript = Column(Text)
-    study_guide = Column(Text)
-    quiz = Column(Text)
+    # Text, study guide and quiz live in transcript_blobs, shared by every track with the same content.
+    # No foreign key: blobs are upserted independently of the transcripts pointing at them.
+    content_hash = Column(String)
 
     video = relationship("Video", back_populates="transcripts")
+    blob = relationship(TranscriptBlob, primaryjoin="foreign(Transcript.content_hash) == TranscriptBlob.content_hash",
+                        lazy="joined")
+
+    __table_args__ = (
+        Index("ix_transcripts_video_language", "video_id", "language_code"),
+    )
+
+    def __init__(self, transcript=None, study_guide=None, quiz=None, **kwargs):
+        super().__init__(**kwargs)
+        self.transcript = transcript
+        self.study_guide = study_guide
+        self.quiz = quiz
+
+    def _use_blob(self, key, text=None):
+        """Point at the blob stored under key, creating it if there is none yet."""
+        blob = None
+        session = object_session(self)
+        if session is not None:
+            with session.no_autoflush:
+                blob = session.get(TranscriptBlob, key)
+        self.blob = blob or TranscriptBlob(content_hash=key, transcript=text)
+        return self.blob
+
+    def set_generated(self, field, value, shared=False):
+        """
+        Set study_guide or quiz. Only default-prompt output is written with shared=True, in place:
+        into the blob every track with this text uses (or the track's own blob, if it has one).
+        Anything else (edits, custom prompts) is copy-on-write: a track on a shared blob first
+        gets its own blob with a copy of the text and content.
+        """
+        if self.blob is None:
+            if value is None:
+                return
+            self._use_blob(row_hash(self.video_id, self.language_code, self.is_generated))
+        elif not shared and not is_row_hash(self.blob.content_hash):
+            if getattr(self.blob, field) == value:
+                return
+            shared_blob = self.blob
+            own = self._use_blob(row_hash(self.video_id, self.language_code, self.is_generated))
+            own.transcript, own.study_guide, own.quiz = shared_blob.transcript, shared_blob.study_guide, shared_blob.quiz
+        setattr(self.blob, field, value)
+
+    @property
+    def transcript(self):
+        return self.blob.transcript if self.blob is not None else None
+
+    @transcript.setter
+    def transcript(self, text):
+        # Generated content belongs to the text: new text picks up whatever its blob already has.
+        # The same text again keeps the current blob, so a track's own edits survive a re-fetch.
+        if text:
+            if self.blob is None or self.blob.transcript != text:
+                self._use_blob(content_hash(text), text)
+        elif self.blob is not None and self.blob.transcript:
+            self.blob = None
+
+    @property
+    def study_guide(self):
+        return self.blob.study_guide if self.blob is not None else None
+
+    @study_guide.setter
+    def study_guide(self, value):
+        self.set_generated("study_guide", value)
+
+    @property
+    def quiz(self):
+        return self.blob.quiz if self.blob is not None else None
+
+    @quiz.setter
+    def quiz(self, value):
+        self.set_generated("quiz", value)
+
+def _insert_blob_if_absent(session, blob):
+    """INSERT ... ON CONFLICT DO NOTHING, so sessions storing the same new text concurrently both succeed."""
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # duckdb_engine builds on the Postgres dialect; both support ON CONFLICT DO NOTHING
+        from sqlalchemy.dialects.postgresql import insert
+    session.execute(
+        insert(TranscriptBlob.__table__)
+        .values(content_hash=blob.content_hash, transcript=blob.transcript, study_guide=blob.study_guide, quiz=blob.quiz)
+        .on_conflict_do_nothing(index_elements=["content_hash"])
+    )
+
+@event.listens_for(Session, "before_flush")
+def _share_new_blobs(session, flush_context, instances):
+    """
+    New blobs are inserted unless a blob with the same key exists (also one another session
+    stored meanwhile), and transcripts are pointed at the stored row instead of the pending one.
+    A track's own blob takes the newer content; a shared blob only has empty fields filled.
+    """
+    pending = [obj for obj in session.new if isinstance(obj, TranscriptBlob)]
+    if not pending:
+        return
+    replaced = {}
+    stored = {}
+    with session.no_autoflush:
+        for blob in pending:
+            key = blob.content_hash
+            if key not in stored:
+                _insert_blob_if_absent(session, blob)
+                stored[key] = session.scalars(select(TranscriptBlob).where(TranscriptBlob.content_hash == key)).one()
+            existing = stored[key]
+            if is_row_hash(key):
+                existing.transcript, existing.study_guide, existing.quiz = blob.transcript, blob.study_guide, blob.quiz
+            else:
+                for field in ("study_guide", "quiz"):
+                    if getattr(existing, field) is None:
+                        setattr(existing, field, getattr(blob, field))
+            replaced[blob] = existing
+            session.expunge(blob)
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, Transcript) and obj.blob in replaced:
+                obj.blob = replaced[obj.blob]
 
 def get_db_url():
     """
     Constructs the database URL based on environment variables.
-    Defaults to local DuckDB if POSTGRES_HOST is not set.
+    DATABASE_URL (any SQLAlchemy URL) wins; otherwise Postgres if POSTGRES_HOST is set,
+    else local DuckDB.
     """
+    if os.environ.get("DATABASE_URL"):
+        return os.environ["DATABASE_URL"]
     host = os.environ.get("POSTGRES_HOST")
     if host:
         user = os.environ.get("POSTGRES_USER")
@@ -50,8 +207,20 @@ def get_db_url():
     # Default to local DuckDB
     return "duckdb:///youtube_data.duckdb"
 
+_engines = {}
+_engines_lock = threading.Lock()
+
 def get_engine():
-    return create_engine(get_db_url())
+    """
+    The engine for the configured database. Engines are cached per URL, so every
+    session shares one connection pool instead of opening a new one.
+    """
+    url = get_db_url()
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = _engines[url] = create_engine(url)
+        return engine
 
 def get_session():
     engine = get_engine()
@@ -1,33 +1,200 @@
-from database import get_engine
-import pandas as pd
+"""
+Preview / inspect stored videos and transcripts.
+
+Rows are streamed from a server-side cursor and printed chunk by chunk, so
+memory stays flat on a production-sized database. --stats aggregates in SQL.
+
+    uv run python db_list.py                                  # every transcript row
+    uv run python db_list.py --limit 20 --author "Some Channel"
+    uv run python db_list.py --columns video_id,title,views,transcript_length --min-views 10000
+    uv run python db_list.py --language en --format csv > transcripts.csv
+    uv run python db_list.py --stats
+"""
+import sys
+import csv
+import argparse
 from sqlalchemy import text
+from database import get_engine
+
+# name -> (SQL expression, display width)
+PREVIEW_COLUMNS = {
+    "video_id": ("v.video_id", 11),
+    "url": ("v.url", 43),
+    "title": ("v.title", 40),
+    "author": ("v.author", 20),
+    "views": ("v.views", 12),
+    "duration_seconds": ("v.duration_seconds", 8),
+    "fetched_at": ("v.fetched_at", 19),
+    "language": ("t.language", 20),
+    "language_code": ("t.language_code", 8),
+    "is_generated": ("t.is_generated", 5),
+    "transcript_length": ("LENGTH(b.transcript)", 8),
+    "preview": ("SUBSTRING(b.transcript, 1, 100)", 100),
+    "has_study_guide": ("(b.study_guide IS NOT NULL AND b.study_guide <> '')", 5),
+    "has_quiz": ("(b.quiz IS NOT NULL AND b.quiz <> '')", 5),
+}
+# Text and generated content are stored once per content hash (database.TranscriptBlob)
+BLOB_JOIN = " LEFT JOIN transcript_blobs b ON b.content_hash = t.content_hash"
+DEFAULT_COLUMNS = ["video_id", "url", "title", "language", "is_generated", "transcript_length", "preview"]
+CHUNK_SIZE = 1000
+
+
+def build_filters(video_id=None, author=None, language=None, min_views=None, max_views=None):
+    """WHERE clause and bound parameters shared by the preview and stats queries."""
+    clauses = []
+    params = {}
+    if video_id:
+        clauses.append("v.video_id = :video_id")
+        params["video_id"] = video_id
+    if author:
+        clauses.append("v.author = :author")
+        params["author"] = author
+    if language:
+        clauses.append("t.language_code = :language")
+        params["language"] = language
+    if min_views is not None:
+        clauses.append("v.views >= :min_views")
+        params["min_views"] = min_views
+    if max_views is not None:
+        clauses.append("v.views <= :max_views")
+        params["max_views"] = max_views
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def build_preview_query(columns=None, limit=None, **filters):
+    columns = columns or DEFAULT_COLUMNS
+    unknown = [c for c in columns if c not in PREVIEW_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown column(s) {', '.join(unknown)}. Available: {', '.join(PREVIEW_COLUMNS)}")
+    where, params = build_filters(**filters)
+    select = ", ".join(f"{PREVIEW_COLUMNS[c][0]} AS {c}" for c in columns)
+    sql = (f"SELECT {select} FROM videos v JOIN transcripts t ON v.video_id = t.video_id{BLOB_JOIN}{where} "
+           "ORDER BY v.video_id, t.language_code, t.is_generated")
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    return text(sql), params
+
+
+def iter_chunks(engine, query, params, chunk_size=CHUNK_SIZE):
+    """Yield lists of rows, at most chunk_size at a time, from a server-side cursor."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(query, params)
+        while True:
+            rows = result.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def _cell(value, width):
+    value = "" if value is None else str(value).replace("\n", " ")
+    if len(value) > width:
+        value = value[:width - 1] + "…"
+    return value.ljust(width)
 
-def preview_db():
-    engine = get_engine()
-    
-    sql = text("""
-    SELECT 
-        v.video_id, 
-        v.url, 
-        v.title, 
-        t.language, 
-        t.is_generated, 
-        LENGTH(t.transcript) as transcript_length, 
-        SUBSTRING(t.transcript, 1, 100) as preview 
-    FROM videos v 
-    JOIN transcripts t ON v.video_id = t.video_id
-    """)
-    
-    print("--- Database Preview ---")
+
+def format_row(values, widths):
+    return "  ".join(_cell(v, w) for v, w in zip(values, widths)).rstrip()
+
+
+def preview_db(columns=None, limit=None, chunk_size=CHUNK_SIZE, output_format="table",
+               engine=None, out=None, **filters):
+    """Print matching transcript rows as a table or CSV. Returns the number of rows printed."""
+    engine = engine or get_engine()
+    out = out or sys.stdout
+    columns = columns or DEFAULT_COLUMNS
+    query, params = build_preview_query(columns, limit, **filters)
+    widths = [max(PREVIEW_COLUMNS[c][1], len(c)) for c in columns]
+
+    if output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+    else:
+        print("--- Database Preview ---", file=out)
+        print(format_row(columns, widths), file=out)
+
+    count = 0
     try:
-        with engine.connect() as conn:
-            df = pd.read_sql(sql, conn)
-            if not df.empty:
-                print(df.to_string())
+        for rows in iter_chunks(engine, query, params, chunk_size):
+            if output_format == "csv":
+                writer.writerows(rows)
             else:
-                print("No data found.")
+                for row in rows:
+                    print(format_row(row, widths), file=out)
+            count += len(rows)
     except Exception as e:
-        print(f"Error querying database: {e}")
+        print(f"Error querying database: {e}", file=sys.stderr)
+        return count
+
+    if output_format != "csv":
+        print(f"({count} rows)" if count else "No data found.", file=out)
+    return count
+
+
+def db_stats(engine=None, top_languages=10, **filters):
+    """Library totals and a per-language breakdown, aggregated in the database."""
+    engine = engine or get_engine()
+    where, params = build_filters(**filters)
+    from_clause = f"FROM videos v LEFT JOIN transcripts t ON v.video_id = t.video_id{BLOB_JOIN}{where}"
+    with engine.connect() as conn:
+        totals = conn.execute(text(
+            "SELECT COUNT(DISTINCT v.video_id) AS videos, "
+            "COUNT(t.video_id) AS transcripts, "
+            "COUNT(b.transcript) AS with_text, "
+            # Texts shared through a blob count once
+            "COUNT(DISTINCT CASE WHEN b.transcript IS NOT NULL THEN b.content_hash END) AS distinct_texts, "
+            "SUM(LENGTH(b.transcript)) AS total_chars, "
+            "AVG(LENGTH(b.transcript)) AS avg_chars, "
+            "MAX(LENGTH(b.transcript)) AS max_chars, "
+            "SUM(CASE WHEN b.study_guide IS NOT NULL AND b.study_guide <> '' THEN 1 ELSE 0 END) AS with_study_guide, "
+            "SUM(CASE WHEN b.quiz IS NOT NULL AND b.quiz <> '' THEN 1 ELSE 0 END) AS with_quiz "
+            f"{from_clause}"
+        ), params).mappings().one()
+        languages = conn.execute(text(
+            "SELECT t.language_code, COUNT(*) AS transcripts, COUNT(b.transcript) AS with_text "
+            f"{from_clause}{' AND' if where else ' WHERE'} t.video_id IS NOT NULL "
+            "GROUP BY t.language_code ORDER BY transcripts DESC, t.language_code LIMIT :top"
+        ), {**params, "top": top_languages}).mappings().all()
+    return {"totals": dict(totals), "languages": [dict(row) for row in languages]}
+
+
+def print_stats(stats, out=None):
+    out = out or sys.stdout
+    print("--- Database Stats ---", file=out)
+    for name, value in stats["totals"].items():
+        if isinstance(value, float):
+            value = round(value, 1)
+        print(f"{name:<18}{value if value is not None else 0}", file=out)
+    if stats["languages"]:
+        print("\nlanguage  transcripts  with_text", file=out)
+        for row in stats["languages"]:
+            print(f"{row['language_code'] or '?':<10}{row['transcripts']:<13}{row['with_text']}", file=out)
+
 
 if __name__ == "__main__":
-    preview_db()
+    parser = argparse.ArgumentParser(description="Preview stored videos and transcripts")
+    parser.add_argument("--columns", help=f"Comma-separated columns (default: {','.join(DEFAULT_COLUMNS)}). "
+                                          f"Available: {','.join(PREVIEW_COLUMNS)}")
+    parser.add_argument("--limit", type=int, help="Stop after this many rows")
+    parser.add_argument("--video-id")
+    parser.add_argument("--author")
+    parser.add_argument("--language", help="Transcript language code, e.g. en")
+    parser.add_argument("--min-views", type=int)
+    parser.add_argument("--max-views", type=int)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows fetched per round trip")
+    parser.add_argument("--format", choices=["table", "csv"], default="table", dest="output_format")
+    parser.add_argument("--stats", action="store_true", help="Print totals computed in SQL instead of rows")
+    args = parser.parse_args()
+
+    filters = dict(video_id=args.video_id, author=args.author, language=args.language,
+                   min_views=args.min_views, max_views=args.max_views)
+    if args.stats:
+        print_stats(db_stats(**filters))
+    else:
+        columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+        try:
+            preview_db(columns, args.limit, args.chunk_size, args.output_format, **filters)
+        except ValueError as e:
+            parser.error(str(e))
@@ -0,0 +1,48 @@
+"""
+Deferred imports for heavy client libraries.
+
+    requests = LazyModule("requests")
+    build = LazyObject("googleapiclient.discovery", "build")
+
+Nothing is imported until an attribute is read or the object is called. The
+import itself goes through importlib, so whatever is in sys.modules at that
+moment is used (including test doubles). Attributes set on a LazyModule (as
+mock.patch does) shadow the real module's until they are deleted.
+
+Find what an import costs with:
+
+    python -X importtime -c "import api" 2>&1 | sort -t'|' -k2 -n | tail -20
+"""
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module, imported on first attribute access."""
+
+    def __getattr__(self, attr):
+        # Only called for names not set on the stand-in itself
+        return getattr(importlib.import_module(self.__name__), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self.__name__!r}>"
+
+
+class LazyObject:
+    """Stand-in for module.name (a class or function), imported on first call or attribute access."""
+
+    def __init__(self, module: str, name: str):
+        self._module = module
+        self._name = name
+
+    def resolve(self):
+        return getattr(importlib.import_module(self._module), self._name)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return f"<lazy {self._module}.{self._name}>"
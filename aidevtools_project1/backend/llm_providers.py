@@ -0,0 +1,215 @@
+"""
+LLM provider layer.
+
+Each task (study_guide, quiz, chat) resolves to a provider and model:
+
+    LLM_PROVIDER=gemini|local          default for every task (gemini)
+    LLM_PROVIDER_<TASK>=...            per-task override, e.g. LLM_PROVIDER_CHAT=local
+    LLM_MODEL=...                      default model name
+    LLM_MODEL_<TASK>=...               per-task model, e.g. LLM_MODEL_CHAT=gemini-2.0-flash-lite
+
+The local provider is a deterministic offline stub for tests, CI and
+benchmarks (LOCAL_LLM_LATENCY_MS adds an artificial delay).
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+
+import metrics
+import rate_limit
+
+TASKS = ("study_guide", "quiz", "chat")
+
+
+class LLMProvider(ABC):
+    name = "base"
+    default_model = ""
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or self.default_model
+
+    @abstractmethod
+    def generate(self, prompt: str, config: Optional[dict] = None) -> str:
+        ...
+
+    @abstractmethod
+    def stream(self, prompt: str, config: Optional[dict] = None) -> Iterator[str]:
+        ...
+
+    def count_tokens(self, prompt: str) -> int:
+        return rate_limit.estimate_tokens(prompt)
+
+    def span(self):
+        return metrics.span("llm_call", f"{self.name}/{self.model}")
+
+    def warm_up(self):
+        """Build clients ahead of the first request (server start-up)."""
+
+    def record_tokens(self, prompt_tokens, response_tokens):
+        metrics.record_tokens(self.name, self.model, prompt_tokens, response_tokens)
+
+
+def get_api_key() -> Optional[str]:
+    return os.environ.get("GOOGLE_API_KEY")
+
+
+def get_client():
+    api_key = get_api_key()
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable not set.")
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    default_model = "gemini-2.0-flash"
+
+    def __init__(self, model: Optional[str] = None):
+        super().__init__(model)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
+    def warm_up(self):
+        # Without a key the first request reports the missing key, as before
+        if get_api_key():
+            self.client
+
+    def _record_usage(self, usage, prompt: str, text: str):
+        # usage_metadata is exact; fall back to the limiter's estimate when a response has none
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        response_tokens = getattr(usage, "candidates_token_count", None)
+        if not isinstance(prompt_tokens, int):
+            prompt_tokens = rate_limit.estimate_tokens(prompt)
+        if not isinstance(response_tokens, int):
+            response_tokens = rate_limit.estimate_tokens(text)
+        self.record_tokens(prompt_tokens, response_tokens)
+
+    def generate(self, prompt: str, config: Optional[dict] = None) -> str:
+        client = self.client
+        with self.span():
+            response = rate_limit.get_limiter().call(
+                lambda: client.models.generate_content(model=self.model, contents=prompt, config=config),
+                estimated_tokens=rate_limit.estimate_tokens(prompt)
+            )
+        self._record_usage(getattr(response, "usage_metadata", None), prompt, response.text or "")
+        return response.text
+
+    def stream(self, prompt: str, config: Optional[dict] = None) -> Iterator[str]:
+        client = self.client
+        usage = None
+        parts = []
+        with self.span():
+            response = rate_limit.get_limiter().stream(
+                lambda: client.models.generate_content_stream(model=self.model, contents=prompt, config=config),
+                estimated_tokens=rate_limit.estimate_tokens(prompt)
+            )
+            for chunk in response:
+                # The final chunk carries the usage totals
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+        self._record_usage(usage, prompt, "".join(parts))
+
+    def count_tokens(self, prompt: str) -> int:
+        try:
+            return self.client.models.count_tokens(model=self.model, contents=prompt).total_tokens
+        except Exception:
+            return super().count_tokens(prompt)
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic, network-free stand-in. The same prompt always yields the same output;
+    structured quiz requests get a valid quiz built from the transcript's words.
+    """
+    name = "local"
+    default_model = "local-stub"
+
+    def __init__(self, model: Optional[str] = None):
+        super().__init__(model)
+        self.latency = float(os.environ.get("LOCAL_LLM_LATENCY_MS", "0")) / 1000.0
+
+    @staticmethod
+    def _source_words(prompt: str) -> list:
+        # The source material follows the last "Transcript:" / "SOURCE MATERIAL:" marker
+        for marker in ("Transcript:", "SOURCE MATERIAL:"):
+            if marker in prompt:
+                prompt = prompt.rsplit(marker, 1)[1]
+                break
+        return re.findall(r"[A-Za-z][A-Za-z'-]{3,}", prompt) or ["material"]
+
+    def _quiz(self, prompt: str) -> str:
+        match = re.search(r"Generate (\d+)", prompt)
+        count = int(match.group(1)) if match else 5
+        words = self._source_words(prompt)
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        questions = []
+        for i in range(count):
+            options = [words[(seed + i * 4 + j) % len(words)] + f" ({j + 1})" for j in range(4)]
+            questions.append({
+                "question": f"Question {i + 1}: which term appears in the material?",
+                "options": options,
+                "correct_answer": options[(seed + i) % 4],
+                "explanation": "Generated by the local provider."
+            })
+        return json.dumps(questions)
+
+    def _text(self, prompt: str) -> str:
+        words = self._source_words(prompt)
+        key_terms = ", ".join(list(dict.fromkeys(w.lower() for w in words))[:8])
+        return (
+            f"## Summary ({self.model})\n\n"
+            f"Key terms: {key_terms}.\n\n"
+            f"This response was generated offline from {len(words)} words of source material."
+        )
+
+    def generate(self, prompt: str, config: Optional[dict] = None) -> str:
+        with self.span():
+            if self.latency:
+                time.sleep(self.latency)
+            if config and config.get("response_mime_type") == "application/json":
+                text = self._quiz(prompt)
+            else:
+                text = self._text(prompt)
+        self.record_tokens(self.count_tokens(prompt), len(text.split()))
+        return text
+
+    def stream(self, prompt: str, config: Optional[dict] = None) -> Iterator[str]:
+        text = self.generate(prompt, config)
+        for piece in re.findall(r"\S+\s*", text):
+            yield piece
+
+    def count_tokens(self, prompt: str) -> int:
+        return len(prompt.split())
+
+
+PROVIDERS = {
+    GeminiProvider.name: GeminiProvider,
+    LocalProvider.name: LocalProvider,
+}
+
+_instances = {}
+
+
+def get_provider(task: str) -> LLMProvider:
+    """Resolve the provider configured for a task (see module docstring)."""
+    task_key = task.upper()
+    name = os.environ.get(f"LLM_PROVIDER_{task_key}") or os.environ.get("LLM_PROVIDER", GeminiProvider.name)
+    model = os.environ.get(f"LLM_MODEL_{task_key}") or os.environ.get("LLM_MODEL")
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}'. Choose one of: {', '.join(PROVIDERS)}")
+    key = (name, model)
+    if key not in _instances:
+        _instances[key] = PROVIDERS[name](model)
+    return _instances[key]
@@ -1,6 +1,8 @@
-import os
-from google import genai
 from typing import Optional
+import quiz as quiz_schema
+import llm_providers
+# Kept importable from here for existing callers
+from llm_providers import get_api_key, get_client
 
 STUDY_GUIDE_PROMPT = """You are a highly capable research assistant and tutor. Create a detailed study guide designed to review understanding of the transcript. Create a quiz with ten short-answer questions (2-3 sentences each) and include a separate answer key.
 
@@ -21,43 +23,102 @@ Return ONLY the JSON array. Do not include any markdown formatting (like ```json
 Transcript:
 {transcript}"""
 
-def get_api_key() -> Optional[str]:
-    return os.environ.get("GOOGLE_API_KEY")
+QUIZ_REPAIR_PROMPT = """Generate {count} additional multiple choice questions based on the transcript.
+They must not repeat any of these existing questions:
+{existing}
 
-def get_client():
-    api_key = get_api_key()
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY environment variable not set.")
-    return genai.Client(api_key=api_key)
+Return the result strictly as a JSON array of objects with the fields "question", "options", "correct_answer" and "explanation".
+"correct_answer" must match one of the options exactly.
 
-def generate_content(prompt_template: str, transcript: str, custom_prompt: Optional[str] = None) -> str:
+Transcript:
+{transcript}"""
+
+# Gemini structured output: constrain the response to a JSON array of quiz questions
+QUIZ_RESPONSE_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": list[quiz_schema.QuizQuestion],
+}
+
+QUIZ_MAX_REPAIR_ROUNDS = 2
+
+def build_prompt(prompt_template: str, transcript: str, custom_prompt: Optional[str] = None) -> str:
+    # If custom prompt is provided, use it. Otherwise use the template.
+    # Note: The template expects {transcript}. A custom prompt might not have it formatted, 
+    # so we should probably append the transcript or expect the user to include it?
+    # Better approach: The custom prompt replaces the *Instruction* part.
+    if custom_prompt:
+        return f"{custom_prompt}\n\nTranscript:\n{transcript}"
+    return prompt_template.format(transcript=transcript)
+
+def generate_content(prompt_template: str, transcript: str, custom_prompt: Optional[str] = None, config: Optional[dict] = None, task: str = "study_guide") -> str:
     try:
-        client = get_client()
-        
-        # If custom prompt is provided, use it. Otherwise use the template.
-        # Note: The template expects {transcript}. A custom prompt might not have it formatted, 
-        # so we should probably append the transcript or expect the user to include it?
-        # Better approach: The custom prompt replaces the *Instruction* part.
-        
-        if custom_prompt:
-             final_prompt = f"{custom_prompt}\n\nTranscript:\n{transcript}"
-        else:
-             final_prompt = prompt_template.format(transcript=transcript)
-
-        response = client.models.generate_content(
-            model="gemini-2.0-flash", contents=final_prompt
-        )
-        return response.text
+        provider = llm_providers.get_provider(task)
+        final_prompt = build_prompt(prompt_template, transcript, custom_prompt)
+        return provider.generate(final_prompt, config=config)
     except ValueError as ve:
         return f"Error: {str(ve)}"
     except Exception as e:
         return f"Error generating content: {str(e)}"
 
+def generate_content_stream(prompt_template: str, transcript: str, custom_prompt: Optional[str] = None, config: Optional[dict] = None, task: str = "study_guide"):
+    """Yield text chunks as the model produces them. Errors are yielded as a single "Error ..." chunk."""
+    try:
+        provider = llm_providers.get_provider(task)
+        final_prompt = build_prompt(prompt_template, transcript, custom_prompt)
+        for chunk in provider.stream(final_prompt, config=config):
+            yield chunk
+    except ValueError as ve:
+        yield f"Error: {str(ve)}"
+    except Exception as e:
+        yield f"Error generating content: {str(e)}"
+
 def generate_study_guide(transcript: str, prompt: Optional[str] = None) -> str:
     return generate_content(STUDY_GUIDE_PROMPT, transcript, prompt)
 
 def generate_quiz(transcript: str, prompt: Optional[str] = None) -> str:
-    return generate_content(QUIZ_PROMPT, transcript, prompt)
+    """
+    Generate a quiz as schema-constrained JSON and validate it.
+    Broken or truncated questions are replaced by asking only for the missing ones,
+    instead of regenerating the whole quiz. Returns the canonical JSON array.
+    """
+    content = generate_content(QUIZ_PROMPT, transcript, prompt, config=QUIZ_RESPONSE_CONFIG, task="quiz")
+    if content.startswith("Error"):
+        return content
+    return repair_quiz(content, transcript, prompt)
+
+def repair_quiz(content: str, transcript: str, prompt: Optional[str] = None) -> str:
+    """
+    Validate a generated quiz and request replacements for broken or missing questions.
+    Returns the canonical JSON array, or an "Error ..." string if nothing could be parsed.
+    """
+    questions, broken = quiz_schema.parse_quiz(content)
+    # A custom prompt may ask for a different number of questions
+    expected = quiz_schema.QUIZ_QUESTION_COUNT if not prompt else len(questions) + broken
+
+    for _ in range(QUIZ_MAX_REPAIR_ROUNDS):
+        missing = expected - len(questions)
+        if missing <= 0:
+            break
+        print(f"WARNING: quiz has {missing} broken/missing questions, requesting replacements")
+        existing = "\n".join(f"- {q.question}" for q in questions) or "- (none)"
+        # The repair prompt goes through str.format again in build_prompt
+        existing = existing.replace("{", "{{").replace("}", "}}")
+        repair_prompt = QUIZ_REPAIR_PROMPT.format(count=missing, existing=existing, transcript="{transcript}")
+        repaired = generate_content(repair_prompt, transcript, config=QUIZ_RESPONSE_CONFIG, task="quiz")
+        if repaired.startswith("Error"):
+            break
+        extra, _ = quiz_schema.parse_quiz(repaired)
+        questions.extend(extra[:missing])
+
+    if not questions:
+        return "Error generating content: quiz response could not be parsed"
+    return quiz_schema.dump_quiz(questions)
+
+def generate_study_guide_stream(transcript: str, prompt: Optional[str] = None):
+    return generate_content_stream(STUDY_GUIDE_PROMPT, transcript, prompt)
+
+def generate_quiz_stream(transcript: str, prompt: Optional[str] = None):
+    return generate_content_stream(QUIZ_PROMPT, transcript, prompt, config=QUIZ_RESPONSE_CONFIG, task="quiz")
 
 CHAT_SYSTEM_PROMPT = """You are a friendly and highly capable research assistant and tutor.
 Your goal is to help the user understand the SOURCE MATERIAL which is from a transcript of a video.
@@ -70,54 +131,32 @@ SOURCE MATERIAL:
 
 Introduce yourself, describe the material, and ask the user a starter question about the material."""
 
+def build_chat_prompt(study_guide: str, message: str, history: list) -> str:
+    # Construct the full prompt with history
+    full_prompt = CHAT_SYSTEM_PROMPT.format(study_guide=study_guide) + "\n\n"
+
+    for msg in history:
+        role = msg.get("role", "unknown")
+        content = msg.get("content", "")
+        if role == "user":
+            full_prompt += f"User: {content}\n"
+        elif role == "assistant":
+            full_prompt += f"Assistant: {content}\n"
+
+    full_prompt += f"User: {message}\nAssistant:"
+    return full_prompt
+
 def chat_with_study_guide(study_guide: str, message: str, history: list) -> str:
     try:
-
-        client = get_client()
-        
-        # Construct the full prompt with history
-        full_prompt = CHAT_SYSTEM_PROMPT.format(study_guide=study_guide) + "\n\n"
-        
-        for msg in history:
-            role = msg.get("role", "unknown")
-            content = msg.get("content", "")
-            if role == "user":
-                full_prompt += f"User: {content}\n"
-            elif role == "assistant":
-                full_prompt += f"Assistant: {content}\n"
-                
-        full_prompt += f"User: {message}\nAssistant:"
-        
-        response = client.models.generate_content(
-            model="gemini-2.0-flash", contents=full_prompt
-        )
-        return response.text
+        provider = llm_providers.get_provider("chat")
+        return provider.generate(build_chat_prompt(study_guide, message, history))
     except Exception as e:
         return f"Error: {str(e)}"
 
 def chat_with_study_guide_stream(study_guide: str, message: str, history: list):
     try:
-
-        client = get_client()
-        
-        # Construct the full prompt with history
-        full_prompt = CHAT_SYSTEM_PROMPT.format(study_guide=study_guide) + "\n\n"
-        
-        for msg in history:
-            role = msg.get("role", "unknown")
-            content = msg.get("content", "")
-            if role == "user":
-                full_prompt += f"User: {content}\n"
-            elif role == "assistant":
-                full_prompt += f"Assistant: {content}\n"
-                
-        full_prompt += f"User: {message}\nAssistant:"
-        
-        response = client.models.generate_content_stream(
-            model="gemini-2.0-flash", contents=full_prompt
-        )
-        for chunk in response:
-            if chunk.text:
-                yield chunk.text
+        provider = llm_providers.get_provider("chat")
+        for chunk in provider.stream(build_chat_prompt(study_guide, message, history)):
+            yield chunk
     except Exception as e:
         yield f"Error: {str(e)}"
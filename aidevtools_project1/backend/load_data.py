@@ -1,7 +1,32 @@
 #!/usr/bin/env python3
+import re
 import sys
 from datetime import datetime
-from database import get_session, init_db, Video, Transcript
+from typing import Optional
+from sqlalchemy import func, select
+from database import get_session, init_db, content_hash, row_hash, Video, Transcript, TranscriptBlob
+
+# ISO 8601 durations as returned by yt-dlp ("PT754S") and the Data API ("PT12M34S", "P1DT2H")
+DURATION_RE = re.compile(r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$")
+
+def parse_view_count(value) -> Optional[int]:
+    """"12345", "12,345 views" or 12345 -> 12345; None if there is no number."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    digits = re.sub(r"[^0-9]", "", str(value))
+    return int(digits) if digits else None
+
+def parse_duration_seconds(value) -> Optional[int]:
+    """ISO 8601 duration ("PT1H2M3S") -> seconds; None if it cannot be parsed."""
+    if value is None:
+        return None
+    match = DURATION_RE.match(str(value).strip().upper())
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes, seconds = match.groups()
+    return int(int(days or 0) * 86400 + int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds or 0))
 
 def load_video_metadata(session, video_data):
     """
@@ -19,6 +44,8 @@ def load_video_metadata(session, video_data):
         author=meta.get("author"),
         view_count=meta.get("view_count"),
         duration=meta.get("duration"),
+        views=parse_view_count(meta.get("view_count")),
+        duration_seconds=parse_duration_seconds(meta.get("duration")),
         fetched_at=datetime.now()
     )
     
@@ -67,9 +94,10 @@ def load_transcripts_metadata(session, video_id, transcripts_list):
     session.commit()
     print(f"✓ Loaded {len(transcripts_list)} transcript records for {video_id}")
 
-def update_transcript_text(session, video_id, language_code, is_generated, transcript_text):
+def update_transcript_text(session, video_id, language_code, is_generated, transcript_text, commit=True):
     """
     Update the transcript text for a specific record.
+    Pass commit=False to batch several updates into one transaction.
     """
     transcript = session.query(Transcript).filter_by(
         video_id=video_id,
@@ -79,7 +107,8 @@ def update_transcript_text(session, video_id, language_code, is_generated, trans
     
     if transcript:
         transcript.transcript = transcript_text
-        session.commit()
+        if commit:
+            session.commit()
         print(f"✓ Updated transcript text for {video_id} ({language_code})")
     else:
         # If it doesn't exist, we create a stub record
@@ -92,7 +121,156 @@ def update_transcript_text(session, video_id, language_code, is_generated, trans
             is_translatable=False # Default
         )
         session.add(new_transcript)
+        if commit:
+            session.commit()
+
+VIDEO_FIELDS = ("url", "title", "description", "author", "view_count", "duration",
+                "views", "duration_seconds", "fetched_at")
+TRANSCRIPT_FIELDS = ("language", "is_translatable", "content_hash")
+GENERATED_FIELDS = ("study_guide", "quiz")
+
+def _insert_for(session):
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # duckdb_engine builds on the Postgres dialect; both support INSERT ... ON CONFLICT DO UPDATE
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+def _upsert(session, table, rows, key, fields, keep_stored=True):
+    insert = _insert_for(session)
+    stmt = insert(table).values(rows)
+    # A field missing from the incoming record keeps the stored value (unless keep_stored is False)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[name] for name in key],
+        set_={name: func.coalesce(stmt.excluded[name], table.c[name]) if keep_stored else stmt.excluded[name]
+              for name in fields},
+    )
+    session.execute(stmt)
+
+def _conflicts(blob, generated):
+    return any(value is not None and blob[name] not in (None, value) for name, value in generated.items())
+
+def store_blobs(session, contents):
+    """
+    Store transcript contents in transcript_blobs and return the blob key of each transcript.
+    contents maps (video_id, language_code, is_generated) to (text, study_guide, quiz).
+
+    Transcripts with the same text share one blob, filling in its empty study guide / quiz.
+    A transcript whose study guide or quiz differs from the shared one gets its own blob
+    (row_hash) instead, as does one without text. A transcript that already has its own blob
+    for this text keeps it, with missing fields left as stored.
+    """
+    if not contents:
+        return {}
+    blobs, transcripts = TranscriptBlob.__table__, Transcript.__table__
+    digests = {key: content_hash(text) for key, (text, _, _) in contents.items() if text}
+    current = {
+        (video_id, language_code, bool(is_generated)): key
+        for video_id, language_code, is_generated, key in session.execute(
+            select(transcripts.c.video_id, transcripts.c.language_code, transcripts.c.is_generated,
+                   transcripts.c.content_hash)
+            .where(transcripts.c.video_id.in_(list({key[0] for key in contents}))))
+    }
+    own_keys = [row_hash(*key) for key in contents if current.get(key) == row_hash(*key)]
+    own_texts = dict(session.execute(
+        select(blobs.c.content_hash, blobs.c.transcript).where(blobs.c.content_hash.in_(own_keys))).all()) if own_keys else {}
+    stored = {
+        digest: {"study_guide": study_guide, "quiz": quiz}
+        for digest, study_guide, quiz in session.execute(
+            select(blobs.c.content_hash, blobs.c.study_guide, blobs.c.quiz)
+            .where(blobs.c.content_hash.in_(list(set(digests.values())))))
+    } if digests else {}
+
+    shared, kept, own, keys = {}, [], [], {}
+    for key, (text, study_guide, quiz) in contents.items():
+        generated = {"study_guide": study_guide, "quiz": quiz}
+        own_key = row_hash(*key)
+        if text and current.get(key) == own_key and own_texts.get(own_key) == text:
+            kept.append(dict(generated, content_hash=own_key, transcript=text))
+            keys[key] = own_key
+            continue
+        blob = None
+        if text:
+            digest = digests[key]
+            blob = shared.get(digest) or dict(stored.get(digest) or {"study_guide": None, "quiz": None},
+                                              content_hash=digest, transcript=text)
+            if not _conflicts(blob, generated):
+                blob.update({name: value for name, value in generated.items() if value is not None})
+                shared[digest] = blob
+                keys[key] = digest
+                continue
+        # Copy-on-write: the shared content with this transcript's own fields on top
+        copy = {name: value if value is not None else (blob or {}).get(name) for name, value in generated.items()}
+        own.append(dict(copy, content_hash=own_key, transcript=text or None))
+        keys[key] = own_key
+
+    if shared:
+        _upsert(session, blobs, list(shared.values()), ["content_hash"], GENERATED_FIELDS)
+    if kept:
+        _upsert(session, blobs, kept, ["content_hash"], GENERATED_FIELDS)
+    if own:
+        _upsert(session, blobs, own, ["content_hash"], ("transcript",) + GENERATED_FIELDS, keep_stored=False)
+    return keys
+
+def bulk_upsert(session, records, commit=True):
+    """
+    Upsert many videos with their transcripts: one INSERT ... ON CONFLICT statement per
+    table instead of a query per row. Records use the bulk export shape (video columns
+    plus a "transcripts" list). Transcript texts are stored once per content hash.
+    Returns (videos, transcripts) upserted.
+    """
+    videos = {}
+    transcripts = {}
+    contents = {}
+    # Generated content for transcripts without text; its blob is only known from the stored row
+    textless = {}
+    for record in records:
+        video_id = record["video_id"]
+        row = {name: record.get(name) for name in VIDEO_FIELDS}
+        if row["views"] is None:
+            row["views"] = parse_view_count(row["view_count"])
+        if row["duration_seconds"] is None:
+            row["duration_seconds"] = parse_duration_seconds(row["duration"])
+        row["fetched_at"] = _as_datetime(row["fetched_at"]) or datetime.now()
+        # Duplicates in one statement are an error for ON CONFLICT; the last one wins
+        videos[video_id] = dict(row, video_id=video_id)
+        for t in record.get("transcripts") or []:
+            key = (video_id, t["language_code"], bool(t.get("is_generated")))
+            text = t.get("transcript")
+            generated = {name: t.get(name) for name in GENERATED_FIELDS}
+            textless.pop(key, None)
+            contents.pop(key, None)
+            if text:
+                contents[key] = (text, generated["study_guide"], generated["quiz"])
+            elif any(value is not None for value in generated.values()):
+                textless[key] = generated
+            transcripts[key] = dict(
+                language=t.get("language"), is_translatable=t.get("is_translatable"), content_hash=None,
+                video_id=key[0], language_code=key[1], is_generated=key[2],
+            )
+
+    if videos:
+        _upsert(session, Video.__table__, list(videos.values()), ["video_id"], VIDEO_FIELDS)
+    for key, digest in store_blobs(session, contents).items():
+        transcripts[key]["content_hash"] = digest
+    if transcripts:
+        _upsert(session, Transcript.__table__, list(transcripts.values()),
+                ["video_id", "language_code", "is_generated"], TRANSCRIPT_FIELDS)
+    for key, generated in textless.items():
+        transcript = session.get(Transcript, key)
+        for name, value in generated.items():
+            if value is not None:
+                setattr(transcript, name, value)
+    if commit:
         session.commit()
+    print(f"✓ Bulk upserted {len(videos)} videos, {len(transcripts)} transcripts")
+    return len(videos), len(transcripts)
 
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,232 @@
+"""
+Prometheus-style metrics, served by the API at GET /metrics.
+
+Counters and histograms live in REGISTRY and are rendered in the Prometheus
+text exposition format. Backend stages are timed with span():
+
+    with metrics.span("youtube_metadata") as s:
+        data = fetch()
+        if "error" in data:
+            s.fail()
+
+which records stage_duration_seconds{stage, detail, outcome}. Stages in use:
+http requests (per route), db_query (per statement type), youtube_metadata,
+transcript_list, transcript_fetch (per language), llm_call (per provider/model,
+with prompt/response tokens in llm_tokens_total) and json_serialize.
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+# Seconds; spans range from sub-millisecond queries to minute-long generations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self.lock:
+            return self.values.get(self._key(labels), 0)
+
+    def render(self) -> list:
+        lines = super().render()
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self.values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        with self.lock:
+            counts, _ = self.values.get(self._key(labels), ([0], 0.0))
+            return sum(counts)
+
+    def render(self) -> list:
+        lines = super().render()
+        with self.lock:
+            for key, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+
+    def _get_or_create(self, cls, name, help, labelnames, **kwargs):
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(name, help, labelnames, **kwargs)
+            return self.metrics[name]
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def register_collector(self, collect):
+        """collect() -> iterable of (name, help, value) gauges read at scrape time."""
+        self.collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            try:
+                gauges = list(collect())
+            except Exception as e:
+                print(f"ERROR: metrics collector failed: {e}")
+                continue
+            for name, help, value in gauges:
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_request_seconds = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response starts (streamed bodies continue after that)",
+    ["method", "route", "status"],
+)
+stage_seconds = REGISTRY.histogram(
+    "stage_duration_seconds",
+    "Time spent in a backend stage",
+    ["stage", "detail", "outcome"],
+)
+llm_tokens = REGISTRY.counter(
+    "llm_tokens_total",
+    "LLM tokens by provider/model; kind is prompt or response",
+    ["provider", "model", "kind"],
+)
+
+
+class Span:
+    def __init__(self):
+        self.outcome = "ok"
+
+    def fail(self):
+        self.outcome = "error"
+
+
+@contextmanager
+def span(stage: str, detail: str = ""):
+    """Time a block into stage_duration_seconds. Exceptions count as errors and propagate."""
+    current = Span()
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception:
+        # Not BaseException: a generator closed early by its consumer did not fail
+        current.fail()
+        raise
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=stage, detail=detail or "", outcome=current.outcome)
+
+
+def record_tokens(provider: str, model: str, prompt_tokens, response_tokens):
+    if prompt_tokens:
+        llm_tokens.inc(prompt_tokens, provider=provider, model=model, kind="prompt")
+    if response_tokens:
+        llm_tokens.inc(response_tokens, provider=provider, model=model, kind="response")
+
+
+def _statement_type(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else ""
+
+
+def instrument_sqlalchemy():
+    """Time every SQL statement from every engine as stage db_query (detail: SELECT, INSERT, ...)."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if getattr(instrument_sqlalchemy, "installed", False):
+        return
+    instrument_sqlalchemy.installed = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            stage_seconds.observe(time.perf_counter() - starts.pop(), stage="db_query",
+                                  detail=_statement_type(statement), outcome="ok")
+
+    @event.listens_for(Engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+        if starts:
+            stage_seconds.observe(time.perf_counter() - starts.pop(), stage="db_query",
+                                  detail=_statement_type(context.statement or ""), outcome="error")
@@ -1,30 +1,298 @@
+"""
+Versioned schema migrations.
+
+Applied versions are recorded in the schema_version table, and each migration runs once.
+Run with:
+
+    uv run migrate_db.py            # apply pending migrations
+    uv run migrate_db.py --status   # show applied / pending versions
+
+Index migrations are safe to run against a live database:
+- Postgres: CREATE INDEX CONCURRENTLY, outside a transaction, so writes to the
+  table are not blocked while the index builds. An invalid index left by an
+  interrupted build is dropped and rebuilt.
+- DuckDB (and other engines): CREATE INDEX IF NOT EXISTS.
+
+To add a migration, append to MIGRATIONS with the next version number. Never
+edit or reorder one that has already shipped.
+"""
 import os
-from database import get_engine
+import argparse
 from sqlalchemy import text
+from database import Base, get_engine
 
-def migrate():
-    engine = get_engine()
-    print(f"Migrating database using engine: {engine.url}...")
-    
+# Arbitrary key for pg_advisory_lock so concurrent deploys do not migrate at the same time
+MIGRATION_LOCK_ID = 72170901
+# Give up instead of queueing behind long transactions (and blocking everyone queued behind us)
+POSTGRES_LOCK_TIMEOUT = os.environ.get("MIGRATION_LOCK_TIMEOUT", "5s")
+
+
+def add_column(table, column, column_type):
+    # DuckDB and Postgres both support ALTER TABLE ... ADD COLUMN IF NOT EXISTS
+    return f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {column_type}"
+
+
+def table_columns(engine, table):
+    # Reflection is not available on every backend (duckdb_engine); the column names of an empty result are
     with engine.connect() as conn:
-        try:
-            # DuckDB and Postgres both support ALTER TABLE ... ADD COLUMN IF NOT EXISTS
-            conn.execute(text("ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS study_guide TEXT"))
-            print("Added column study_guide")
-            if not engine.url.drivername.startswith("duckdb"):
-                conn.commit()
-        except Exception as e:
-            print(f"Error adding study_guide: {e}")
-
-        try:
-            conn.execute(text("ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS quiz TEXT"))
-            print("Added column quiz")
-            if not engine.url.drivername.startswith("duckdb"):
-                conn.commit()
-        except Exception as e:
-            print(f"Error adding quiz: {e}")
-            
-    print("Migration complete.")
+        return set(conn.execute(text(f"SELECT * FROM {table} LIMIT 0")).keys())
+
+
+def has_inline_transcripts(engine):
+    """True for databases created before transcript_blobs, which keep the text on transcripts."""
+    return "transcript" in table_columns(engine, "transcripts")
+
+
+class Migration:
+    def __init__(self, version, description, statements=(), index=None, run=None, dialects=None, only_if=None):
+        """
+        statements: SQL run in one transaction.
+        index: (name, table, columns) for an online index build instead.
+        run: function(engine) for data migrations that manage their own transactions.
+        dialects: only run on these backends; elsewhere the version is recorded as a no-op.
+        only_if: function(engine) -> bool; when false the version is recorded as a no-op.
+        """
+        self.version = version
+        self.description = description
+        self.statements = list(statements)
+        self.index = index
+        self.run = run
+        self.dialects = dialects
+        self.only_if = only_if
+
+
+def backfill_typed_video_columns(engine, batch_size=1000):
+    """
+    Fill videos.views / duration_seconds from the view_count / duration strings.
+    Walks the table in video_id order, committing each batch, so a large table
+    is never locked for long and an interrupted run simply resumes.
+    """
+    from load_data import parse_view_count, parse_duration_seconds
+
+    last_id = ""
+    updated = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT video_id, view_count, duration FROM videos "
+                "WHERE video_id > :last_id ORDER BY video_id LIMIT :limit"
+            ), {"last_id": last_id, "limit": batch_size}).fetchall()
+            if not rows:
+                break
+            params = [
+                {"video_id": video_id, "views": parse_view_count(view_count),
+                 "duration_seconds": parse_duration_seconds(duration)}
+                for video_id, view_count, duration in rows
+            ]
+            conn.execute(text(
+                "UPDATE videos SET views = :views, duration_seconds = :duration_seconds WHERE video_id = :video_id"
+            ), params)
+            updated += len(rows)
+            last_id = rows[-1][0]
+    print(f"  Backfilled {updated} videos")
+
+
+def backfill_transcript_blobs(engine, batch_size=500):
+    """
+    Copy transcript text, study guide and quiz into transcript_blobs and point each
+    transcript at its blob (load_data.store_blobs: identical texts share a blob unless
+    their generated content differs). The old columns are left as they are, so older
+    instances keep working during a rolling deploy and the copy can be checked before
+    a later release drops them. Every batch commits on its own; an interrupted run
+    resumes with the transcripts that have no content_hash yet.
+    """
+    from sqlalchemy.orm import Session
+    from load_data import store_blobs
+
+    if not has_inline_transcripts(engine):
+        print("  Nothing to copy (created with transcript_blobs)")
+        return
+
+    copied = 0
+    while True:
+        with Session(engine) as session:
+            rows = session.execute(text(
+                "SELECT video_id, language_code, is_generated, transcript, study_guide, quiz FROM transcripts "
+                "WHERE content_hash IS NULL AND (transcript <> '' OR study_guide <> '' OR quiz <> '') "
+                "ORDER BY video_id, language_code, is_generated LIMIT :limit"
+            ), {"limit": batch_size}).fetchall()
+            if not rows:
+                break
+            keys = store_blobs(session, {
+                (video_id, language_code, bool(is_generated)): (transcript or None, study_guide or None, quiz or None)
+                for video_id, language_code, is_generated, transcript, study_guide, quiz in rows
+            })
+            session.execute(text(
+                "UPDATE transcripts SET content_hash = :content_hash "
+                "WHERE video_id = :video_id AND language_code = :language_code AND is_generated = :is_generated"
+            ), [{"video_id": video_id, "language_code": language_code, "is_generated": is_generated,
+                 "content_hash": content_hash} for (video_id, language_code, is_generated), content_hash in keys.items()])
+            session.commit()
+            copied += len(rows)
+    print(f"  Copied {copied} transcripts to transcript_blobs")
+
+
+MIGRATIONS = [
+    # Databases created with transcript_blobs keep generated content there
+    Migration(1, "generated content columns on transcripts", [
+        add_column("transcripts", "study_guide", "TEXT"),
+        add_column("transcripts", "quiz", "TEXT"),
+    ], only_if=has_inline_transcripts),
+    Migration(2, "index transcripts(video_id, language_code)",
+              index=("ix_transcripts_video_language", "transcripts", ["video_id", "language_code"])),
+    # videos indexes are Postgres only, see database.Video
+    Migration(3, "index videos(fetched_at)",
+              index=("ix_videos_fetched_at", "videos", ["fetched_at"]), dialects=("postgresql",)),
+    Migration(4, "typed views / duration_seconds columns on videos", [
+        add_column("videos", "views", "BIGINT"),
+        add_column("videos", "duration_seconds", "INTEGER"),
+    ]),
+    Migration(5, "backfill views / duration_seconds", run=backfill_typed_video_columns),
+    # Matches the default "most viewed first" listing, so it is served in index order
+    Migration(6, "index videos(views DESC NULLS LAST)",
+              index=("ix_videos_views", "videos", ["views DESC NULLS LAST"]), dialects=("postgresql",)),
+    Migration(7, "index videos(duration_seconds)",
+              index=("ix_videos_duration_seconds", "videos", ["duration_seconds"]), dialects=("postgresql",)),
+    # transcript_blobs itself is created by create_all in migrate()
+    Migration(8, "content_hash column on transcripts", [
+        add_column("transcripts", "content_hash", "VARCHAR"),
+    ]),
+    # The old transcripts.transcript / study_guide / quiz columns stay until a later release,
+    # once every instance reads blobs and the copy has been verified. That release re-runs the
+    # copy for rows older instances wrote meanwhile, then drops (Postgres) or empties (DuckDB) them.
+    Migration(9, "copy transcript text and generated content to transcript_blobs", run=backfill_transcript_blobs),
+]
+
+
+def is_postgres(engine):
+    return engine.url.get_backend_name() == "postgresql"
+
+
+def create_index_sql(dialect, name, table, columns):
+    concurrently = "CONCURRENTLY " if dialect == "postgresql" else ""
+    return f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+
+
+def ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, "
+            "description VARCHAR, "
+            "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        ))
+
+
+def applied_versions(engine):
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_version"))}
+
+
+def _record(conn, migration):
+    conn.execute(
+        text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+        {"version": migration.version, "description": migration.description},
+    )
+
+
+def _build_index_online(engine, migration):
+    name, table, columns = migration.index
+    dialect = engine.url.get_backend_name()
+    if dialect != "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text(create_index_sql(dialect, name, table, columns)))
+            _record(conn, migration)
+        return
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        invalid = conn.execute(text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            # A previous concurrent build was interrupted; IF NOT EXISTS would keep the broken index
+            print(f"  Dropping invalid index {name}")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(create_index_sql(dialect, name, table, columns)))
+        _record(conn, migration)
+
+
+def _apply(engine, migration):
+    if migration.dialects and engine.url.get_backend_name() not in migration.dialects:
+        print(f"  Not needed on {engine.url.get_backend_name()}")
+        with engine.begin() as conn:
+            _record(conn, migration)
+        return
+    if migration.only_if and not migration.only_if(engine):
+        print("  Not needed for this schema")
+        with engine.begin() as conn:
+            _record(conn, migration)
+        return
+    if migration.index:
+        _build_index_online(engine, migration)
+        return
+    if migration.run:
+        migration.run(engine)
+        with engine.begin() as conn:
+            _record(conn, migration)
+        return
+    with engine.begin() as conn:
+        if is_postgres(engine):
+            conn.execute(text(f"SET LOCAL lock_timeout = '{POSTGRES_LOCK_TIMEOUT}'"))
+        for statement in migration.statements:
+            conn.execute(text(statement))
+        _record(conn, migration)
+
+
+def migrate(engine=None, target=None):
+    """Apply pending migrations up to target (default: all). Returns the versions applied."""
+    engine = engine or get_engine()
+    print(f"Migrating database using engine: {engine.url}...")
+
+    # Base tables for a fresh database; migrations then only add what create_all does not
+    Base.metadata.create_all(engine)
+    ensure_version_table(engine)
+
+    lock_conn = None
+    if is_postgres(engine):
+        lock_conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+    applied = []
+    try:
+        done = applied_versions(engine)
+        for migration in MIGRATIONS:
+            if migration.version in done or (target is not None and migration.version > target):
+                continue
+            print(f"Applying {migration.version}: {migration.description}")
+            _apply(engine, migration)
+            applied.append(migration.version)
+    finally:
+        if lock_conn is not None:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            lock_conn.close()
+
+    print(f"Migration complete. Applied: {applied or 'nothing (up to date)'}")
+    return applied
+
+
+def status(engine=None):
+    engine = engine or get_engine()
+    ensure_version_table(engine)
+    done = applied_versions(engine)
+    for migration in MIGRATIONS:
+        state = "applied" if migration.version in done else "pending"
+        print(f"{migration.version:>4}  {state:<8} {migration.description}")
+
 
 if __name__ == "__main__":
-    migrate()
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="Show applied and pending migrations")
+    parser.add_argument("--to", type=int, dest="target", help="Only migrate up to this version")
+    args = parser.parse_args()
+
+    if args.status:
+        status()
+    else:
+        migrate(target=args.target)
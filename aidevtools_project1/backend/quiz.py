@@ -0,0 +1,134 @@
+"""
+Quiz schema, parsing and validation.
+
+Gemini is asked for schema-constrained JSON, but responses can still be
+wrapped in markdown fences or cut off mid-array. parse_quiz() salvages
+every complete, valid question so that only the broken ones need to be
+regenerated.
+"""
+import json
+from typing import List, Optional, Tuple
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+
+QUIZ_QUESTION_COUNT = 5
+
+
+class QuizQuestion(BaseModel):
+    question: str
+    options: List[str]
+    correct_answer: str
+    explanation: Optional[str] = ""
+
+    @field_validator("question", "correct_answer")
+    @classmethod
+    def not_blank(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("must not be blank")
+        return value.strip()
+
+    @field_validator("options")
+    @classmethod
+    def enough_options(cls, value: List[str]) -> List[str]:
+        options = [o.strip() for o in value if o and o.strip()]
+        if len(options) < 2:
+            raise ValueError("at least two options are required")
+        return options
+
+    @model_validator(mode="after")
+    def answer_is_an_option(self):
+        if self.correct_answer not in self.options:
+            raise ValueError("correct_answer must match one of the options exactly")
+        return self
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove a surrounding ```json ... ``` block if present."""
+    text = text.strip()
+    if text.startswith("```"):
+        lines = text.split("\n")[1:]
+        if lines and lines[-1].strip().startswith("```"):
+            lines = lines[:-1]
+        text = "\n".join(lines).strip()
+    return text
+
+
+def _split_objects(text: str) -> Tuple[List[str], bool]:
+    """
+    Split the top-level {...} objects out of a (possibly truncated) JSON array.
+    Returns the complete object strings and whether a trailing object was cut off.
+    """
+    objects = []
+    depth = 0
+    start = None
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                objects.append(text[start:i + 1])
+                start = None
+    return objects, start is not None
+
+
+def parse_quiz(text: str) -> Tuple[List[QuizQuestion], int]:
+    """
+    Parse quiz text into validated questions.
+    Returns (valid_questions, broken_count) where broken_count counts objects that were
+    present but invalid or truncated.
+    """
+    if not text:
+        return [], 0
+    text = strip_code_fences(text)
+
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            # Some responses wrap the list, e.g. {"questions": [...]}
+            data = next((v for v in data.values() if isinstance(v, list)), [data])
+        raw_items = data if isinstance(data, list) else []
+        truncated = False
+    except json.JSONDecodeError:
+        chunks, truncated = _split_objects(text)
+        raw_items = []
+        for chunk in chunks:
+            try:
+                raw_items.append(json.loads(chunk))
+            except json.JSONDecodeError:
+                raw_items.append(None)
+
+    valid = []
+    broken = 1 if truncated else 0
+    for item in raw_items:
+        try:
+            valid.append(QuizQuestion.model_validate(item))
+        except ValidationError:
+            broken += 1
+    return valid, broken
+
+
+def dump_quiz(questions: List[QuizQuestion]) -> str:
+    """Serialise questions to the canonical JSON array stored in Transcript.quiz."""
+    return json.dumps([q.model_dump() for q in questions], indent=2, ensure_ascii=False)
+
+
+def normalize_quiz_text(text: str) -> str:
+    """Return the canonical JSON form if every question parses, otherwise the text unchanged."""
+    questions, broken = parse_quiz(text)
+    if questions and not broken:
+        return dump_quiz(questions)
+    return text
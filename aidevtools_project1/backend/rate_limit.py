@@ -0,0 +1,289 @@
+"""
+Rate limiting and retries for Gemini calls.
+
+- Two token buckets pace requests/min and tokens/min (GEMINI_RPM, GEMINI_TPM).
+- A semaphore caps concurrent calls (GEMINI_MAX_CONCURRENCY).
+- The request rate adapts: a 429 halves it, successes slowly restore it.
+- Retryable failures (429, 5xx, connection errors) are retried with
+  jittered exponential backoff (GEMINI_MAX_RETRIES).
+
+Counters are available through get_stats().
+
+With a shared SHARED_STATE backend (see shared_state.py), the buckets and the
+concurrency cap are shared by all worker processes, so the limits apply to the
+whole deployment rather than to each worker. Counters stay per process.
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_sec: float, state=None, name: str = ""):
+        """With state (a shared_state.SharedState), the tokens live there under name."""
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.state = state
+        self.name = name
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_sec)
+        self.updated = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """Take amount tokens if available. Returns 0 on success, otherwise seconds to wait."""
+        if self.state is not None:
+            with self.lock:
+                refill_per_sec = self.refill_per_sec
+            return self.state.take(self.name, amount, self.capacity, refill_per_sec)
+        # Never ask for more than the bucket can ever hold
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.refill_per_sec
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block until amount tokens are available. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+
+class LocalSlots:
+    """Concurrency cap within this process."""
+
+    def __init__(self, limit: int):
+        self.semaphore = threading.BoundedSemaphore(limit)
+
+    def acquire(self):
+        self.semaphore.acquire()
+
+    def release(self, held):
+        self.semaphore.release()
+
+
+class SharedSlots:
+    """
+    Concurrency cap across worker processes: slot i is the shared state key name:i.
+    Slots are leased, so a worker that dies while holding one frees it after lease seconds.
+    """
+
+    def __init__(self, state, name: str, limit: int, lease: float = 600.0, poll: float = 0.05):
+        self.state = state
+        self.name = name
+        self.limit = limit
+        self.lease = lease
+        self.poll = poll
+
+    def acquire(self) -> str:
+        owner = f"{os.getpid()}:{threading.get_ident()}"
+        while True:
+            for i in range(self.limit):
+                key = f"{self.name}:{i}"
+                if self.state.add(key, owner, self.lease):
+                    return key
+            time.sleep(self.poll * random.uniform(0.5, 1.5))
+
+    def release(self, held):
+        self.state.delete(held)
+
+
+class RateLimitedError(Exception):
+    """Raised when a call still fails after all retries were used up."""
+
+
+class GeminiLimiter:
+    def __init__(self, rpm: float, tpm: float, max_concurrency: int, max_retries: int,
+                 base_delay: float = 1.0, max_delay: float = 30.0, state=None):
+        """state: a shared_state.SharedState to share the limits across processes (None: this process only)."""
+        self.max_rpm = rpm
+        self.min_rpm = max(1.0, rpm / 16)
+        self.requests = TokenBucket(capacity=max(1.0, rpm / 6), refill_per_sec=rpm / 60.0,
+                                    state=state, name="gemini:requests")
+        self.tokens = TokenBucket(capacity=tpm, refill_per_sec=tpm / 60.0, state=state, name="gemini:tokens")
+        self.concurrency = (SharedSlots(state, "gemini:slot", max_concurrency) if state is not None
+                            else LocalSlots(max_concurrency))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "successes": 0,
+            "retries": 0,
+            "throttled": 0,
+            "failures": 0,
+            "in_flight": 0,
+            "wait_seconds": 0.0,
+            "current_rpm": rpm,
+        }
+
+    def _incr(self, name: str, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _set_rpm(self, rpm: float):
+        rpm = max(self.min_rpm, min(self.max_rpm, rpm))
+        with self.requests.lock:
+            self.requests.refill_per_sec = rpm / 60.0
+        with self._stats_lock:
+            self.stats["current_rpm"] = rpm
+
+    def on_throttled(self):
+        self._incr("throttled")
+        self._set_rpm(self.stats["current_rpm"] / 2)
+
+    def on_success(self):
+        self._incr("successes")
+        if self.stats["current_rpm"] < self.max_rpm:
+            self._set_rpm(self.stats["current_rpm"] + 1)
+
+    @contextmanager
+    def slot(self, estimated_tokens: int = 0):
+        """Wait for rate budget and a concurrency slot, then hold the slot for the call."""
+        waited = self.requests.acquire(1)
+        if estimated_tokens:
+            waited += self.tokens.acquire(estimated_tokens)
+        self._incr("wait_seconds", waited)
+        held = self.concurrency.acquire()
+        self._incr("requests")
+        self._incr("in_flight")
+        try:
+            yield
+        finally:
+            self._incr("in_flight", -1)
+            self.concurrency.release(held)
+
+    def backoff_delay(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _before_retry(self, error: Exception, attempt: int):
+        """Record a failure; raise if it should not be retried, otherwise sleep before the next attempt."""
+        if is_rate_limit_error(error):
+            self.on_throttled()
+        if not is_retryable(error) or attempt >= self.max_retries:
+            self._incr("failures")
+            if is_rate_limit_error(error):
+                raise RateLimitedError(f"Gemini quota exceeded after {attempt + 1} attempts: {error}") from error
+            raise error
+        delay = self.backoff_delay(attempt)
+        print(f"WARNING: Gemini call failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        self._incr("retries")
+        self._incr("wait_seconds", delay)
+        time.sleep(delay)
+
+    def call(self, fn, estimated_tokens: int = 0):
+        """Call fn() under the limiter, retrying retryable failures."""
+        attempt = 0
+        while True:
+            try:
+                with self.slot(estimated_tokens):
+                    result = fn()
+                self.on_success()
+                return result
+            except Exception as e:
+                self._before_retry(e, attempt)
+                attempt += 1
+
+    def stream(self, make_stream, estimated_tokens: int = 0):
+        """
+        Iterate make_stream() under the limiter, holding a concurrency slot until the stream ends.
+        Only failures before the first chunk are retried; a partial stream cannot be replayed.
+        """
+        attempt = 0
+        while True:
+            started = False
+            try:
+                with self.slot(estimated_tokens):
+                    for chunk in make_stream():
+                        started = True
+                        yield chunk
+                self.on_success()
+                return
+            except Exception as e:
+                if started:
+                    self._incr("failures")
+                    raise
+                self._before_retry(e, attempt)
+                attempt += 1
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self.stats)
+
+
+def status_code(error: Exception):
+    """HTTP status of an API error (google.genai errors expose .code), if any."""
+    for attr in ("code", "status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return status_code(error) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # httpx transport errors (used by google-genai) without importing httpx here
+    if type(error).__name__ in ("ConnectError", "ReadTimeout", "ConnectTimeout", "RemoteProtocolError", "ReadError"):
+        return True
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    return is_rate_limit_error(error)
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough heuristic (~4 characters per token) good enough for pacing
+    return max(1, len(text) // 4)
+
+
+def _from_env() -> GeminiLimiter:
+    import shared_state
+    return GeminiLimiter(
+        rpm=float(os.environ.get("GEMINI_RPM", "60")),
+        tpm=float(os.environ.get("GEMINI_TPM", "1000000")),
+        max_concurrency=int(os.environ.get("GEMINI_MAX_CONCURRENCY", "4")),
+        max_retries=int(os.environ.get("GEMINI_MAX_RETRIES", "4")),
+        state=shared_state.get_state() if shared_state.is_shared() else None,
+    )
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> GeminiLimiter:
+    """The process-wide limiter, built on first use (SHARED_STATE may point at the database)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = _from_env()
+        return _limiter
+
+
+def get_stats() -> dict:
+    return get_limiter().get_stats()
@@ -0,0 +1,230 @@
+"""
+State shared by every worker process of the API server.
+
+With several workers (api.py --workers N), the Gemini rate limiter and
+single-flight coalescing must see the same state in every process. They store
+it through the backend selected by SHARED_STATE:
+
+    memory                   this process only (default; fine for one worker)
+    database                 a shared_state table in the application database
+    sqlite:///shared.db      a local SQLite file, a Redis stand-in for workers on one machine
+    <SQLAlchemy URL>         a shared_state table in any other database
+
+Values are strings with an expiry; callers serialise. take() is an atomic
+token-bucket operation. Every read-modify-write is optimistic (conditional
+UPDATE or INSERT, retried on conflict), so no database-specific locking is needed.
+The table is created once by prepare(), before the workers start.
+"""
+import os
+import json
+import time
+import random
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from sqlalchemy import Table, Column, String, Float, Text, MetaData, create_engine, select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+
+DEFAULT_BACKEND = "memory"
+
+metadata = MetaData()
+shared_state_table = Table(
+    "shared_state", metadata,
+    Column("key", String, primary_key=True),
+    Column("value", Text),
+    Column("expires_at", Float),
+)
+
+
+class SharedState(ABC):
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float):
+        ...
+
+    @abstractmethod
+    def add(self, key: str, value: str, ttl: float) -> bool:
+        """Set key only if it is absent or expired. True if this call set it."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def take(self, bucket: str, amount: float, capacity: float, refill_per_sec: float) -> float:
+        """Token bucket: take amount tokens if available. Returns 0 on success, otherwise seconds to wait."""
+
+    def create_storage(self):
+        """Create whatever the backend stores its state in. Run once, not in every worker."""
+
+
+def _refill(state, amount, capacity, refill_per_sec, now):
+    """(new state or None, wait seconds) for a bucket stored as (tokens, updated)."""
+    tokens, updated = state if state else (capacity, now)
+    tokens = min(capacity, tokens + max(0.0, now - updated) * refill_per_sec)
+    # Never ask for more than the bucket can ever hold
+    amount = min(amount, capacity)
+    if tokens >= amount:
+        return (tokens - amount, now), 0.0
+    return None, (amount - tokens) / refill_per_sec
+
+
+class MemoryState(SharedState):
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._buckets = {}
+
+    def _live(self, key, now):
+        entry = self._values.get(key)
+        if entry and entry[1] <= now:
+            del self._values[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.time())
+            return entry[0] if entry else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._values[key] = (value, time.time() + ttl)
+
+    def add(self, key, value, ttl):
+        with self._lock:
+            now = time.time()
+            if self._live(key, now):
+                return False
+            self._values[key] = (value, now + ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def take(self, bucket, amount, capacity, refill_per_sec):
+        with self._lock:
+            new, wait = _refill(self._buckets.get(bucket), amount, capacity, refill_per_sec, time.time())
+            if new:
+                self._buckets[bucket] = new
+            return wait
+
+
+class DatabaseState(SharedState):
+    name = "database"
+    # An idle bucket is forgotten after this long; it would be full again anyway
+    BUCKET_TTL = 3600.0
+    # Share of add() calls that also delete every expired row
+    PURGE_PROBABILITY = 0.01
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def create_storage(self):
+        metadata.create_all(self.engine, checkfirst=True)
+
+    def get(self, key):
+        with self.engine.connect() as conn:
+            row = conn.execute(select(shared_state_table.c.value, shared_state_table.c.expires_at)
+                               .where(shared_state_table.c.key == key)).first()
+        return row.value if row and row.expires_at > time.time() else None
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl
+        while True:
+            with self.engine.begin() as conn:
+                changed = conn.execute(update(shared_state_table).where(shared_state_table.c.key == key)
+                                       .values(value=value, expires_at=expires_at)).rowcount
+            if changed or self._insert(key, value, expires_at):
+                return
+
+    def _insert(self, key, value, expires_at) -> bool:
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(shared_state_table).values(key=key, value=value, expires_at=expires_at))
+            return True
+        except IntegrityError:
+            return False
+
+    def add(self, key, value, ttl):
+        now = time.time()
+        expired = shared_state_table.c.expires_at <= now
+        with self.engine.begin() as conn:
+            if random.random() < self.PURGE_PROBABILITY:
+                conn.execute(delete(shared_state_table).where(expired))
+            else:
+                conn.execute(delete(shared_state_table).where(shared_state_table.c.key == key, expired))
+        return self._insert(key, value, now + ttl)
+
+    def delete(self, key):
+        with self.engine.begin() as conn:
+            conn.execute(delete(shared_state_table).where(shared_state_table.c.key == key))
+
+    def take(self, bucket, amount, capacity, refill_per_sec):
+        key = f"bucket:{bucket}"
+        while True:
+            now = time.time()
+            with self.engine.connect() as conn:
+                old = conn.execute(select(shared_state_table.c.value).where(shared_state_table.c.key == key)).scalar()
+            new, wait = _refill(json.loads(old) if old else None, amount, capacity, refill_per_sec, now)
+            if not new:
+                return wait
+            value = json.dumps(new)
+            if old is None:
+                if self._insert(key, value, now + self.BUCKET_TTL):
+                    return 0.0
+                continue
+            # Only applies if no other worker changed the bucket since we read it
+            with self.engine.begin() as conn:
+                changed = conn.execute(update(shared_state_table)
+                                       .where(shared_state_table.c.key == key, shared_state_table.c.value == old)
+                                       .values(value=value, expires_at=now + self.BUCKET_TTL)).rowcount
+            if changed:
+                return 0.0
+
+
+def from_config(config: Optional[str] = None) -> SharedState:
+    config = config or os.environ.get("SHARED_STATE", DEFAULT_BACKEND)
+    if config == "memory":
+        return MemoryState()
+    if config == "database":
+        from database import get_engine
+        return DatabaseState(get_engine())
+    if "://" in config:
+        return DatabaseState(create_engine(config))
+    raise ValueError(f"Unknown SHARED_STATE '{config}'. Use memory, database or a database URL")
+
+
+def prepare(config: Optional[str] = None):
+    """Create the storage of the configured backend (before starting worker processes)."""
+    state = from_config(config)
+    state.create_storage()
+    if isinstance(state, DatabaseState):
+        # Workers open their own connections
+        state.engine.dispose()
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_state() -> SharedState:
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = from_config()
+        return _state
+
+
+def is_shared() -> bool:
+    """True when other processes see the same state (any backend but memory)."""
+    return get_state().name != MemoryState.name
@@ -0,0 +1,193 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one execution of the
+underlying function; every caller receives its result (or its exception).
+Once the call finishes the key is forgotten, so later callers trigger a
+fresh call. Nothing is cached beyond the lifetime of the in-flight call.
+
+A named group also coalesces across worker processes when SHARED_STATE is
+shared (see shared_state.py). The leading process claims the key, and the
+others poll for its result, which must be JSON-serialisable. Exceptions are
+not shared between processes: when the leader fails, the next waiting process
+runs the call itself.
+
+SingleFlightStream does the same for iterators (streamed generations): every
+concurrent caller receives all items of the one shared run.
+"""
+import json
+import time
+import uuid
+import hashlib
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    # Seconds a process may hold a key before others assume it died
+    LEASE = 300.0
+    # How long a finished result stays available to processes that were waiting for it
+    RESULT_TTL = 30.0
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, name: str = None):
+        """name: coalesce across processes too, under this prefix, when the shared state is shared."""
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once for all concurrent callers using the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, args, kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _run(self, key, fn, args, kwargs):
+        state = None
+        if self.name:
+            import shared_state
+            if shared_state.is_shared():
+                state = shared_state.get_state()
+        if state is None:
+            return fn(*args, **kwargs)
+
+        claim = f"singleflight:{self.name}:{key if isinstance(key, str) else make_key(key)}"
+        call_id = uuid.uuid4().hex
+        while True:
+            if state.add(claim, call_id, self.LEASE):
+                try:
+                    result = fn(*args, **kwargs)
+                    state.set(f"{claim}:{call_id}", json.dumps(result), self.RESULT_TTL)
+                    return result
+                finally:
+                    state.delete(claim)
+            # Another process runs it: wait for its result, or for the claim to go away (it failed)
+            running = state.get(claim)
+            while running is not None:
+                finished = state.get(f"{claim}:{running}")
+                if finished is not None:
+                    return json.loads(finished)
+                time.sleep(self.POLL_INTERVAL)
+                if state.get(claim) != running:
+                    finished = state.get(f"{claim}:{running}")
+                    if finished is not None:
+                        return json.loads(finished)
+                    break
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class _Stream:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.items = []
+        self.done = False
+        self.error = None
+
+
+class SingleFlightStream:
+    """
+    Single-flight for iterators. The first caller for a key starts fn(*args, **kwargs)
+    on a background thread. Every concurrent caller gets an iterator that replays the items
+    produced so far and then follows the live ones, including the run's exception. The
+    run continues when its callers stop iterating.
+
+    In-process only: items are not relayed between worker processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams = {}
+
+    def subscribe(self, key, fn, *args, **kwargs):
+        """Join the run for key, starting it if none is in flight. key=None always starts a new run."""
+        with self._lock:
+            stream = self._streams.get(key) if key is not None else None
+            if stream is None:
+                stream = _Stream()
+                if key is not None:
+                    self._streams[key] = stream
+                threading.Thread(target=self._run, args=(key, stream, fn, args, kwargs), daemon=True).start()
+        return self._follow(stream)
+
+    def _run(self, key, stream, fn, args, kwargs):
+        try:
+            for item in fn(*args, **kwargs):
+                with stream.cond:
+                    stream.items.append(item)
+                    stream.cond.notify_all()
+        except BaseException as e:
+            stream.error = e
+        finally:
+            if key is not None:
+                with self._lock:
+                    del self._streams[key]
+            with stream.cond:
+                stream.done = True
+                stream.cond.notify_all()
+
+    def _follow(self, stream):
+        position = 0
+        while True:
+            with stream.cond:
+                while position == len(stream.items) and not stream.done:
+                    stream.cond.wait()
+                if position < len(stream.items):
+                    item = stream.items[position]
+                    position += 1
+                elif stream.error is not None:
+                    raise stream.error
+                else:
+                    return
+            yield item
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._streams)
+
+
+def make_key(*parts) -> str:
+    """Build a compact key; long parts (e.g. transcript text) are hashed."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(repr(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# Shared groups used by the API
+youtube_fetches = SingleFlight("youtube_fetches")
+llm_generations = SingleFlight("llm_generations")
+llm_streams = SingleFlightStream()
@@ -0,0 +1,115 @@
+import os
+import pytest
+from sqlalchemy import create_engine, text
+
+pa = pytest.importorskip("pyarrow")
+from backend import analytics
+from backend.database import Base
+
+VIDEOS = [
+    # video_id, author, views, duration_seconds
+    ("v1", "Ann/B", 100, 60),
+    ("v2", "Ann/B", 300, 120),
+    ("v3", None, 50, None),
+]
+TRANSCRIPTS = [
+    # video_id, language, language_code, is_generated, transcript, study_guide, quiz
+    ("v1", "English", "en", False, "x" * 40, "Guide", "[]"),
+    ("v1", "German", "de", True, None, None, None),
+    ("v2", "English", "en", True, "x" * 20, None, None),
+    ("v3", "English", "en", False, None, "", None),
+]
+
+def _fill(engine):
+    with engine.begin() as conn:
+        for video_id, author, views, duration in VIDEOS:
+            conn.execute(text(
+                "INSERT INTO videos (video_id, title, author, views, duration_seconds, fetched_at) "
+                "VALUES (:id, :id, :author, :views, :duration, TIMESTAMP '2025-03-04 10:00:00')"
+                if engine.url.get_backend_name() == "duckdb" else
+                "INSERT INTO videos (video_id, title, author, views, duration_seconds, fetched_at) "
+                "VALUES (:id, :id, :author, :views, :duration, '2025-03-04 10:00:00')"
+            ), {"id": video_id, "author": author, "views": views, "duration": duration})
+        for i, (video_id, language, code, generated, *content) in enumerate(TRANSCRIPTS):
+            key = f"h{i}" if any(value is not None for value in content) else None
+            if key:
+                conn.execute(text(
+                    "INSERT INTO transcript_blobs (content_hash, transcript, study_guide, quiz) VALUES (:h, :t, :sg, :q)"
+                ), dict(zip(["h", "t", "sg", "q"], [key, *content])))
+            conn.execute(text(
+                "INSERT INTO transcripts (video_id, language, language_code, is_generated, content_hash) "
+                "VALUES (:v, :l, :lc, :g, :h)"
+            ), {"v": video_id, "l": language, "lc": code, "g": generated, "h": key})
+
+@pytest.fixture
+def duckdb_engine(tmp_path):
+    engine = create_engine(f"duckdb:///{tmp_path / 'app.duckdb'}")
+    Base.metadata.create_all(engine)
+    _fill(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    # Stand-in for Postgres: exercises the server-side cursor export path
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE videos (video_id TEXT PRIMARY KEY, title TEXT, author TEXT, "
+                          "views INTEGER, duration_seconds INTEGER, fetched_at DATETIME)"))
+        conn.execute(text("CREATE TABLE transcripts (video_id TEXT, language TEXT, language_code TEXT, "
+                          "is_generated BOOLEAN, content_hash TEXT)"))
+        conn.execute(text("CREATE TABLE transcript_blobs (content_hash TEXT PRIMARY KEY, "
+                          "transcript TEXT, study_guide TEXT, quiz TEXT)"))
+    _fill(engine)
+    yield engine
+    engine.dispose()
+
+def _as_dicts(table):
+    return {row["language_code"]: row for row in table.to_pylist()}
+
+@pytest.mark.parametrize("engine_fixture", ["duckdb_engine", "sqlite_engine"])
+def test_export_and_reports(engine_fixture, request, tmp_path):
+    """Test a snapshot is partitioned by author/fetch date and reports return Arrow tables."""
+    engine = request.getfixturevalue(engine_fixture)
+    out_dir = str(tmp_path / "analytics")
+
+    snapshot = analytics.export_parquet(out_dir, engine=engine, batch_rows=2)
+
+    assert analytics.latest_snapshot(out_dir) == snapshot
+    partitions = sorted(os.listdir(os.path.join(snapshot, "videos")))
+    assert partitions == ["author_key=Ann_B", "author_key=unknown"]
+    assert os.listdir(os.path.join(snapshot, "videos", "author_key=Ann_B")) == ["fetch_date=2025-03-04"]
+
+    reports = analytics.run_reports(out_dir=out_dir)
+    assert all(isinstance(t, pa.Table) for t in reports.values())
+
+    coverage = {row["author"]: row for row in reports["coverage"].to_pylist()}
+    assert coverage["Ann_B"]["videos"] == 2
+    assert coverage["Ann_B"]["with_study_guide"] == 1
+    assert coverage["unknown"]["with_study_guide"] == 0  # empty string does not count
+
+    lengths = _as_dicts(reports["lengths"])
+    assert lengths["en"]["with_text"] == 2
+    assert lengths["en"]["max_chars"] == 40
+
+    languages = _as_dicts(reports["languages"])
+    assert (languages["en"]["manual"], languages["en"]["generated"]) == (2, 1)
+
+    activity = reports["activity"].to_pylist()
+    assert activity[0]["videos_fetched"] == 3
+    assert activity[0]["total_views"] == 450
+
+def test_snapshots_are_pruned(duckdb_engine, tmp_path):
+    """Test only the newest snapshots are kept."""
+    out_dir = str(tmp_path / "analytics")
+    first = analytics.export_parquet(out_dir, engine=duckdb_engine, keep=1)
+    second = analytics.export_parquet(out_dir, engine=duckdb_engine, keep=1)
+
+    assert not os.path.exists(first)
+    assert analytics.latest_snapshot(out_dir) == second
+
+def test_report_without_snapshot(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        analytics.run_report("coverage", out_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        analytics.run_report("nope", out_dir=str(tmp_path))
@@ -1,7 +1,9 @@
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
+import os
 import sys
+import json
 
 # Patch modules before importing api
 # We need to mock load_data and youtube_api to avoid side effects
@@ -14,7 +16,8 @@ with patch.dict(sys.modules, {
     'youtube_api': mock_youtube_api,
     'database': mock_database
 }):
-    from api import app, get_db
+    from api import app, get_db, bulk_io, warmup
+    import api as api_module
 
 client = TestClient(app)
 
@@ -94,3 +97,123 @@ def test_list_stored_videos():
     
     # Cleanup
     app.dependency_overrides = {}
+
+def test_list_stored_videos_sorted_page():
+    # Sorting and paging are pushed down into the query
+    mock_session = MagicMock()
+    query = mock_session.query.return_value
+    query.order_by.return_value = query
+    query.offset.return_value = query
+    query.limit.return_value = query
+    mock_video = MagicMock()
+    mock_video.video_id = "POPULAR"
+    mock_video.views = 1000
+    mock_video.duration_seconds = 754
+    query.all.return_value = [mock_video]
+
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    response = client.get("/api/v1/db/videos?sort=views&order=desc&limit=10&offset=20")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data[0]["video_id"] == "POPULAR"
+    assert data[0]["views"] == 1000
+    assert data[0]["duration_seconds"] == 754
+    query.order_by.assert_called_once()
+    query.offset.assert_called_once_with(20)
+    query.limit.assert_called_once_with(10)
+
+    app.dependency_overrides = {}
+
+def test_list_stored_videos_invalid_sort():
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+
+    response = client.get("/api/v1/db/videos?sort=description")
+
+    assert response.status_code == 400
+    app.dependency_overrides = {}
+
+@patch.object(bulk_io, "iter_export_records")
+def test_export_library_ndjson(mock_records):
+    mock_records.return_value = iter([
+        {"video_id": "A", "fetched_at": None, "transcripts": []},
+        {"video_id": "B", "fetched_at": None, "transcripts": [{"language_code": "en"}]},
+    ])
+
+    response = client.get("/api/v1/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["video_id"] for line in lines] == ["A", "B"]
+    assert lines[1]["transcripts"] == [{"language_code": "en"}]
+
+def test_export_library_invalid_format():
+    response = client.get("/api/v1/export?format=csv")
+    assert response.status_code == 400
+
+def test_import_library_ndjson():
+    mock_load_data.bulk_upsert.reset_mock()
+    mock_load_data.bulk_upsert.return_value = (2, 1)
+    body = b'{"video_id": "A", "transcripts": []}\n\n{"video_id": "B", "transcripts": [{"language_code": "en"}]}\n'
+
+    response = client.post("/api/v1/import", content=body)
+
+    assert response.status_code == 200
+    assert response.json()["videos"] == 2
+    records = mock_load_data.bulk_upsert.call_args[0][1]
+    assert [r["video_id"] for r in records] == ["A", "B"]
+
+def test_import_library_malformed_body():
+    response = client.post("/api/v1/import", content=b"{not json")
+    assert response.status_code == 400
+
+def test_metrics_endpoint_reports_route_latency():
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    client.get("/api/v1/db/videos?sort=description")
+    app.dependency_overrides = {}
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/db/videos",status="400"}' in body
+    assert 'stage_duration_seconds_count{stage="json_serialize",detail="",outcome="ok"}' in body
+    assert "gemini_limiter_requests" in body
+
+def test_health_endpoint():
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+def test_ready_endpoint_flips_when_warm():
+    started = warmup.Warmup({"database": (lambda: None, True)})
+    with patch.object(api_module, "startup", started):
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+
+        started.run()
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["tasks"]["database"]["error"] is None
+
+def test_prepare_workers_rejects_duckdb():
+    with patch.dict("os.environ", {"DATABASE_URL": "duckdb:///x.duckdb"}):
+        with pytest.raises(SystemExit):
+            api_module.prepare_workers(4)
+
+def test_prepare_workers_shares_state_through_the_database():
+    with patch.dict("os.environ", {"DATABASE_URL": "postgresql://db/app"}), patch("shared_state.prepare") as mock_prepare:
+        os.environ.pop("SHARED_STATE", None)
+        api_module.prepare_workers(4)
+        assert os.environ["SHARED_STATE"] == "database"
+        # The table is created once here, before uvicorn starts the workers
+        mock_prepare.assert_called_once_with()
+
+def test_prepare_workers_single_process_memory_state():
+    with patch.dict("os.environ", {"SHARED_STATE": "memory"}), patch("shared_state.prepare") as mock_prepare:
+        api_module.prepare_workers(1)
+        mock_prepare.assert_not_called()
@@ -0,0 +1,58 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_services import FakeGemini, FakeProxy, FakeYouTube, FakeYouTubeSource, fake_video
+import e2e
+
+@pytest.fixture
+def gemini(monkeypatch):
+    pytest.importorskip("google.genai")
+    service = FakeGemini().start()
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setenv("GOOGLE_GEMINI_BASE_URL", service.url)
+    yield service
+    service.stop()
+
+def test_fake_gemini_speaks_the_gemini_api(gemini):
+    """Test the real GeminiProvider works against the fake, including streaming and token usage."""
+    import llm_providers
+    provider = llm_providers.GeminiProvider("fake-model")
+
+    text = provider.generate("Explain this. Transcript: alpha beta gamma")
+    streamed = "".join(provider.stream("Explain this. Transcript: alpha beta gamma"))
+    quiz = provider.generate("Generate 2 questions. Transcript: alpha beta", config={"response_mime_type": "application/json"})
+
+    assert "alpha" in text and streamed == text
+    assert quiz.startswith("[")
+    tokens = llm_providers.metrics.llm_tokens
+    assert tokens.get(provider="gemini", model="fake-model", kind="prompt") > 0
+
+def test_fake_youtube_through_proxy(monkeypatch):
+    youtube = FakeYouTube(transcript_chars=100).start()
+    proxy = FakeProxy().start()
+    try:
+        monkeypatch.setenv("BENCH_YOUTUBE_URL", youtube.url)
+        monkeypatch.setenv("BENCH_PROXY_URL", proxy.url)
+        data = FakeYouTubeSource().fetch("abc", include_transcript=True)
+    finally:
+        youtube.stop()
+        proxy.stop()
+
+    assert data["video_id"] == "abc"
+    assert len(data["transcripts"][0]["transcript"]) >= 100
+    # Deterministic: the same id always yields the same video
+    assert data["metadata"] == fake_video("abc")["metadata"]
+
+def test_regressions_are_detected():
+    """Test p95 and throughput are compared per level and operation."""
+    run = e2e.summarize([("list", 0.010, True), ("list", 0.012, True), ("chat", 0.5, False)], elapsed=1.0)
+    assert run["errors"] == 1 and run["throughput_rps"] == 3.0
+    baseline = {"levels": {"4": run}}
+
+    assert e2e.compare({4: run}, baseline, 0.25) == []
+
+    slower = e2e.summarize([("list", 0.020, True), ("list", 0.030, True), ("chat", 0.5, True)], elapsed=1.0)
+    problems = e2e.compare({4: slower}, baseline, 0.25)
+    assert problems == ["c=4 list p95 12.0 -> 30.0 ms"]
@@ -0,0 +1,127 @@
+import io
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from backend import bulk_io
+from backend.database import Base, Transcript
+
+RECORDS = [
+    {
+        "video_id": "v1", "url": "https://youtu.be/v1", "title": "First", "author": "Ann",
+        "view_count": "1,234", "duration": "PT2M", "fetched_at": "2025-03-04T10:00:00",
+        "transcripts": [
+            {"language": "English", "language_code": "en", "is_generated": False,
+             "is_translatable": True, "transcript": "hello", "study_guide": "Guide", "quiz": None},
+            {"language": "German", "language_code": "de", "is_generated": True,
+             "is_translatable": False, "transcript": "hallo"},
+        ],
+    },
+    {"video_id": "v2", "title": "Second", "transcripts": []},
+]
+
+def _engine(url):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture
+def source(tmp_path):
+    engine = _engine(f"duckdb:///{tmp_path / 'dev.duckdb'}")
+    bulk_io.import_records(RECORDS, engine=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def target(tmp_path):
+    # Stand-in for Postgres, a different backend than the source
+    engine = _engine(f"sqlite:///{tmp_path / 'prod.db'}")
+    yield engine
+    engine.dispose()
+
+def test_export_groups_transcripts_per_video(source):
+    """Test one record per video in video_id order, with typed columns filled on import."""
+    records = list(bulk_io.iter_export_records(source, batch_size=1))
+
+    assert [r["video_id"] for r in records] == ["v1", "v2"]
+    assert [t["language_code"] for t in records[0]["transcripts"]] == ["de", "en"]
+    assert records[0]["views"] == 1234 and records[0]["duration_seconds"] == 120
+    assert records[0]["fetched_at"] == datetime(2025, 3, 4, 10, 0)
+    assert records[1]["transcripts"] == []
+
+@pytest.mark.parametrize("fmt", ["ndjson", "arrow"])
+def test_round_trip_between_databases(fmt, source, target):
+    """Test an export from DuckDB imports into another database unchanged."""
+    if fmt == "arrow":
+        pytest.importorskip("pyarrow")
+    buffer = io.BytesIO()
+    assert bulk_io.export_file(buffer, fmt, engine=source, batch_size=1) == 2
+
+    buffer.seek(0)
+    assert bulk_io.import_file(buffer, fmt, engine=target) == {"videos": 2, "transcripts": 2}
+    assert list(bulk_io.iter_export_records(target)) == list(bulk_io.iter_export_records(source))
+
+def test_import_updates_and_keeps_missing_fields(source):
+    """Test re-importing upserts existing rows and leaves fields absent from the record alone."""
+    update = {
+        "video_id": "v1", "title": "Renamed", "view_count": "2000",
+        "transcripts": [{"language_code": "en", "is_generated": False, "quiz": "[]"}],
+    }
+    bulk_io.import_records([update, update], engine=source)
+
+    with Session(source) as session:
+        video = session.execute(text("SELECT title, author, views FROM videos WHERE video_id = 'v1'")).one()
+        transcript = session.execute(text(
+            "SELECT b.transcript, b.study_guide, b.quiz FROM transcripts t "
+            "JOIN transcript_blobs b ON b.content_hash = t.content_hash WHERE t.video_id = 'v1' AND t.language_code = 'en'"
+        )).one()
+    assert tuple(video) == ("Renamed", "Ann", 2000)
+    assert tuple(transcript) == ("hello", "Guide", "[]")
+
+def test_import_shares_identical_texts(source):
+    """Test a re-upload with the same text shares its blob; different study guides are kept apart."""
+    mirror = {"video_id": "v3", "transcripts": [
+        {"language_code": "en", "is_generated": True, "transcript": "hello"},
+        {"language_code": "de", "is_generated": True, "transcript": "hello", "study_guide": "Leitfaden"},
+        {"language_code": "fr", "is_generated": False, "transcript": "Hello!", "study_guide": "Guide FR"},
+    ]}
+    bulk_io.import_records([mirror], engine=source)
+
+    with Session(source) as session:
+        blobs = session.execute(text("SELECT COUNT(*) FROM transcript_blobs")).scalar()
+    # v1's "hello" blob is shared by v3/en; v3/de gets its own copy; "Hello!" is a different text
+    assert blobs == 4
+    records = {r["video_id"]: r for r in bulk_io.iter_export_records(source)}
+    tracks = {t["language_code"]: t for t in records["v3"]["transcripts"]}
+    assert (tracks["en"]["transcript"], tracks["en"]["study_guide"]) == ("hello", "Guide")
+    assert (tracks["de"]["transcript"], tracks["de"]["study_guide"]) == ("hello", "Leitfaden")
+    assert (tracks["fr"]["transcript"], tracks["fr"]["study_guide"]) == ("Hello!", "Guide FR")
+    v1 = {t["language_code"]: t for t in records["v1"]["transcripts"]}
+    assert v1["en"]["study_guide"] == "Guide"
+
+def test_reimport_keeps_a_tracks_own_edits(source):
+    """Test re-importing the same text does not move an edited track back to the shared blob."""
+    with Session(source) as session:
+        session.get(Transcript, ("v1", "en", False)).study_guide = "Edited"
+        session.commit()
+
+    bulk_io.import_records([{"video_id": "v1", "transcripts": [
+        {"language_code": "en", "is_generated": False, "transcript": "hello", "quiz": "[]"},
+    ]}], engine=source)
+
+    records = {r["video_id"]: r for r in bulk_io.iter_export_records(source)}
+    en = next(t for t in records["v1"]["transcripts"] if t["language_code"] == "en")
+    assert (en["transcript"], en["study_guide"], en["quiz"]) == ("hello", "Edited", "[]")
+
+def test_import_rejects_records_without_video_id(target):
+    with pytest.raises(ValueError):
+        bulk_io.import_file(io.BytesIO(b'{"title": "no id"}\n'), "ndjson", engine=target)
+    with pytest.raises(ValueError):
+        bulk_io.import_file(io.BytesIO(b"not json\n"), "ndjson", engine=target)
+
+def test_import_rejects_transcripts_without_language_code(target):
+    record = b'{"video_id": "v1", "transcripts": [{"transcript": "hello"}]}\n'
+    with pytest.raises(ValueError, match="language_code"):
+        bulk_io.import_file(io.BytesIO(record), "ndjson", engine=target)
+    with pytest.raises(ValueError):
+        bulk_io.import_file(io.BytesIO(b'{"video_id": "v1", "transcripts": "en"}\n'), "ndjson", engine=target)
@@ -0,0 +1,75 @@
+import io
+import pytest
+from sqlalchemy import create_engine, text
+from backend import db_list
+from backend.database import Base
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"duckdb:///{tmp_path / 'test.duckdb'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO videos (video_id, title, author, views) VALUES "
+            "('a', 'Alpha', 'Ann', 100), ('b', 'Beta', 'Bob', 5000), ('c', 'No transcripts', 'Bob', 1)"
+        ))
+        conn.execute(text(
+            "INSERT INTO transcript_blobs (content_hash, transcript, study_guide) VALUES "
+            "('h1', 'hello world', 'Guide'), ('h2', 'line one\nline two', '')"
+        ))
+        conn.execute(text(
+            "INSERT INTO transcripts (video_id, language_code, is_generated, content_hash) VALUES "
+            "('a', 'en', false, 'h1'), ('a', 'de', true, NULL), ('b', 'en', true, 'h2')"
+        ))
+    yield engine
+    engine.dispose()
+
+def test_preview_streams_all_rows_in_chunks(engine):
+    """Test every transcript row is printed when fetched in chunks smaller than the result."""
+    out = io.StringIO()
+    count = db_list.preview_db(chunk_size=1, engine=engine, out=out)
+
+    assert count == 3
+    lines = out.getvalue().splitlines()
+    assert lines[1].split()[0] == "video_id"
+    assert "line one line two" in out.getvalue()  # newlines do not break the table
+    assert lines[-1] == "(3 rows)"
+
+def test_preview_filters_limit_and_columns(engine):
+    """Test filters, limit and column selection are applied in the query."""
+    out = io.StringIO()
+    count = db_list.preview_db(["video_id", "language_code", "has_study_guide"], limit=1,
+                               output_format="csv", engine=engine, out=out, author="Ann")
+
+    assert count == 1
+    assert out.getvalue().splitlines() == ["video_id,language_code,has_study_guide", "a,de,False"]
+
+    out = io.StringIO()
+    assert db_list.preview_db(["video_id"], engine=engine, out=out, min_views=1000, language="en") == 1
+
+def test_preview_rejects_unknown_columns(engine):
+    with pytest.raises(ValueError):
+        db_list.preview_db(["video_id", "password"], engine=engine, out=io.StringIO())
+
+def test_stats_are_aggregated_in_sql(engine):
+    """Test totals include videos without transcripts and count only non-empty generated content."""
+    stats = db_list.db_stats(engine=engine)
+
+    totals = stats["totals"]
+    assert (totals["videos"], totals["transcripts"], totals["with_text"]) == (3, 3, 2)
+    assert totals["max_chars"] == len("line one\nline two")
+    assert totals["with_study_guide"] == 1
+    assert stats["languages"][0] == {"language_code": "en", "transcripts": 2, "with_text": 2}
+
+    bob = db_list.db_stats(engine=engine, author="Bob")
+    assert bob["totals"]["videos"] == 2
+    assert [row["language_code"] for row in bob["languages"]] == ["en"]
+
+def test_stats_count_shared_texts_once(engine):
+    """Test transcripts sharing a blob count towards with_text but are one distinct text."""
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO transcripts (video_id, language_code, is_generated, content_hash) "
+                          "VALUES ('c', 'en', false, 'h1')"))
+    totals = db_list.db_stats(engine=engine)["totals"]
+    assert (totals["with_text"], totals["distinct_texts"]) == (3, 2)
+    assert totals["with_study_guide"] == 2
@@ -0,0 +1,44 @@
+import os
+import sys
+import types
+import pytest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from lazy_imports import LazyModule, LazyObject
+import import_time
+
+def test_lazy_module_imports_on_first_attribute_access():
+    fake = types.ModuleType("lazy_test_module")
+    fake.answer = 42
+    module = LazyModule("lazy_test_module")
+    with patch.dict(sys.modules, {"lazy_test_module": fake}):
+        assert module.answer == 42
+
+def test_lazy_module_attributes_can_be_patched():
+    module = LazyModule("json")
+    with patch.object(module, "dumps", return_value="patched"):
+        assert module.dumps({}) == "patched"
+    assert module.dumps({}) == "{}"
+
+def test_lazy_object_resolves_on_call():
+    fake = types.ModuleType("lazy_test_module")
+    fake.build = MagicMock(return_value="service")
+    build = LazyObject("lazy_test_module", "build")
+    with patch.dict(sys.modules, {"lazy_test_module": fake}):
+        assert build("youtube", "v3") == "service"
+    fake.build.assert_called_once_with("youtube", "v3")
+
+def test_parse_importtime():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   _io\n"
+              "import time:      4000 |      52000 | api\n")
+    assert import_time.parse_importtime(stderr) == [("_io", 120, 120), ("api", 4000, 52000)]
+
+def test_api_import_does_not_load_heavy_clients():
+    """Cold start: importing the server must not pull in YouTube or Gemini client libraries."""
+    report = import_time.measure("api")
+    assert report["heavy"] == []
+    # Generous budget; the import takes well under a second on a laptop
+    budget = float(os.environ.get("API_IMPORT_BUDGET_SECONDS", "10"))
+    assert report["seconds"] < budget
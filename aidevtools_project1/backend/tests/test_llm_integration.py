@@ -2,6 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
 import sys
+import threading
 
 # Patch modules before importing api
 mock_load_data = MagicMock()
@@ -15,7 +16,7 @@ with patch.dict(sys.modules, {
     'database': mock_database,
     'llm_utils': mock_llm_utils
 }):
-    from api import app, get_db
+    from api import app, get_db, StreamFailed, _stream_and_persist
 
 client = TestClient(app)
 
@@ -38,11 +39,28 @@ def test_generate_study_guide_success():
     
     assert response.status_code == 200
     assert response.json()["content"] == "## Study Guide Content"
-    assert mock_transcript.study_guide == "## Study Guide Content"
+    # Default-prompt output goes to the blob shared by identical texts
+    mock_transcript.set_generated.assert_called_once_with("study_guide", "## Study Guide Content", shared=True)
     mock_session.commit.assert_called()
     
     app.dependency_overrides = {}
 
+def test_generate_study_guide_custom_prompt_not_shared():
+    mock_session = MagicMock()
+    mock_transcript = MagicMock()
+    mock_transcript.transcript = "This is a transcript."
+    mock_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = mock_transcript
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    mock_llm_utils.generate_study_guide.return_value = "## Bullet points"
+
+    response = client.post("/api/v1/transcript/VID1/en/generate_study_guide", json={"prompt": "Bullet points only"})
+
+    assert response.status_code == 200
+    mock_transcript.set_generated.assert_called_once_with("study_guide", "## Bullet points", shared=False)
+
+    app.dependency_overrides = {}
+
 def test_generate_quiz_success():
     # Mock DB session and transcript
     mock_session = MagicMock()
@@ -62,7 +80,7 @@ def test_generate_quiz_success():
     
     assert response.status_code == 200
     assert response.json()["content"] == "## Quiz Content"
-    assert mock_transcript.quiz == "## Quiz Content"
+    mock_transcript.set_generated.assert_called_once_with("quiz", "## Quiz Content", shared=True)
     mock_session.commit.assert_called()
     
     app.dependency_overrides = {}
@@ -90,3 +108,145 @@ def test_generate_study_guide_not_found():
     assert response.status_code == 404
     
     app.dependency_overrides = {}
+
+def test_generate_study_guide_stream_persists_result():
+    mock_session = MagicMock()
+    mock_transcript = MagicMock()
+    mock_transcript.transcript = "This is a transcript."
+    mock_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = mock_transcript
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    # The persisting step opens its own session
+    save_session = MagicMock()
+    saved_transcript = MagicMock()
+    save_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = saved_transcript
+    mock_database.get_session.return_value = save_session
+
+    mock_llm_utils.generate_study_guide_stream.return_value = iter(["## Study", " Guide"])
+
+    response = client.post("/api/v1/transcript/VID1/en/generate_study_guide/stream")
+
+    assert response.status_code == 200
+    assert response.text == "## Study Guide"
+    saved_transcript.set_generated.assert_called_once_with("study_guide", "## Study Guide", shared=True)
+    save_session.commit.assert_called_once()
+    save_session.close.assert_called_once()
+
+    app.dependency_overrides = {}
+
+def test_generate_quiz_stream_error_not_persisted():
+    mock_session = MagicMock()
+    mock_transcript = MagicMock()
+    mock_transcript.transcript = "This is a transcript."
+    mock_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = mock_transcript
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    save_session = MagicMock()
+    mock_database.get_session.return_value = save_session
+
+    mock_llm_utils.generate_quiz_stream.return_value = iter(["Error: quota exceeded"])
+
+    response = client.post("/api/v1/transcript/VID1/en/generate_quiz/stream")
+
+    # Failed before any content: a real error status, not a 200 with error text
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Error: quota exceeded"
+    save_session.commit.assert_not_called()
+
+    app.dependency_overrides = {}
+
+def test_generate_quiz_stream_saves_repaired_quiz():
+    mock_session = MagicMock()
+    mock_transcript = MagicMock()
+    mock_transcript.transcript = "This is a transcript."
+    mock_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = mock_transcript
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    save_session = MagicMock()
+    saved_transcript = MagicMock()
+    save_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = saved_transcript
+    mock_database.get_session.return_value = save_session
+
+    mock_llm_utils.generate_quiz_stream.return_value = iter(['[{"question": "Q1"', ', "options": ['])
+    mock_llm_utils.repair_quiz.return_value = '[{"question": "Q1"}]'
+
+    response = client.post("/api/v1/transcript/VID1/en/generate_quiz/stream")
+
+    assert response.status_code == 200
+    # The raw stream goes through the same validation and repair as the non-stream endpoint
+    mock_llm_utils.repair_quiz.assert_called_with('[{"question": "Q1", "options": [', "This is a transcript.", None)
+    saved_transcript.set_generated.assert_called_once_with("quiz", '[{"question": "Q1"}]', shared=True)
+    save_session.commit.assert_called_once()
+
+    app.dependency_overrides = {}
+
+def test_generate_quiz_stream_unrepairable_not_persisted():
+    mock_session = MagicMock()
+    mock_transcript = MagicMock()
+    mock_transcript.transcript = "This is a transcript."
+    mock_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = mock_transcript
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    save_session = MagicMock()
+    mock_database.get_session.return_value = save_session
+
+    mock_llm_utils.generate_quiz_stream.return_value = iter(["not", " json"])
+    mock_llm_utils.repair_quiz.return_value = "Error generating content: quiz response could not be parsed"
+
+    with pytest.raises(StreamFailed):
+        client.post("/api/v1/transcript/VID1/en/generate_quiz/stream")
+    save_session.commit.assert_not_called()
+
+    app.dependency_overrides = {}
+
+def test_generate_study_guide_stream_aborts_on_late_error():
+    mock_session = MagicMock()
+    mock_transcript = MagicMock()
+    mock_transcript.transcript = "This is a transcript."
+    mock_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = mock_transcript
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    save_session = MagicMock()
+    mock_database.get_session.return_value = save_session
+
+    mock_llm_utils.generate_study_guide_stream.return_value = iter(["## Study", " Guide", "Error generating content: reset"])
+
+    # The response is cut off instead of completing with the error text appended
+    with pytest.raises(StreamFailed):
+        client.post("/api/v1/transcript/VID1/en/generate_study_guide/stream")
+    save_session.commit.assert_not_called()
+
+    app.dependency_overrides = {}
+
+def test_identical_streams_share_one_generation():
+    release = threading.Event()
+    generations = []
+    saved = []
+
+    def start():
+        generations.append(1)
+        yield "## Study"
+        yield " Guide"
+        release.wait(timeout=5)
+        yield "\n"
+
+    first = _stream_and_persist(start, saved.append, key="VID1/en")
+    # Chunks are forwarded one behind the model, so the first arrives with the second
+    assert next(first) == "## Study"
+    second = _stream_and_persist(start, saved.append, key="VID1/en")
+    release.set()
+
+    assert "".join(second) == "## Study Guide\n"
+    assert "".join(first) == " Guide\n"
+    assert generations == [1]
+    assert saved == ["## Study Guide\n"]
+
+def test_generate_study_guide_stream_not_found():
+    mock_session = MagicMock()
+    mock_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    response = client.post("/api/v1/transcript/VID1/en/generate_study_guide/stream")
+    assert response.status_code == 404
+
+    app.dependency_overrides = {}
@@ -0,0 +1,87 @@
+import json
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+import backend.llm_providers as llm_providers
+import backend.llm_utils as llm_utils
+from backend.llm_providers import get_provider, GeminiProvider, LLMProvider, LocalProvider
+
+@pytest.fixture(autouse=True)
+def clear_provider_cache():
+    llm_providers._instances.clear()
+    llm_utils.llm_providers._instances.clear()
+    yield
+    llm_providers._instances.clear()
+    llm_utils.llm_providers._instances.clear()
+
+def test_default_provider_is_gemini():
+    """Without configuration every task uses Gemini's default model."""
+    with patch.dict(os.environ, {}, clear=True):
+        provider = get_provider("chat")
+        assert isinstance(provider, GeminiProvider)
+        assert provider.model == "gemini-2.0-flash"
+
+def test_per_task_provider_and_model():
+    """Per-task variables override the global defaults."""
+    env = {
+        "LLM_PROVIDER": "gemini",
+        "LLM_PROVIDER_CHAT": "local",
+        "LLM_MODEL_STUDY_GUIDE": "gemini-2.5-pro",
+    }
+    with patch.dict(os.environ, env, clear=True):
+        assert isinstance(get_provider("chat"), LocalProvider)
+        assert get_provider("study_guide").model == "gemini-2.5-pro"
+        assert get_provider("quiz").model == "gemini-2.0-flash"
+
+def test_provider_must_implement_generate_and_stream():
+    """A provider missing generate/stream cannot be instantiated."""
+    class HalfProvider(LLMProvider):
+        def generate(self, prompt, config=None):
+            return ""
+
+    with pytest.raises(TypeError):
+        HalfProvider()
+
+def test_unknown_provider():
+    """An unknown provider name is a configuration error."""
+    with patch.dict(os.environ, {"LLM_PROVIDER": "nope"}, clear=True):
+        with pytest.raises(ValueError):
+            get_provider("chat")
+
+def test_local_provider_is_deterministic():
+    """The same prompt always produces the same output, streamed or not."""
+    provider = LocalProvider()
+    prompt = "Summarise.\n\nTranscript:\nNeural networks learn representations from data."
+    assert provider.generate(prompt) == provider.generate(prompt)
+    assert "".join(provider.stream(prompt)) == provider.generate(prompt)
+    assert provider.count_tokens("one two three") == 3
+
+def test_generate_pipeline_offline():
+    """Study guide, quiz and chat all run end to end with the local provider."""
+    with patch.dict(os.environ, {"LLM_PROVIDER": "local"}, clear=True):
+        transcript = "Gradient descent minimises the loss function by following the negative gradient."
+        guide = llm_utils.generate_study_guide(transcript)
+        assert "gradient" in guide.lower()
+
+        quiz = json.loads(llm_utils.generate_quiz(transcript))
+        assert len(quiz) == 5
+        assert all(q["correct_answer"] in q["options"] for q in quiz)
+
+        reply = llm_utils.chat_with_study_guide(guide, "What is this about?", [])
+        assert not reply.startswith("Error")
+
+def test_gemini_provider_uses_configured_model():
+    """The Gemini provider passes its model name to the client."""
+    provider = GeminiProvider("gemini-2.0-flash-lite")
+    mock_client = MagicMock()
+    mock_client.models.generate_content.return_value.text = "answer"
+    provider._client = mock_client
+
+    assert provider.generate("prompt") == "answer"
+    _, kwargs = mock_client.models.generate_content.call_args
+    assert kwargs["model"] == "gemini-2.0-flash-lite"
+
+def test_missing_api_key_is_reported():
+    """Without GOOGLE_API_KEY the Gemini path returns an error string."""
+    with patch.dict(os.environ, {}, clear=True):
+        assert llm_utils.generate_study_guide("text").startswith("Error")
@@ -100,3 +100,23 @@ def test_update_transcript_text_new():
     
     session.add.assert_called_once()
     session.commit.assert_called_once()
+
+def test_update_transcript_text_without_commit():
+    """Test that commit=False leaves the transaction to the caller (batch uploads)."""
+    session = MagicMock()
+    session.query.return_value.filter_by.return_value.first.return_value = None
+
+    update_transcript_text(session, "abc", "en", False, "New text", commit=False)
+
+    session.add.assert_called_once()
+    session.commit.assert_not_called()
+
+def test_parse_typed_video_fields():
+    """Test view counts and ISO 8601 durations are parsed into integers."""
+    from backend.load_data import parse_view_count, parse_duration_seconds
+
+    assert parse_view_count("12,345 views") == 12345
+    assert parse_view_count("None") is None
+    assert parse_duration_seconds("PT754S") == 754
+    assert parse_duration_seconds("PT1H2M3S") == 3723
+    assert parse_duration_seconds("garbage") is None
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine, text
+from backend.metrics import Registry, span, stage_seconds, instrument_sqlalchemy
+from backend import llm_providers
+
+def test_histogram_and_counter_exposition():
+    """Test the Prometheus text format: cumulative buckets, +Inf, sum/count and escaped labels."""
+    registry = Registry()
+    latency = registry.histogram("req_seconds", "Request latency", ["route"], buckets=(0.1, 1.0))
+    latency.observe(0.05, route='/a"b')
+    latency.observe(0.5, route='/a"b')
+    tokens = registry.counter("tokens_total", "Tokens", ["kind"])
+    tokens.inc(3, kind="prompt")
+    registry.register_collector(lambda: [("limiter_in_flight", "In flight", 2)])
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE req_seconds histogram" in lines
+    assert 'req_seconds_bucket{route="/a\\"b",le="0.1"} 1' in lines
+    assert 'req_seconds_bucket{route="/a\\"b",le="1.0"} 2' in lines
+    assert 'req_seconds_bucket{route="/a\\"b",le="+Inf"} 2' in lines
+    assert 'req_seconds_count{route="/a\\"b"} 2' in lines
+    assert 'tokens_total{kind="prompt"} 3' in lines
+    assert "limiter_in_flight 2" in lines
+
+    with pytest.raises(ValueError):
+        tokens.inc(kind="prompt", model="x")
+
+def test_span_records_outcome():
+    """Test a span marks exceptions and explicit failures as errors."""
+    with span("unit_test", "ok_case"):
+        pass
+    with pytest.raises(RuntimeError):
+        with span("unit_test", "raises"):
+            raise RuntimeError("boom")
+    with span("unit_test", "failed") as s:
+        s.fail()
+
+    assert stage_seconds.count(stage="unit_test", detail="ok_case", outcome="ok") == 1
+    assert stage_seconds.count(stage="unit_test", detail="raises", outcome="error") == 1
+    assert stage_seconds.count(stage="unit_test", detail="failed", outcome="error") == 1
+
+def test_sql_statements_are_timed():
+    instrument_sqlalchemy()
+    before = stage_seconds.count(stage="db_query", detail="SELECT", outcome="ok")
+    engine = create_engine("duckdb:///:memory:")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert stage_seconds.count(stage="db_query", detail="SELECT", outcome="ok") == before + 1
+
+def test_llm_calls_record_tokens():
+    """Test provider calls are timed and their prompt/response tokens counted."""
+    provider = llm_providers.LocalProvider("metrics-test")
+    provider.generate("Summarise. Transcript: alpha beta gamma delta")
+
+    m = llm_providers.metrics
+    assert m.llm_tokens.get(provider="local", model="metrics-test", kind="prompt") == 6
+    assert m.llm_tokens.get(provider="local", model="metrics-test", kind="response") > 0
+    assert m.stage_seconds.count(stage="llm_call", detail="local/metrics-test", outcome="ok") == 1
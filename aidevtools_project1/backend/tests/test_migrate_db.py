@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import create_engine, text
+from backend.migrate_db import MIGRATIONS, migrate, applied_versions, create_index_sql, table_columns
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"duckdb:///{tmp_path / 'test.duckdb'}")
+    yield engine
+    engine.dispose()
+
+def test_migrate_fresh_database(engine):
+    """Test all migrations apply to an empty database and are recorded."""
+    applied = migrate(engine)
+
+    assert applied == [m.version for m in MIGRATIONS]
+    assert applied_versions(engine) == set(applied)
+    with engine.connect() as conn:
+        indexes = {row[0] for row in conn.execute(text("SELECT index_name FROM duckdb_indexes()"))}
+    assert "ix_transcripts_video_language" in indexes
+    assert not any(name.startswith("ix_videos_") for name in indexes)
+    # Generated content lives in transcript_blobs; migration 1 is only for old schemas
+    assert not {"transcript", "study_guide", "quiz"} & table_columns(engine, "transcripts")
+
+def test_videos_referenced_by_transcripts_can_be_updated(engine):
+    """Test DuckDB accepts updates to sortable video columns while transcripts reference the row."""
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO videos (video_id, views) VALUES ('abc', 1)"))
+        conn.execute(text("INSERT INTO transcripts (video_id, language_code, is_generated) VALUES ('abc', 'en', false)"))
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE videos SET views = 2, duration_seconds = 3, fetched_at = now() WHERE video_id = 'abc'"))
+
+def test_migrate_is_idempotent(engine):
+    """Test a second run applies nothing."""
+    migrate(engine)
+    assert migrate(engine) == []
+
+def test_migrate_existing_schema(engine):
+    """Test an old database without the generated content columns is upgraded in place."""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE videos (video_id VARCHAR PRIMARY KEY, url VARCHAR, title VARCHAR, "
+                          "description VARCHAR, author VARCHAR, view_count VARCHAR, duration VARCHAR, fetched_at TIMESTAMP)"))
+        conn.execute(text("CREATE TABLE transcripts (video_id VARCHAR, language VARCHAR, language_code VARCHAR, "
+                          "is_generated BOOLEAN, is_translatable BOOLEAN, transcript TEXT, "
+                          "PRIMARY KEY (video_id, language_code, is_generated))"))
+        conn.execute(text("INSERT INTO transcripts VALUES ('abc', 'English', 'en', false, true, 'hello'), "
+                          "('abc', 'English', 'en', true, true, 'hello'), ('abc', 'Spanish', 'es', true, true, 'hello'), "
+                          "('abc', 'German', 'de', true, true, NULL)"))
+        conn.execute(text("INSERT INTO videos (video_id, view_count, duration) VALUES "
+                          "('abc', '1,234', 'PT90S'), ('def', NULL, 'unknown')"))
+
+    migrate(engine, target=1)
+    assert applied_versions(engine) == {1}
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE transcripts SET study_guide = 'Guide' WHERE language_code = 'en'"))
+        conn.execute(text("UPDATE transcripts SET study_guide = 'Guía' WHERE language_code = 'es'"))
+        conn.execute(text("UPDATE transcripts SET quiz = '[]' WHERE language_code = 'de'"))
+
+    migrate(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT t.language_code, t.is_generated, b.transcript, b.study_guide, b.quiz, t.transcript "
+            "FROM transcripts t LEFT JOIN transcript_blobs b ON b.content_hash = t.content_hash "
+            "ORDER BY t.language_code, t.is_generated"
+        )).fetchall()
+        blobs = conn.execute(text("SELECT COUNT(*) FROM transcript_blobs")).scalar()
+    # Both English tracks share one blob; the Spanish study guide differs, so that track gets its own copy.
+    # The old column is left in place for older instances and for checking the copy
+    assert [tuple(r) for r in rows] == [
+        ("de", True, None, None, "[]", None),
+        ("en", False, "hello", "Guide", None, "hello"),
+        ("en", True, "hello", "Guide", None, "hello"),
+        ("es", True, "hello", "Guía", None, "hello"),
+    ]
+    assert blobs == 3
+
+    # Typed columns are backfilled from the strings
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT video_id, views, duration_seconds FROM videos ORDER BY video_id")).fetchall()
+    assert [tuple(r) for r in rows] == [("abc", 1234, 90), ("def", None, None)]
+
+def test_create_index_sql_uses_concurrently_on_postgres():
+    """Test index builds do not block writes on Postgres."""
+    sql = create_index_sql("postgresql", "ix_t", "transcripts", ["video_id", "language_code"])
+    assert sql == "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_t ON transcripts (video_id, language_code)"
+    assert "CONCURRENTLY" not in create_index_sql("duckdb", "ix_t", "transcripts", ["video_id"])
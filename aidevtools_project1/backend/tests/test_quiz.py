@@ -0,0 +1,85 @@
+import json
+from unittest.mock import patch
+from backend.quiz import parse_quiz, dump_quiz, normalize_quiz_text, strip_code_fences
+import backend.llm_utils as llm_utils
+
+def make_question(n):
+    return {
+        "question": f"Question {n}?",
+        "options": ["A", "B", "C", "D"],
+        "correct_answer": "B",
+        "explanation": "Because B."
+    }
+
+def test_parse_plain_json():
+    """A well-formed array parses into questions with nothing broken."""
+    text = json.dumps([make_question(i) for i in range(5)])
+    questions, broken = parse_quiz(text)
+    assert len(questions) == 5
+    assert broken == 0
+
+def test_parse_markdown_wrapped():
+    """Markdown code fences around the JSON are ignored."""
+    text = "```json\n" + json.dumps([make_question(1)]) + "\n```"
+    assert strip_code_fences(text).startswith("[")
+    questions, broken = parse_quiz(text)
+    assert len(questions) == 1
+    assert broken == 0
+
+def test_parse_truncated_keeps_complete_questions():
+    """Complete questions before a truncation point are salvaged."""
+    full = json.dumps([make_question(i) for i in range(3)])
+    truncated = full[:-40]
+    questions, broken = parse_quiz(truncated)
+    assert [q.question for q in questions] == ["Question 0?", "Question 1?"]
+    assert broken == 1
+
+def test_parse_invalid_question_counted_as_broken():
+    """Questions whose answer is not one of the options are rejected."""
+    bad = make_question(9)
+    bad["correct_answer"] = "Z"
+    questions, broken = parse_quiz(json.dumps([make_question(1), bad]))
+    assert len(questions) == 1
+    assert broken == 1
+
+def test_normalize_quiz_text():
+    """Valid quizzes are stored in canonical form; anything else is left untouched."""
+    text = "```json\n" + json.dumps([make_question(1)]) + "\n```"
+    assert json.loads(normalize_quiz_text(text))[0]["question"] == "Question 1?"
+    assert normalize_quiz_text("not a quiz") == "not a quiz"
+
+@patch('backend.llm_utils.generate_content')
+def test_generate_quiz_repairs_only_missing_questions(mock_generate):
+    """A truncated response triggers a request for just the missing questions."""
+    # Four complete questions, then the response is cut off mid-object
+    first = json.dumps([make_question(i) for i in range(4)])[:-1] + ', {"question": "Cut'
+    repair = json.dumps([make_question(10)])
+    mock_generate.side_effect = [first, repair]
+
+    result = llm_utils.generate_quiz("transcript text")
+
+    questions = json.loads(result)
+    assert len(questions) == 5
+    assert questions[-1]["question"] == "Question 10?"
+    assert mock_generate.call_count == 2
+    repair_prompt = mock_generate.call_args_list[1].args[0]
+    assert "Generate 1 additional" in repair_prompt
+
+@patch('backend.llm_utils.generate_content')
+def test_generate_quiz_passes_through_errors(mock_generate):
+    """Errors from the model call are returned unchanged."""
+    mock_generate.return_value = "Error: GOOGLE_API_KEY environment variable not set."
+    assert llm_utils.generate_quiz("transcript text").startswith("Error")
+
+@patch('backend.llm_utils.generate_content')
+def test_repair_quiz_reports_unparseable_text(mock_generate):
+    """Text with no usable questions is an error, not a quiz to store."""
+    mock_generate.return_value = "still not json"
+    assert llm_utils.repair_quiz("not json", "transcript text").startswith("Error")
+
+def test_dump_quiz_roundtrip():
+    """Dumped quizzes parse back to the same questions."""
+    questions, _ = parse_quiz(json.dumps([make_question(1), make_question(2)]))
+    again, broken = parse_quiz(dump_quiz(questions))
+    assert again == questions
+    assert broken == 0
@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import patch
+from backend.rate_limit import (
+    TokenBucket,
+    GeminiLimiter,
+    RateLimitedError,
+    is_retryable,
+    is_rate_limit_error,
+)
+
+class FakeApiError(Exception):
+    """Mimics google.genai.errors.APIError, which exposes the HTTP status as .code."""
+    def __init__(self, code, message="error"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+def make_limiter(**kwargs):
+    defaults = dict(rpm=6000, tpm=10_000_000, max_concurrency=2, max_retries=3)
+    defaults.update(kwargs)
+    return GeminiLimiter(**defaults)
+
+def test_token_bucket_reports_wait_when_empty():
+    """An empty bucket returns how long until enough tokens refill."""
+    bucket = TokenBucket(capacity=2, refill_per_sec=1)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() > 0
+
+def test_error_classification():
+    """429 and 5xx are retryable; other client errors are not."""
+    assert is_retryable(FakeApiError(429))
+    assert is_retryable(FakeApiError(503))
+    assert is_retryable(ConnectionError("reset"))
+    assert not is_retryable(FakeApiError(400))
+    assert not is_retryable(ValueError("bad key"))
+    assert is_rate_limit_error(FakeApiError(429))
+
+@patch('backend.rate_limit.time.sleep')
+def test_call_retries_transient_errors(mock_sleep):
+    """Transient failures are retried and the call eventually succeeds."""
+    limiter = make_limiter()
+    attempts = iter([FakeApiError(503), FakeApiError(429), "ok"])
+
+    def fn():
+        result = next(attempts)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert limiter.call(fn) == "ok"
+    stats = limiter.get_stats()
+    assert stats["retries"] == 2
+    assert stats["throttled"] == 1
+    assert stats["successes"] == 1
+    # A 429 lowers the adaptive rate
+    assert stats["current_rpm"] < 6000
+
+@patch('backend.rate_limit.time.sleep')
+def test_call_does_not_retry_client_errors(mock_sleep):
+    """Non-retryable errors are raised immediately."""
+    limiter = make_limiter()
+
+    def fn():
+        raise FakeApiError(400, "invalid argument")
+
+    with pytest.raises(FakeApiError):
+        limiter.call(fn)
+    mock_sleep.assert_not_called()
+    assert limiter.get_stats()["failures"] == 1
+
+@patch('backend.rate_limit.time.sleep')
+def test_call_gives_up_on_persistent_quota_errors(mock_sleep):
+    """Quota errors that outlast the retries surface as RateLimitedError."""
+    limiter = make_limiter(max_retries=2)
+
+    def fn():
+        raise FakeApiError(429, "RESOURCE_EXHAUSTED")
+
+    with pytest.raises(RateLimitedError):
+        limiter.call(fn)
+    assert mock_sleep.call_count == 2
+
+@patch('backend.rate_limit.time.sleep')
+def test_stream_retries_before_first_chunk(mock_sleep):
+    """A stream that fails before producing anything is retried."""
+    limiter = make_limiter()
+    calls = {"n": 0}
+
+    def make_stream():
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise FakeApiError(503)
+        return iter(["a", "b"])
+
+    assert list(limiter.stream(make_stream)) == ["a", "b"]
+    assert limiter.get_stats()["in_flight"] == 0
+
+def test_backoff_delay_is_capped():
+    """Jittered delays never exceed the configured cap."""
+    limiter = make_limiter(max_delay=5.0)
+    for attempt in range(10):
+        assert 0 <= limiter.backoff_delay(attempt) <= 5.0
@@ -0,0 +1,142 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, inspect
+
+import shared_state
+from shared_state import MemoryState, DatabaseState, from_config
+from backend.rate_limit import GeminiLimiter
+from backend.singleflight import SingleFlight
+
+def database_state(tmp_path):
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    shared_state.prepare(url)
+    return DatabaseState(create_engine(url))
+
+@pytest.fixture(params=["memory", "database"])
+def state(request, tmp_path):
+    if request.param == "memory":
+        return MemoryState()
+    return database_state(tmp_path)
+
+def test_values_expire(state):
+    state.set("k", "v", ttl=0.2)
+    assert state.get("k") == "v"
+    time.sleep(0.25)
+    assert state.get("k") is None
+
+def test_add_only_sets_absent_keys(state):
+    assert state.add("lock", "a", ttl=10)
+    assert not state.add("lock", "b", ttl=10)
+    assert state.get("lock") == "a"
+    state.delete("lock")
+    assert state.add("lock", "b", ttl=10)
+
+def test_add_replaces_expired_keys(state):
+    assert state.add("lock", "a", ttl=0.1)
+    time.sleep(0.15)
+    assert state.add("lock", "b", ttl=10)
+
+def test_take_is_a_token_bucket(state):
+    assert state.take("b", 1, capacity=2, refill_per_sec=1) == 0
+    assert state.take("b", 1, capacity=2, refill_per_sec=1) == 0
+    assert state.take("b", 1, capacity=2, refill_per_sec=1) > 0
+
+def test_take_is_atomic_across_threads(tmp_path):
+    """Each DatabaseState stands in for a worker process; together they never overdraw the bucket."""
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    shared_state.prepare(url)
+    workers = [DatabaseState(create_engine(url)) for _ in range(4)]
+    taken = []
+
+    def worker(state):
+        for _ in range(10):
+            if state.take("gemini", 1, capacity=20, refill_per_sec=0.001) == 0:
+                taken.append(1)
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(taken) == 20
+
+def test_from_config():
+    assert from_config("memory").name == "memory"
+    assert from_config("sqlite://").name == "database"
+    with pytest.raises(ValueError):
+        from_config("carrier-pigeon")
+
+def test_limiters_share_concurrency_slots():
+    """Two workers' limiters with max_concurrency=1 never run calls at the same time."""
+    state = MemoryState()
+    limiters = [GeminiLimiter(rpm=6000, tpm=10_000_000, max_concurrency=1, max_retries=0, state=state) for _ in range(2)]
+    running = []
+    overlap = []
+
+    def call():
+        running.append(1)
+        overlap.append(len(running))
+        time.sleep(0.05)
+        running.pop()
+        return "ok"
+
+    threads = [threading.Thread(target=limiter.call, args=(call,)) for limiter in limiters for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(overlap) == 1
+
+def test_singleflight_coalesces_across_processes(tmp_path):
+    """Groups in different workers with the same name share one execution of a call."""
+    state = database_state(tmp_path)
+    workers = [SingleFlight("test") for _ in range(3)]
+    calls = []
+    results = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        time.sleep(0.2)
+        return {"content": prompt.upper()}
+
+    with patch.object(shared_state, "_state", state):
+        threads = [threading.Thread(target=lambda g=g: results.append(g.do("key", generate, "hi"))) for g in workers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert calls == ["hi"]
+        assert results == [{"content": "HI"}] * 3
+        # Nothing is kept once the call has finished
+        workers[0].do("key", generate, "hi")
+        assert len(calls) == 2
+
+def test_singleflight_retries_when_the_leading_process_fails(tmp_path):
+    state = database_state(tmp_path)
+    leader, follower = SingleFlight("test"), SingleFlight("test")
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    with patch.object(shared_state, "_state", state):
+        thread = threading.Thread(target=lambda: pytest.raises(RuntimeError, leader.do, "key", fail))
+        thread.start()
+        started.wait()
+        assert follower.do("key", lambda: "recovered") == "recovered"
+        thread.join()
+
+def test_workers_do_not_create_the_table(tmp_path):
+    """Only prepare() creates the table; a worker's DatabaseState leaves the schema alone."""
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    engine = create_engine(url)
+    DatabaseState(engine)
+    assert not inspect(engine).has_table("shared_state")
+
+    shared_state.prepare(url)
+    assert inspect(engine).has_table("shared_state")
@@ -0,0 +1,124 @@
+import threading
+import time
+import pytest
+from backend.singleflight import SingleFlight, SingleFlightStream, make_key
+
+def test_concurrent_calls_share_one_execution():
+    """Callers with the same key while a call is in flight get the same result."""
+    group = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_fetch(video_id):
+        calls.append(video_id)
+        started.set()
+        release.wait(timeout=5)
+        return {"video_id": video_id}
+
+    results = []
+    def worker():
+        results.append(group.do("vid", slow_fetch, "vid"))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    threads[0].start()
+    started.wait(timeout=5)
+    for t in threads[1:]:
+        t.start()
+    # Give followers time to join the in-flight call
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert calls == ["vid"]
+    assert len(results) == 5
+    assert all(r == {"video_id": "vid"} for r in results)
+    assert group.in_flight() == 0
+
+def test_sequential_calls_are_not_cached():
+    """After a call completes the next caller triggers a fresh call."""
+    group = SingleFlight()
+    counter = {"n": 0}
+
+    def fn():
+        counter["n"] += 1
+        return counter["n"]
+
+    assert group.do("k", fn) == 1
+    assert group.do("k", fn) == 2
+
+def test_error_is_propagated_and_key_released():
+    """Exceptions reach the caller and do not leave the key stuck."""
+    group = SingleFlight()
+
+    def failing():
+        raise RuntimeError("quota")
+
+    with pytest.raises(RuntimeError):
+        group.do("k", failing)
+
+    assert group.in_flight() == 0
+    assert group.do("k", lambda: "ok") == "ok"
+
+def test_make_key():
+    """Keys are stable and distinguish prompts."""
+    assert make_key("quiz", "text", None) == make_key("quiz", "text", None)
+    assert make_key("quiz", "text", None) != make_key("quiz", "text", "custom")
+    assert make_key("quiz", "text", None) != make_key("study_guide", "text", None)
+
+def test_stream_subscribers_share_one_run():
+    """Concurrent subscribers get every item, including those produced before they joined."""
+    group = SingleFlightStream()
+    runs = []
+    release = threading.Event()
+
+    def generate():
+        runs.append(1)
+        yield "a"
+        release.wait(timeout=5)
+        yield "b"
+
+    first = group.subscribe("k", generate)
+    assert next(first) == "a"
+    second = group.subscribe("k", generate)
+    assert group.in_flight() == 1
+    release.set()
+
+    assert list(first) == ["b"]
+    assert list(second) == ["a", "b"]
+    assert runs == [1]
+    assert group.in_flight() == 0
+
+def test_stream_runs_without_subscribers_and_shares_errors():
+    """The run finishes even if nobody iterates; its exception reaches every subscriber."""
+    group = SingleFlightStream()
+    finished = threading.Event()
+    release = threading.Event()
+
+    def generate():
+        yield "partial"
+        release.wait(timeout=5)
+        finished.set()
+        raise RuntimeError("quota")
+
+    first = group.subscribe("k", generate)
+    second = group.subscribe("k", generate)
+    release.set()
+    assert finished.wait(timeout=5)
+
+    for stream in (first, second):
+        with pytest.raises(RuntimeError):
+            list(stream)
+    assert group.in_flight() == 0
+
+def test_stream_without_key_is_not_coalesced():
+    group = SingleFlightStream()
+    counter = {"n": 0}
+
+    def generate():
+        counter["n"] += 1
+        yield counter["n"]
+
+    assert list(group.subscribe(None, generate)) == [1]
+    assert list(group.subscribe(None, generate)) == [2]
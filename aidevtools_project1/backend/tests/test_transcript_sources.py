@@ -0,0 +1,147 @@
+import time
+import pytest
+from unittest.mock import patch
+from backend.transcript_sources import (
+    TranscriptFetcher, TranscriptSource, TranscriptSourceError, DirectApiSource, MCPSource, build_fetcher
+)
+
+class FakeSource(TranscriptSource):
+    def __init__(self, name, delay=0.0, error=None, exact_labels=True):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.exact_labels = exact_labels
+        self.calls = 0
+
+    def fetch(self, video_id, include_transcript=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"video_id": video_id, "source": self.name, "transcripts": []}
+
+def test_sequential_falls_back_to_next_backend():
+    """Test a failing backend is skipped when hedging is disabled."""
+    broken = FakeSource("api", error=TranscriptSourceError("throttled"))
+    working = FakeSource("mcp")
+    fetcher = TranscriptFetcher([broken, working], hedge_delay=0)
+
+    result = fetcher.fetch("abc")
+
+    assert result["source"] == "mcp"
+    stats = fetcher.get_stats()["stats"]
+    assert stats["api"]["failures"] == 1
+    assert stats["mcp"]["wins"] == 1
+
+def test_hedged_request_returns_first_success():
+    """Test a slow primary is hedged and the faster backend wins."""
+    slow = FakeSource("api", delay=1.0)
+    fast = FakeSource("mcp", delay=0.01)
+    fetcher = TranscriptFetcher([slow, fast], hedge_delay=0.05)
+
+    start = time.monotonic()
+    result = fetcher.fetch("abc")
+
+    assert result["source"] == "mcp"
+    assert time.monotonic() - start < 0.5
+    assert slow.calls == 1 and fast.calls == 1
+
+def test_hedge_starts_next_backend_immediately_on_failure():
+    """Test a failed primary does not wait for the hedge delay."""
+    broken = FakeSource("api", error=RuntimeError("boom"))
+    working = FakeSource("mcp")
+    fetcher = TranscriptFetcher([broken, working], hedge_delay=5)
+
+    start = time.monotonic()
+    assert fetcher.fetch("abc")["source"] == "mcp"
+    assert time.monotonic() - start < 1
+
+def test_all_backends_fail_returns_error_result():
+    """Test the error-shaped response of a failed backend is passed through."""
+    partial = {"video_id": "abc", "error": "Video unavailable"}
+    fetcher = TranscriptFetcher([
+        FakeSource("api", error=TranscriptSourceError("Video unavailable", partial)),
+        FakeSource("mcp", error=RuntimeError("docker not running")),
+    ], hedge_delay=0)
+
+    assert fetcher.fetch("abc") == partial
+
+    fetcher = TranscriptFetcher([FakeSource("mcp", error=RuntimeError("docker not running"))])
+    assert "docker not running" in fetcher.fetch("abc")["error"]["message"]
+
+def test_faster_backend_is_preferred():
+    """Test the backend with the lower observed latency moves to the front."""
+    api = FakeSource("api")
+    mcp = FakeSource("mcp")
+    fetcher = TranscriptFetcher([api, mcp], hedge_delay=0)
+    assert [s.name for s in fetcher.ordered_sources()] == ["api", "mcp"]
+
+    fetcher.stats["api"].record(True, 2.0)
+    fetcher.stats["mcp"].record(True, 0.5)
+    assert [s.name for s in fetcher.ordered_sources()] == ["mcp", "api"]
+
+    # A backend that only ever failed goes last
+    fetcher.stats["mcp"] = type(fetcher.stats["mcp"])()
+    fetcher.stats["mcp"].record(False, 0.1, "boom")
+    assert [s.name for s in fetcher.ordered_sources()] == ["api", "mcp"]
+
+def test_storage_fetch_skips_assumed_labels():
+    """Test a stored fetch avoids backends that guess transcript labels unless nothing else is configured."""
+    api = FakeSource("api", delay=1.0)
+    mcp = FakeSource("mcp", exact_labels=False)
+    fetcher = TranscriptFetcher([api, mcp], hedge_delay=0.05)
+
+    assert fetcher.fetch("abc", for_storage=True)["source"] == "api"
+    assert mcp.calls == 0
+
+    fetcher = TranscriptFetcher([FakeSource("mcp", exact_labels=False)])
+    assert fetcher.fetch("abc", for_storage=True)["source"] == "mcp"
+
+def test_mcp_source_fetches_transcript_only_when_requested():
+    """Test listing through MCP does not download the transcript."""
+    source = MCPSource()
+    with patch.object(source, "_call", return_value="{}") as mock_call:
+        result = source.fetch("abc")
+    assert [c.args[0] for c in mock_call.call_args_list] == ["get_video_info"]
+    assert "transcript" not in result["transcripts"][0]
+
+    with patch.object(source, "_call", return_value="text") as mock_call:
+        result = source.fetch("abc", include_transcript=True)
+    assert [c.args[0] for c in mock_call.call_args_list] == ["get_video_info", "get_transcript"]
+    assert result["transcripts"][0]["transcript"] == "text"
+
+@patch('backend.transcript_sources.youtube_api.list_transcripts_json')
+def test_direct_api_source_detects_errors(mock_list):
+    """Test the direct API backend treats error-shaped results as failures."""
+    mock_list.return_value = {"video_id": "abc", "transcripts": [{"language_code": "en"}]}
+    assert DirectApiSource().fetch("abc")["video_id"] == "abc"
+
+    mock_list.return_value = {"video_id": "abc", "transcripts": [{"language_code": "error", "error_type": "RequestBlocked"}]}
+    with pytest.raises(TranscriptSourceError) as exc:
+        DirectApiSource().fetch("abc")
+    assert exc.value.result == mock_list.return_value
+
+@patch('backend.transcript_sources.youtube_api.list_transcripts_json')
+def test_video_without_transcripts_is_a_success(mock_list):
+    """Test disabled or missing captions are returned as an answer and do not trigger a fallback."""
+    mock_list.return_value = {"video_id": "abc", "transcripts": [{"language_code": "error", "error_type": "TranscriptsDisabled"}]}
+    mcp = FakeSource("mcp")
+    fetcher = TranscriptFetcher([DirectApiSource(), mcp], hedge_delay=0)
+
+    assert fetcher.fetch("abc") == mock_list.return_value
+    assert mcp.calls == 0
+    assert fetcher.get_stats()["stats"]["api"]["failures"] == 0
+
+def test_transcript_source_is_abstract():
+    """Test a source without fetch cannot be instantiated."""
+    with pytest.raises(TypeError):
+        TranscriptSource()
+
+def test_build_fetcher_from_config():
+    """Test backends are configured by name and unknown names are rejected."""
+    fetcher = build_fetcher("api, mcp", hedge_delay=1.5)
+    assert [s.name for s in fetcher.sources] == ["api", "mcp"]
+    assert fetcher.hedge_delay == 1.5
+
+    with pytest.raises(ValueError):
+        build_fetcher("ftp")
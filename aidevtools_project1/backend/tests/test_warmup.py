@@ -0,0 +1,49 @@
+import time
+import pytest
+from unittest.mock import patch
+from backend.warmup import Warmup
+
+def test_tasks_run_in_parallel():
+    """Two 0.2s tasks finish in about 0.2s, not 0.4s."""
+    warm = Warmup({
+        "database": (lambda: time.sleep(0.2), True),
+        "llm": (lambda: time.sleep(0.2), False),
+    })
+    warm.run()
+    assert warm.ready
+    assert warm.total < 0.35
+    assert set(warm.timings) == {"database", "llm"}
+
+def test_optional_failure_is_reported_but_ready(capsys):
+    def fail():
+        raise RuntimeError("no docker")
+
+    warm = Warmup({"database": (lambda: None, True), "transcripts": (fail, False)})
+    warm.run()
+
+    assert warm.ready
+    assert warm.status()["tasks"]["transcripts"]["error"] == "RuntimeError: no docker"
+    assert "FAILED: RuntimeError: no docker" in capsys.readouterr().out
+
+def test_required_failure_is_not_ready():
+    def fail():
+        raise ConnectionError("database unreachable")
+
+    warm = Warmup({"database": (fail, True)})
+    warm.run()
+    assert warm.done
+    assert not warm.ready
+
+def test_not_ready_until_finished():
+    warm = Warmup({"database": (lambda: time.sleep(0.2), True)}).start()
+    assert not warm.ready
+    assert warm.wait(5)
+    assert warm.ready
+
+@patch.dict("os.environ", {"WARMUP": "0"})
+def test_warmup_can_be_disabled():
+    calls = []
+    warm = Warmup({"database": (lambda: calls.append(1), True)}).start()
+    assert warm.wait(5)
+    assert warm.ready
+    assert calls == []
@@ -86,3 +86,64 @@ async def test_main_transcript_upload(mock_session_cls, mock_stdio):
             
             # Verify load_data.update_transcript_text was called
             sys.modules['load_data'].update_transcript_text.assert_called_once()
+
+def test_collect_video_urls(tmp_path):
+    """Test URLs from args, a file and stdin are normalised and de-duplicated."""
+    from io import StringIO
+    from backend.youtube_mcp import collect_video_urls
+
+    url_file = tmp_path / "videos.txt"
+    url_file.write_text("# comment\nhttps://youtu.be/AAAAAAAAAAA\n\nBBBBBBBBBBB\n")
+
+    urls = collect_video_urls(["AAAAAAAAAAA"], str(url_file))
+    assert urls == [
+        "https://www.youtube.com/watch?v=AAAAAAAAAAA",
+        "https://www.youtube.com/watch?v=BBBBBBBBBBB",
+    ]
+
+    urls = collect_video_urls([], "-", stdin=StringIO("CCCCCCCCCCC\n"))
+    assert urls == ["https://www.youtube.com/watch?v=CCCCCCCCCCC"]
+
+@pytest.mark.asyncio
+@patch('backend.youtube_mcp.stdio_client')
+@patch('backend.youtube_mcp.ClientSession')
+async def test_main_multiple_videos_batch_upload(mock_session_cls, mock_stdio):
+    """Test several videos share a pool of sessions and are uploaded in batches."""
+    mock_stdio.return_value.__aenter__.return_value = (None, None)
+    mock_session = AsyncMock()
+    mock_session_cls.return_value.__aenter__.return_value = mock_session
+
+    mock_result = MagicMock()
+    mock_result.content = [MagicMock(text="Transcript Content")]
+    mock_session.call_tool.return_value = mock_result
+
+    mock_database = MagicMock()
+    mock_load_data = MagicMock()
+    with patch.dict(sys.modules, {'load_data': mock_load_data, 'database': mock_database}):
+        args = ['youtube_mcp.py', 'AAAAAAAAAAA', 'BBBBBBBBBBB', 'CCCCCCCCCCC',
+                '--upload', '--pool', '2', '--batch-size', '2']
+        with patch.object(sys, 'argv', args), patch('builtins.print'):
+            await main()
+
+    # Two sessions started for three videos
+    assert mock_session.initialize.await_count == 2
+    assert mock_session.call_tool.await_count == 3
+
+    # Three transcripts in two transactions, tables initialised once
+    mock_database.init_db.assert_called_once()
+    assert mock_load_data.update_transcript_text.call_count == 3
+    for call in mock_load_data.update_transcript_text.call_args_list:
+        assert call.kwargs["commit"] is False
+    assert mock_database.get_session.return_value.commit.call_count == 2
+
+@pytest.mark.asyncio
+@patch('backend.youtube_mcp.stdio_client')
+async def test_session_pool_start_failure(mock_stdio):
+    """Test the pool reports an error when no MCP server can be started."""
+    from backend.youtube_mcp import MCPSessionPool
+
+    mock_stdio.return_value.__aenter__.side_effect = OSError("docker not found")
+
+    pool = MCPSessionPool(server_params=None, size=2)
+    with pytest.raises(RuntimeError, match="docker not found"):
+        await pool.start()
@@ -0,0 +1,347 @@
+"""
+One interface for fetching video metadata and transcripts from either backend:
+
+- "api": yt-dlp + youtube_transcript_api (youtube_api.list_transcripts_json)
+- "mcp": the mcp/youtube-transcript docker server (see youtube_mcp.py)
+
+Both return the list_transcripts_json shape. TranscriptFetcher tries the
+backends in order of observed speed and reliability. With hedging enabled,
+it starts the next backend if the first has not answered within
+hedge_delay seconds, and returns whichever succeeds first. Requests whose
+result is stored only use backends that report real transcript labels.
+
+Configured with TRANSCRIPT_BACKENDS (e.g. "api" or "api,mcp") and
+TRANSCRIPT_HEDGE_DELAY (seconds, 0 disables hedging).
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional
+
+import youtube_api
+
+DEFAULT_BACKENDS = "api"
+DEFAULT_HEDGE_DELAY = 3.0
+# youtube_transcript_api errors that describe the video (no captions), not a failing backend
+NO_TRANSCRIPT_ERRORS = {
+    "TranscriptsDisabled", "NoTranscriptFound", "VideoUnavailable", "VideoUnplayable",
+    "AgeRestricted", "InvalidVideoId",
+}
+# Weight of the newest sample in the moving average latency
+EWMA_ALPHA = 0.3
+
+
+class TranscriptSourceError(Exception):
+    """A backend failed. result holds its partial (error-shaped) response, if any."""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+class TranscriptSource(ABC):
+    name = "base"
+    # False when language/is_generated are assumed rather than reported by the backend
+    exact_labels = True
+
+    @abstractmethod
+    def fetch(self, video_id: str, include_transcript: bool = False) -> dict:
+        ...
+
+    def warm_up(self):
+        """Prepare clients/connections so the first fetch does not pay for it (server start-up)."""
+
+
+class DirectApiSource(TranscriptSource):
+    """yt-dlp metadata plus youtube_transcript_api transcripts."""
+
+    name = "api"
+
+    def fetch(self, video_id, include_transcript=False):
+        result = youtube_api.list_transcripts_json(video_id, include_transcript=include_transcript)
+        if "error" in result:
+            raise TranscriptSourceError(str(result["error"]), result)
+        # A video without captions is an answer, not a failure; blocked or failed requests are
+        for t in result.get("transcripts", []):
+            if t.get("language_code") == "error" and t.get("error_type") not in NO_TRANSCRIPT_ERRORS:
+                raise TranscriptSourceError("transcript listing failed", result)
+        return result
+
+    def warm_up(self):
+        youtube_api.warm_up()
+
+
+class MCPSource(TranscriptSource):
+    """
+    The MCP transcript server. A session pool is kept running on a background
+    event loop, so the container starts once rather than on every fetch.
+    The server only exposes one transcript and does not say which, so it is
+    labelled as a manual 'en' transcript; the fetcher keeps these results out
+    of the database when another backend is configured.
+    """
+
+    name = "mcp"
+    exact_labels = False
+
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pool = None
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                import youtube_mcp
+
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="mcp-transcripts", daemon=True).start()
+                pool = youtube_mcp.MCPSessionPool(
+                    youtube_mcp.get_server_params(),
+                    size=self.pool_size or youtube_mcp.DEFAULT_POOL_SIZE,
+                )
+                try:
+                    asyncio.run_coroutine_threadsafe(pool.start(), loop).result()
+                except Exception:
+                    loop.call_soon_threadsafe(loop.stop)
+                    raise
+                self._loop, self._pool = loop, pool
+            return self._loop, self._pool
+
+    def warm_up(self):
+        # Starts the server containers now instead of on the first fetch
+        self._get_pool()
+
+    def _call(self, tool, video_url):
+        loop, pool = self._get_pool()
+        result = asyncio.run_coroutine_threadsafe(pool.call_tool(tool, arguments={"url": video_url}), loop).result()
+        if getattr(result, "isError", False):
+            raise TranscriptSourceError(result.content[0].text if result.content else f"{tool} failed")
+        return result.content[0].text
+
+    @staticmethod
+    def _parse_info(text):
+        try:
+            info = json.loads(text)
+        except ValueError:
+            info = None
+        if not isinstance(info, dict):
+            return {"title": None, "description": text[:500], "author": None, "view_count": None, "duration": None}
+        return {
+            "title": info.get("title"),
+            "description": (info.get("description") or "")[:500] or None,
+            "author": info.get("author") or info.get("channel") or info.get("uploader"),
+            "view_count": str(info["view_count"]) if info.get("view_count") else None,
+            "duration": info.get("duration"),
+        }
+
+    def fetch(self, video_id, include_transcript=False):
+        video_url = f"https://www.youtube.com/watch?v={video_id}"
+        metadata = self._parse_info(self._call("get_video_info", video_url))
+
+        transcript = {
+            "language": "English",
+            "language_code": "en",
+            "is_generated": False,
+            "is_translatable": False,
+        }
+        if include_transcript:
+            transcript["transcript"] = self._call("get_transcript", video_url)
+        return {"video_id": video_id, "url": video_url, "metadata": metadata, "transcripts": [transcript]}
+
+
+SOURCES = {
+    "api": DirectApiSource,
+    "mcp": MCPSource,
+}
+
+
+class BackendStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.wins = 0
+        self.ewma_seconds = None
+        self.last_error = None
+
+    def record(self, ok: bool, seconds: float, error: Optional[str] = None):
+        with self.lock:
+            self.requests += 1
+            if ok:
+                self.successes += 1
+                # Only successful calls count towards latency; failures are tracked by the error rate
+                self.ewma_seconds = seconds if self.ewma_seconds is None else (
+                    EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self.ewma_seconds)
+            else:
+                self.failures += 1
+                self.last_error = error
+
+    def expected_seconds(self):
+        """Latency divided by success rate: roughly the time to a successful answer."""
+        if not self.requests:
+            return None
+        if self.ewma_seconds is None:
+            # Only failures so far: try it last
+            return float("inf")
+        success_rate = max(self.successes / self.requests, 0.05)
+        return self.ewma_seconds / success_rate
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "wins": self.wins,
+            "avg_seconds": round(self.ewma_seconds, 3) if self.ewma_seconds is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class TranscriptFetcher:
+    def __init__(self, sources, hedge_delay: float = DEFAULT_HEDGE_DELAY):
+        if not sources:
+            raise ValueError("TranscriptFetcher needs at least one source")
+        self.sources = list(sources)
+        self.hedge_delay = hedge_delay
+        self.stats = {source.name: BackendStats() for source in self.sources}
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def warm_up(self):
+        for source in self.sources:
+            source.warm_up()
+
+    def ordered_sources(self):
+        """Fastest/most reliable backend first; backends without data keep their configured order."""
+        def key(item):
+            position, source = item
+            expected = self.stats[source.name].expected_seconds()
+            return (1, position) if expected is None else (0, expected)
+        return [source for _, source in sorted(enumerate(self.sources), key=key)]
+
+    def _timed_fetch(self, source, video_id, include_transcript):
+        start = time.monotonic()
+        try:
+            result = source.fetch(video_id, include_transcript=include_transcript)
+        except Exception as e:
+            self.stats[source.name].record(False, time.monotonic() - start, str(e))
+            raise
+        self.stats[source.name].record(True, time.monotonic() - start)
+        return result
+
+    def _win(self, source, result):
+        with self.stats[source.name].lock:
+            self.stats[source.name].wins += 1
+        return result
+
+    @staticmethod
+    def _fallback(errors):
+        # Every backend failed: return an error-shaped response when one exists, as list_transcripts_json does
+        for error in reversed(errors):
+            if isinstance(error, TranscriptSourceError) and error.result is not None:
+                return error.result
+        message = "; ".join(f"{getattr(error, 'source_name', '?')}: {error}" for error in errors)
+        return {"error": {"type": "TranscriptSourceError", "message": message}}
+
+    def fetch(self, video_id: str, include_transcript: bool = False, for_storage: bool = False) -> dict:
+        sources = self.ordered_sources()
+        if for_storage:
+            # Assumed labels would be written to the database; use them only if nothing else is configured
+            sources = [source for source in sources if source.exact_labels] or sources
+        if len(sources) == 1 or not self.hedge_delay or self.hedge_delay <= 0:
+            return self._fetch_sequential(sources, video_id, include_transcript)
+        return self._fetch_hedged(sources, video_id, include_transcript)
+
+    def _fetch_sequential(self, sources, video_id, include_transcript):
+        errors = []
+        for source in sources:
+            try:
+                return self._win(source, self._timed_fetch(source, video_id, include_transcript))
+            except Exception as e:
+                e.source_name = source.name
+                errors.append(e)
+        return self._fallback(errors)
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="transcript-source")
+            return self._executor
+
+    def _fetch_hedged(self, sources, video_id, include_transcript):
+        """
+        Start the preferred backend; start the next one after hedge_delay seconds
+        or as soon as a running one fails. The first success wins. Slower calls
+        are left to finish in the background so their timings are still recorded.
+        """
+        executor = self._get_executor()
+        remaining = list(sources)
+        running = {}
+        errors = []
+
+        def launch():
+            source = remaining.pop(0)
+            running[executor.submit(self._timed_fetch, source, video_id, include_transcript)] = source
+
+        launch()
+        while running:
+            timeout = self.hedge_delay if remaining else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for future in done:
+                source = running.pop(future)
+                try:
+                    return self._win(source, future.result())
+                except Exception as e:
+                    e.source_name = source.name
+                    errors.append(e)
+            if remaining:
+                launch()
+        return self._fallback(errors)
+
+    def get_stats(self):
+        return {
+            "backends": [source.name for source in self.sources],
+            "preferred_order": [source.name for source in self.ordered_sources()],
+            "hedge_delay": self.hedge_delay,
+            "stats": {name: stats.as_dict() for name, stats in self.stats.items()},
+        }
+
+
+def build_fetcher(backends: Optional[str] = None, hedge_delay: Optional[float] = None) -> TranscriptFetcher:
+    names = [name.strip() for name in (backends or os.environ.get("TRANSCRIPT_BACKENDS", DEFAULT_BACKENDS)).split(",") if name.strip()]
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown transcript backend(s): {', '.join(unknown)}. Use: {', '.join(SOURCES)}")
+    if hedge_delay is None:
+        hedge_delay = float(os.environ.get("TRANSCRIPT_HEDGE_DELAY", DEFAULT_HEDGE_DELAY))
+    return TranscriptFetcher([SOURCES[name]() for name in names], hedge_delay=hedge_delay)
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> TranscriptFetcher:
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = build_fetcher()
+        return _fetcher
+
+
+def fetch_transcripts(video_id: str, include_transcript: bool = False, for_storage: bool = False) -> dict:
+    """list_transcripts_json through the configured backends."""
+    return get_fetcher().fetch(video_id, include_transcript=include_transcript, for_storage=for_storage)
+
+
+def get_stats() -> dict:
+    return get_fetcher().get_stats()
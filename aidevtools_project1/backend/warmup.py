@@ -0,0 +1,123 @@
+"""
+Start-up warm-up for the API server.
+
+The lifespan hook starts a Warmup in the background. It runs the tasks below in
+parallel threads so that the first requests after a scale-up do not pay for them:
+
+- database:   open WARMUP_DB_CONNECTIONS pooled connections (default 4)
+- llm:        build the provider clients of every task (the Gemini client needs GOOGLE_API_KEY)
+- transcripts: import the YouTube client libraries, load yt-dlp's extractor, find node
+               (and start the MCP session pool when that backend is configured)
+
+GET /ready answers 503 until the warm-up has finished and every required task
+succeeded, so it can serve as the Cloud Run startup probe. Failures of optional
+tasks are reported but do not block readiness. WARMUP=0 skips the tasks.
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+import metrics
+
+
+def warm_database():
+    from database import get_engine
+    engine = get_engine()
+    connections = []
+    try:
+        for _ in range(int(os.environ.get("WARMUP_DB_CONNECTIONS", "4"))):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        # Back to the pool, where they stay open for the first requests
+        for connection in connections:
+            connection.close()
+
+
+def warm_llm():
+    import llm_providers
+    for task in llm_providers.TASKS:
+        llm_providers.get_provider(task).warm_up()
+
+
+def warm_transcripts():
+    import transcript_sources
+    transcript_sources.get_fetcher().warm_up()
+
+
+# name -> (function, required for readiness)
+DEFAULT_TASKS = {
+    "database": (warm_database, True),
+    "llm": (warm_llm, False),
+    "transcripts": (warm_transcripts, False),
+}
+
+
+class Warmup:
+    def __init__(self, tasks=None):
+        self.tasks = dict(DEFAULT_TASKS if tasks is None else tasks)
+        self.timings = {}
+        self.errors = {}
+        self.total = None
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def ready(self) -> bool:
+        return self.done and not any(self.tasks[name][1] for name in self.errors)
+
+    def _run_task(self, name):
+        function, _ = self.tasks[name]
+        start = time.perf_counter()
+        try:
+            with metrics.span("warmup", name):
+                function()
+        except Exception as e:
+            self.errors[name] = f"{type(e).__name__}: {e}"
+        self.timings[name] = round(time.perf_counter() - start, 3)
+
+    def run(self):
+        """Run every task in parallel and wait for them; prints a timing report."""
+        start = time.perf_counter()
+        try:
+            if self.tasks:
+                with ThreadPoolExecutor(max_workers=len(self.tasks), thread_name_prefix="warmup") as executor:
+                    list(executor.map(self._run_task, self.tasks))
+        finally:
+            self.total = round(time.perf_counter() - start, 3)
+            self._done.set()
+        self.report()
+
+    def start(self):
+        """Run in a background thread, so the server accepts connections (and /health) meanwhile."""
+        if os.environ.get("WARMUP", "1") == "0":
+            self.tasks = {}
+        self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+    def report(self):
+        print(f"Warm-up finished in {self.total:.2f}s ({'ready' if self.ready else 'NOT ready'})")
+        for name in self.tasks:
+            status = f"FAILED: {self.errors[name]}" if name in self.errors else "ok"
+            print(f"  {name:<12} {self.timings.get(name, 0):>7.3f}s  {status}")
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup_seconds": self.total,
+            "tasks": {name: {"seconds": self.timings.get(name), "required": required,
+                             "error": self.errors.get(name)}
+                      for name, (_, required) in self.tasks.items()},
+        }
@@ -12,8 +12,10 @@ import re
 import json
 import argparse
 import warnings
-import requests
 import shutil
+import functools
+import metrics
+from lazy_imports import LazyModule, LazyObject
 
 class YtDlpLogger:
     def debug(self, msg):
@@ -29,16 +31,13 @@ class YtDlpLogger:
 # Suppress Python version warnings from google.api_core
 warnings.filterwarnings("ignore", category=FutureWarning, module="google.api_core._python_version_support")
 
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.proxies import GenericProxyConfig, WebshareProxyConfig
-from youtube_transcript_api._errors import (
-    TranscriptsDisabled,
-    VideoUnavailable,
-    InvalidVideoId,
-    NoTranscriptFound,
-)
-from googleapiclient.discovery import build
-from urllib.parse import urlparse
+# The client libraries take ~250 ms to import; load them on first use so the
+# API process (which imports this module) starts without them
+requests = LazyModule("requests")
+YouTubeTranscriptApi = LazyObject("youtube_transcript_api", "YouTubeTranscriptApi")
+GenericProxyConfig = LazyObject("youtube_transcript_api.proxies", "GenericProxyConfig")
+WebshareProxyConfig = LazyObject("youtube_transcript_api.proxies", "WebshareProxyConfig")
+build = LazyObject("googleapiclient.discovery", "build")
 
 def extract_video_id(input_string: str) -> str:
     """Extract video_id from a YouTube URL or return the input."""
@@ -53,13 +52,25 @@ def extract_video_id(input_string: str) -> str:
             return match.group(1)
     return input_string
 
+@functools.lru_cache(maxsize=None)
+def node_path():
+    """Absolute path of the node binary yt-dlp uses for YouTube's JS challenges (looked up once)."""
+    return shutil.which('node')
+
+def warm_up():
+    """Import the client libraries and load yt-dlp's YouTube extractor ahead of the first request."""
+    import requests, googleapiclient.discovery, youtube_transcript_api.proxies, yt_dlp
+    node_path()
+    with yt_dlp.YoutubeDL({'quiet': True, 'skip_download': True, 'logger': YtDlpLogger()}) as ydl:
+        ydl.get_info_extractor('Youtube')
+
 def get_video_metadata(video_id: str) -> dict:
     """Fetch basic video metadata using yt-dlp for reliable extraction."""
     try:
         import yt_dlp
         
         # Get absolute path to node to assume compatibility
-        node_path = shutil.which('node')
+        node = node_path()
 
         ydl_opts = {
             'quiet': False, # Allow logger to handle output
@@ -67,7 +78,7 @@ def get_video_metadata(video_id: str) -> dict:
             'force_generic_extractor': False,
             'logger': YtDlpLogger(),
             'js_runtimes': {
-                'node': {'args': [node_path] if node_path else []},
+                'node': {'args': [node] if node else []},
             },
         }
 
@@ -146,10 +157,15 @@ def get_transcript_text(transcript_obj):
 
 def list_transcripts_json(video_id: str, include_transcript: bool = False):
     """Retrieve all transcripts and return as a JSON-compatible dictionary."""
+    with metrics.span("youtube_metadata") as span:
+        metadata = get_video_metadata(video_id)
+        if "error" in metadata:
+            span.fail()
+
     result = {
         "video_id": video_id,
         "url": f"https://www.youtube.com/watch?v={video_id}",
-        "metadata": get_video_metadata(video_id),
+        "metadata": metadata,
         "transcripts": []
     }
 
@@ -187,7 +203,8 @@ def list_transcripts_json(video_id: str, include_transcript: bool = False):
             api = YouTubeTranscriptApi()
 
         try:
-            transcript_list = api.list(video_id)
+            with metrics.span("transcript_list"):
+                transcript_list = api.list(video_id)
 
             for transcript in transcript_list:
                 t_info = {
@@ -198,7 +215,10 @@ def list_transcripts_json(video_id: str, include_transcript: bool = False):
                 }
                 
                 if include_transcript:
-                    t_info["transcript"] = get_transcript_text(transcript)
+                    with metrics.span("transcript_fetch", transcript.language_code) as span:
+                        t_info["transcript"] = get_transcript_text(transcript)
+                        if t_info["transcript"].startswith("ERROR fetching transcript"):
+                            span.fail()
                     
                 result["transcripts"].append(t_info)
         except Exception as e:
@@ -208,7 +228,8 @@ def list_transcripts_json(video_id: str, include_transcript: bool = False):
                 "language_code": "error",
                 "is_generated": False,
                 "is_translatable": False,
-                "transcript": f"Error retrieving transcripts: {str(e)}"
+                "transcript": f"Error retrieving transcripts: {str(e)}",
+                "error_type": type(e).__name__,
             })
 
     except Exception as e:
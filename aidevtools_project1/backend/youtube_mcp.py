@@ -1,12 +1,18 @@
 import asyncio
+import os
 import sys
 import logging
 import re
+import argparse
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
 # Default Configuration
 DEFAULT_VIDEO_URL = "https://www.youtube.com/watch?v=EMd3H0pNvSE"
+# Number of MCP server containers kept running at once
+DEFAULT_POOL_SIZE = int(os.environ.get("YOUTUBE_MCP_POOL_SIZE", "3"))
+# Transcripts written to the database per transaction
+DEFAULT_BATCH_SIZE = int(os.environ.get("YOUTUBE_MCP_BATCH_SIZE", "20"))
 
 def extract_video_id(input_string: str) -> str:
     """Extract video_id from a YouTube URL or return the input."""
@@ -22,118 +28,277 @@ def extract_video_id(input_string: str) -> str:
     return input_string
 
 def print_usage():
-    print("Usage: uv run youtube_mcp.py [VIDEO_URL] [OPTIONS]")
+    print("Usage: uv run youtube_mcp.py [VIDEO_URL ...] [OPTIONS]")
     print("\nOptions:")
     print("  --info         Fetch and display video information")
     print("  --transcript   Fetch and display the video transcript")
     print("  --upload       Upload fetched transcript text to Database")
+    print("  --file PATH    Read video URLs/IDs from a file (one per line, '-' for stdin)")
+    print(f"  --pool N       Number of MCP server sessions to run in parallel (default {DEFAULT_POOL_SIZE})")
+    print(f"  --batch-size N Transcripts uploaded per database transaction (default {DEFAULT_BATCH_SIZE})")
     print("  --verbose      Show internal logs and progress messages")
     print("\nExample:")
     print(f"  uv run youtube_mcp.py {DEFAULT_VIDEO_URL} --info --transcript --upload")
+    print("  cat video_ids.txt | uv run youtube_mcp.py --file - --upload --pool 4")
+
+def get_server_params(verbose=False):
+    return StdioServerParameters(
+        command="bash",
+        args=["-c", f"docker run -i --rm mcp/youtube-transcript {'' if verbose else '2>/dev/null'}"],
+        env=None
+    )
+
+def collect_video_urls(inputs, file_path=None, stdin=None):
+    """
+    Normalise video URLs/IDs from the command line and an optional file
+    ('-' reads stdin) into watch URLs. Blank lines, '#' comments and duplicates are dropped.
+    """
+    raw = [value for value in inputs if value != "-"]
+    if file_path == "-" or "-" in inputs:
+        raw += (stdin or sys.stdin).read().splitlines()
+    elif file_path:
+        with open(file_path, "r", encoding="utf-8") as f:
+            raw += f.read().splitlines()
+
+    urls = []
+    for value in raw:
+        value = value.strip()
+        if not value or value.startswith("#"):
+            continue
+        urls.append(f"https://www.youtube.com/watch?v={extract_video_id(value)}")
+    return list(dict.fromkeys(urls))
+
+
+class MCPSessionPool:
+    """
+    A fixed set of initialised MCP server sessions shared by many tool calls.
+
+    Each session is owned by a worker task (the stdio transport must be opened
+    and closed in the same task) that takes calls off a shared queue. Servers
+    start in parallel and stay up for the whole run, so container start-up is
+    paid once per session rather than once per video.
+    """
+
+    def __init__(self, server_params, size=DEFAULT_POOL_SIZE):
+        self.server_params = server_params
+        self.size = max(1, size)
+        self.errors = []
+        self.stats = {"calls": 0, "failures": 0}
+        self._queue = asyncio.Queue()
+        self._workers = []
+        self._live = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        ready = [loop.create_future() for _ in range(self.size)]
+        self._workers = [asyncio.create_task(self._worker(future)) for future in ready]
+        await asyncio.gather(*ready)
+        if not self._live:
+            await self.close()
+            raise RuntimeError(f"Could not start an MCP session: {self.errors[0] if self.errors else 'unknown error'}")
+        logging.info(f"MCP session pool ready with {self._live}/{self.size} sessions")
+
+    async def _worker(self, ready):
+        started = False
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    started = True
+                    self._live += 1
+                    ready.set_result(True)
+                    while True:
+                        job = await self._queue.get()
+                        if job is None:
+                            return
+                        name, arguments, future = job
+                        if future.done():
+                            continue
+                        try:
+                            result = await session.call_tool(name, arguments=arguments)
+                        except Exception as e:
+                            self.stats["failures"] += 1
+                            if not future.done():
+                                future.set_exception(e)
+                        else:
+                            if not future.done():
+                                future.set_result(result)
+        except Exception as e:
+            self.errors.append(e)
+            logging.error(f"MCP session failed: {e}")
+        finally:
+            if not ready.done():
+                ready.set_result(False)
+            if started:
+                self._live -= 1
+                if not self._live:
+                    self._fail_pending(RuntimeError("All MCP sessions have stopped"))
+
+    def _fail_pending(self, error):
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            if job is not None and not job[2].done():
+                job[2].set_exception(error)
+
+    async def call_tool(self, name, arguments):
+        """Run a tool on the next free session."""
+        if not self._live:
+            raise RuntimeError("No MCP sessions are running")
+        future = asyncio.get_running_loop().create_future()
+        self.stats["calls"] += 1
+        await self._queue.put((name, arguments, future))
+        return await future
+
+    async def close(self):
+        for _ in self._workers:
+            await self._queue.put(None)
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+class BatchUploader:
+    """Collects fetched transcripts and writes them to the database batch_size at a time."""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+        self.pending = []
+        self.uploaded = 0
+        self._initialized = False
+        self._lock = asyncio.Lock()
+
+    async def add(self, video_id, transcript_text):
+        self.pending.append((video_id, transcript_text))
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            items, self.pending = self.pending, []
+            if items:
+                # Database calls are blocking; keep them off the event loop
+                await asyncio.to_thread(self._write, items)
+
+    def _write(self, items):
+        try:
+            import load_data
+            from database import get_session, init_db
+
+            if not self._initialized:
+                # Initialize tables to ensure they exist
+                init_db()
+                self._initialized = True
+
+            session_db = get_session()
+            try:
+                for video_id, transcript_text in items:
+                    # We update the 'en' transcript by default.
+                    load_data.update_transcript_text(session_db, video_id, 'en', False, transcript_text, commit=False)
+                session_db.commit()
+            except Exception:
+                session_db.rollback()
+                raise
+            finally:
+                session_db.close()
+
+            self.uploaded += len(items)
+            ids = ", ".join(video_id for video_id, _ in items)
+            print(f"✓ Transcript text uploaded to Database for {ids}", file=sys.stderr)
+        except ImportError as ie:
+            print(f"Error: load_data.py not found. {ie}", file=sys.stderr)
+        except Exception as db_e:
+            print(f"Error uploading to DB: {db_e}", file=sys.stderr)
+
+
+async def process_video(pool, video_url, show_info, show_transcript, uploader, verbose, show_header):
+    """Fetch info and/or transcript for one video. Output is printed in one block per video."""
+    lines = []
+    video_id = extract_video_id(video_url)
+    if show_header:
+        lines.append(f"\n=== {video_id} ===")
+
+    # 1. Get Video Info
+    if show_info:
+        if verbose:
+            lines.append(f"\n--- Video Info ---")
+        try:
+            info_result = await pool.call_tool("get_video_info", arguments={"url": video_url})
+            lines.append(info_result.content[0].text)
+        except Exception as e:
+            lines.append(f"Error fetching info: {e}")
+
+    # 2. Get Transcript
+    if show_transcript or uploader is not None:
+        if verbose:
+            lines.append(f"\n--- Transcript ---")
+        try:
+            transcript_result = await pool.call_tool("get_transcript", arguments={"url": video_url})
+            transcript_text = transcript_result.content[0].text
+
+            if show_transcript:
+                if verbose:
+                    lines.append(f"Preview:\n{transcript_text[:300]}...")
+                else:
+                    lines.append(transcript_text)
+
+            if uploader is not None:
+                await uploader.add(video_id, transcript_text)
+        except Exception as e:
+            lines.append(f"Error fetching transcript: {e}")
+
+    for line in lines:
+        print(line)
 
 async def main():
-    args = sys.argv[1:]
-    
-    video_url = None
-    show_info = False
-    show_transcript = False
-    upload = False
-    verbose = False
-
-    # Extract URL if present
-    positional_args = [a for a in args if not a.startswith("--")]
-    if positional_args:
-        raw_input = positional_args[0]
-        # Normalize input: extract ID and reconstruct URL
-        video_id = extract_video_id(raw_input)
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
-    else:
-        if any(arg in args for arg in ["--info", "--transcript", "--verbose", "--upload"]):
-            video_url = DEFAULT_VIDEO_URL
-
-    if "--info" in args:
-        show_info = True
-    if "--transcript" in args:
-        show_transcript = True
-    if "--upload" in args:
-        upload = True
-    if "--verbose" in args:
-        verbose = True
-
-    if not (show_info or show_transcript or upload):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("videos", nargs="*")
+    parser.add_argument("--info", action="store_true")
+    parser.add_argument("--transcript", action="store_true")
+    parser.add_argument("--upload", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--file")
+    parser.add_argument("--pool", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--help", "-h", action="store_true")
+    args, _ = parser.parse_known_args(sys.argv[1:])
+
+    if args.help or not (args.info or args.transcript or args.upload):
         print_usage()
         return
 
+    video_urls = collect_video_urls(args.videos, args.file)
+    if not video_urls:
+        video_urls = [DEFAULT_VIDEO_URL]
+
     # Configure logging
-    if verbose:
+    if args.verbose:
         logging.basicConfig(level=logging.INFO)
     else:
         logging.basicConfig(level=logging.ERROR)
         logging.getLogger("mcp").setLevel(logging.ERROR)
-    
-    server_params = StdioServerParameters(
-        command="bash",
-        args=["-c", f"docker run -i --rm mcp/youtube-transcript {'' if verbose else '2>/dev/null'}"],
-        env=None
-    )
-    
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-            
-            # 1. Get Video Info
-            if show_info:
-                if verbose:
-                    print(f"\n--- Video Info ---")
-                try:
-                    info_result = await session.call_tool(
-                        "get_video_info",
-                        arguments={"url": video_url}
-                    )
-                    print(info_result.content[0].text) 
-                except Exception as e:
-                    print(f"Error fetching info: {e}")
-
-            # 2. Get Transcript
-            if show_transcript or upload:
-                if verbose:
-                    print(f"\n--- Transcript ---")
-                try:
-                    transcript_result = await session.call_tool(
-                        "get_transcript",
-                        arguments={"url": video_url}
-                    )
-                    transcript_text = transcript_result.content[0].text
-                    
-                    if show_transcript:
-                        if verbose:
-                            print(f"Preview:\n{transcript_text[:300]}...")
-                        else:
-                            print(transcript_text)
-                    
-                    if upload:
-                        try:
-                            import load_data
-                            from database import get_session, init_db
-                            
-                            video_id = extract_video_id(video_url)
-                            
-                            # Initialize tables to ensure they exist
-                            init_db()
-                            session_db = get_session()
-                            
-                            # We update the 'en' transcript by default. 
-                            load_data.update_transcript_text(session_db, video_id, 'en', False, transcript_text)
-                            
-                            session_db.close()
-                            print(f"✓ Transcript text uploaded to Database for {video_id}", file=sys.stderr)
-                        except ImportError as ie:
-                            print(f"Error: load_data.py not found. {ie}", file=sys.stderr)
-                        except Exception as db_e:
-                            print(f"Error uploading to DB: {db_e}", file=sys.stderr)
-
-                except Exception as e:
-                    print(f"Error fetching transcript: {e}")
+
+    uploader = BatchUploader(args.batch_size) if args.upload else None
+    pool_size = min(args.pool, len(video_urls))
+
+    try:
+        async with MCPSessionPool(get_server_params(args.verbose), size=pool_size) as pool:
+            await asyncio.gather(*(
+                process_video(pool, url, args.info, args.transcript, uploader, args.verbose, len(video_urls) > 1)
+                for url in video_urls
+            ))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+
+    if uploader is not None:
+        await uploader.flush()
+        if len(video_urls) > 1:
+            print(f"Uploaded {uploader.uploaded}/{len(video_urls)} transcripts", file=sys.stderr)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -44,8 +44,17 @@ class ApiClient:
     async def store_video(self, video_id):
         return await self._post(f"/api/v1/video/{video_id}/store")
 
-    async def list_videos(self):
-        return await self._get("/api/v1/db/videos")
+    async def list_videos(self, sort=None, order="desc", min_views=None, max_views=None,
+                          min_duration=None, max_duration=None, limit=None, offset=0):
+        # Sorting and filtering happen server-side; only send what is set
+        params = {
+            "sort": sort, "order": order if sort else None,
+            "min_views": min_views, "max_views": max_views,
+            "min_duration": min_duration, "max_duration": max_duration,
+            "limit": limit, "offset": offset or None,
+        }
+        params = {k: v for k, v in params.items() if v is not None}
+        return await self._get("/api/v1/db/videos", params=params or None)
 
     async def get_video_details(self, video_id):
         return await self._get(f"/api/v1/db/video/{video_id}")
@@ -64,15 +73,27 @@ class ApiClient:
 
     async def chat_with_guide_stream(self, video_id, lang_code, message, history):
         payload = {"message": message, "history": history}
-        endpoint = f"/api/v1/transcript/{video_id}/{lang_code}/chat/stream"
-        
+        async for chunk in self._post_stream(f"/api/v1/transcript/{video_id}/{lang_code}/chat/stream", json_data=payload):
+            yield chunk
+
+    async def _post_stream(self, endpoint, json_data=None):
+        # Failures come back as a final "Error: ..." chunk
         async with httpx.AsyncClient(timeout=60.0) as client:
             try:
-                # Use stream method
-                async with client.stream("POST", f"{self.base_url}{endpoint}", json=payload) as response:
+                async with client.stream("POST", f"{self.base_url}{endpoint}", json=json_data) as response:
+                    if response.status_code != 200:
+                        await response.aread()
+                        try:
+                            detail = response.json().get("detail", response.text)
+                        except ValueError:
+                            detail = response.text
+                        detail = str(detail)
+                        yield detail if detail.startswith("Error") else f"Error: {detail}"
+                        return
                     async for chunk in response.aiter_text():
                         yield chunk
             except Exception as e:
+                # Includes the server aborting the body mid-stream
                 print(f"Error STREAM POST {endpoint}: {e}")
                 yield f"Error: {str(e)}"
     
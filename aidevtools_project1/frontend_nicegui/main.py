@@ -80,7 +80,9 @@ Each object must have the following structure:
 Return ONLY the JSON array. Do not include any markdown formatting (like ```json ... ```), no preamble, and no postscript.
 
 Transcript:
-{transcript}"""
+{transcript}""",
+        "db_sort": "fetched_at",
+        "db_order": "desc",
     }
 
     # DB Tab
@@ -332,7 +334,7 @@ Transcript:
         nonlocal db_table
         ui.notify("Refreshing list...", type="info")
         print("DEBUG: Refreshing database list...")
-        resp = await client.list_videos()
+        resp = await client.list_videos(sort=state["db_sort"], order=state["db_order"])
         if resp and resp.status_code == 200:
             videos = resp.json()
             if not videos:
@@ -343,17 +345,13 @@ Transcript:
                 print(f"DEBUG: Loaded {len(videos)} videos from API.")
                 print(f"DEBUG: First video: {videos[0]}")
             
-            # videos is list of dicts: video_id, title, fetched_at, etc.
-            # Convert duration to seconds for display
+            # videos is list of dicts: video_id, title, fetched_at, etc., already sorted by the API.
+            # duration_seconds / views are parsed server-side; fall back to the raw strings.
             for v in videos:
-                d = v.get('duration')
-                if d and isinstance(d, str) and d.startswith('PT'):
-                     # Format is PT<seconds>S
-                     try:
-                         sec = d.replace('PT', '').replace('S', '')
-                         v['duration'] = int(float(sec))
-                     except:
-                         pass
+                if v.get('duration_seconds') is not None:
+                    v['duration'] = v['duration_seconds']
+                if v.get('views') is not None:
+                    v['view_count'] = v['views']
 
             if db_table:
                 db_table.rows = videos
@@ -424,20 +422,23 @@ Transcript:
                      
                      full_response = ""
                      first_chunk = True
+                     failed = False
                      async for chunk in client.chat_with_guide_stream(selected_db_video_id, lang, "Hello (Introduce yourself and the topic)", []):
                           if first_chunk:
                                response_message.content = ""
                                first_chunk = False
                                ui.run_javascript("playChatSound()")
                           full_response += chunk
+                          failed = chunk.startswith("Error")
                           response_message.content = full_response
                           ui.run_javascript(f'getElement({chat_container.id}).scrollTop = getElement({chat_container.id}).scrollHeight')
                      
                      if not full_response:
                           response_message.content = "Hello! I'm ready to help you study this video."
                      
-                     # Add intro to history
-                     chat_history.append({"role": "assistant", "content": full_response})
+                     # Add intro to history (a failed stream ends with an "Error" chunk)
+                     if full_response and not failed:
+                          chat_history.append({"role": "assistant", "content": full_response})
                      ui.run_javascript(f'getElement({chat_container.id}).scrollTop = getElement({chat_container.id}).scrollHeight')
                      
                 except Exception as e:
@@ -692,17 +693,22 @@ Transcript:
         
         full_reply = ""
         first = True
+        failed = False
         async for chunk in client.chat_with_guide_stream(selected_db_video_id, lang, msg, chat_history):
              if first:
                  response_message.content = ""
                  first = False
                  ui.run_javascript("playChatSound()")
              full_reply += chunk
+             failed = chunk.startswith("Error")
              response_message.content = full_reply
              ui.run_javascript(f'getElement({chat_container.id}).scrollTop = getElement({chat_container.id}).scrollHeight')
              
-        # Add bot reply to history
-        chat_history.append({"role": "assistant", "content": full_reply})
+        # Add bot reply to history (a failed stream ends with an "Error" chunk)
+        if failed:
+            ui.notify("Chat reply failed", type="negative")
+        else:
+            chat_history.append({"role": "assistant", "content": full_reply})
         ui.run_javascript(f'getElement({chat_container.id}).scrollTop = getElement({chat_container.id}).scrollHeight')
 
     # --- Layout ---
@@ -814,7 +820,12 @@ Transcript:
 
         # --- TAB 2: Lessons ---
         with ui.tab_panel(db_tab):
-            ui.button('Refresh List', icon='refresh', on_click=refresh_db_list)
+            with ui.row().classes('items-center gap-4'):
+                ui.button('Refresh List', icon='refresh', on_click=refresh_db_list)
+                ui.select({'fetched_at': 'Fetched At', 'views': 'Views', 'duration_seconds': 'Duration', 'title': 'Title'},
+                          label='Sort by', on_change=refresh_db_list).bind_value(state, 'db_sort').classes('w-40')
+                ui.select({'desc': 'Descending', 'asc': 'Ascending'},
+                          label='Order', on_change=refresh_db_list).bind_value(state, 'db_order').classes('w-36')
             
             db_table = ui.table(columns=[
                     {'name': 'video_id', 'label': 'ID', 'field': 'video_id'},
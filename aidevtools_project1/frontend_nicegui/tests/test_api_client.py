@@ -62,6 +62,7 @@ async def test_chat_with_guide_stream():
     
     # Mock the stream context manager
     mock_response = MagicMock()
+    mock_response.status_code = 200
     mock_response.aiter_text.return_value = AsyncIterator(["Hello", " World"])
     
     mock_stream_cm = AsyncMock()
@@ -74,3 +75,36 @@ async def test_chat_with_guide_stream():
             
         assert chunks == ["Hello", " World"]
         mock_stream.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_chat_with_guide_stream_reports_http_error():
+    """A non-200 stream response is yielded as a single error chunk."""
+    client = ApiClient()
+
+    mock_response = MagicMock()
+    mock_response.status_code = 500
+    mock_response.aread = AsyncMock()
+    mock_response.json.return_value = {"detail": "Error: quota exceeded"}
+
+    mock_stream_cm = AsyncMock()
+    mock_stream_cm.__aenter__.return_value = mock_response
+
+    with patch("httpx.AsyncClient.stream", return_value=mock_stream_cm):
+        chunks = [c async for c in client.chat_with_guide_stream("123", "en", "Hi", [])]
+
+    assert chunks == ["Error: quota exceeded"]
+    mock_response.aiter_text.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_list_videos_sends_only_set_params():
+    """Test list_videos passes sort/filter params to the API and omits unset ones."""
+    client = ApiClient()
+
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        await client.list_videos()
+        assert mock_get.call_args.kwargs["params"] is None
+
+        await client.list_videos(sort="views", order="desc", min_duration=60, limit=20)
+        args, kwargs = mock_get.call_args
+        assert "/api/v1/db/videos" in args[0]
+        assert kwargs["params"] == {"sort": "views", "order": "desc", "min_duration": 60, "limit": 20}